@@ -8,38 +8,92 @@ from __future__ import absolute_import
 import os
 import glob
 import importlib
+import importlib.util
 import logging
 
-from pkg_resources import iter_entry_points
+from functools import partial
 
 from click import (
     group,
+    Choice,
     option,
     pass_context,
-    version_option
+    version_option,
+    FloatRange,
+    IntRange,
+    Path,
+    UsageError
+)
+from click.core import ParameterSource
+
+from pureport_client import (
+    cache,
+    cassette,
+    completion,
+    manifest,
+    plugins,
+    response_cache,
+    timings
+)
+from pureport_client.daemon_client import SESSION_OPTIONS
+from pureport_client.transport import (
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_MAX_PER_HOST,
+    TransportOptions
 )
-
-from pureport.session import Session
-from pureport.credentials import default
-
 from pureport_client.util import (
     construct_commands,
-    find_client_commands
+    create_client_group,
+    find_client_commands,
+    LazyGroup,
+    LazySession
 )
 
 
 log = logging.getLogger(__name__)
 
+# commands implemented by the client itself instead of a command package
+BUILTIN_COMMANDS = (
+    ('batch', 'pureport_client.batch:batch'),
+    ('cache', 'pureport_client.response_cache:cache_group'),
+    ('daemon', 'pureport_client.daemon:daemon'),
+    ('shell', 'pureport_client.shell:shell'),
+)
+
 
-@group(context_settings={'auto_envvar_prefix': 'PUREPORT'})
+@group(cls=LazyGroup, context_settings={'auto_envvar_prefix': 'PUREPORT'})
 @option('-u', '--api_url', help='The api url for this client.')
 @option('-k', '--api_key', help='The API Key.')
 @option('-s', '--api_secret', help='The API Key secret.')
 @option('-p', '--api_profile', help='The API Profile if using file-based configuration.')
 @option('-t', '--access_token', help='The API Key access token.')
+@option('--max-connections', type=IntRange(min=1),
+        help='The maximum number of requests sent to the API at the same time.')
+@option('--max-per-host', type=IntRange(min=1), default=DEFAULT_MAX_PER_HOST, show_default=True,
+        help='The number of connections kept open to the API.')
+@option('--keepalive-timeout', type=FloatRange(min=0), default=DEFAULT_KEEPALIVE_TIMEOUT, show_default=True,
+        help='Close connections that are idle for this many seconds, 0 to never close them.')
+@option('--connect-timeout', type=FloatRange(min=0), help='The connect timeout in seconds.')
+@option('--read-timeout', type=FloatRange(min=0), help='The read timeout in seconds.')
+@option('--rate-limit', type=FloatRange(min=0),
+        help='The maximum number of requests per second for the profile, 0 for no limit.')
+@option('--rate-burst', type=IntRange(min=1),
+        help='The number of requests that can be sent at once before the rate limit applies.')
+@option('--no-cache', is_flag=True, help='Do not use or save cached API responses.')
+@option('--refresh', is_flag=True, help='Ignore cached API responses but save the new responses.')
+@option('--timings', 'show_timings', is_flag=True,
+        help='Print the time spent on each endpoint and on local work to stderr.')
+@option('--record', type=Path(dir_okay=False, writable=True),
+        help='Record the requests sent to the API to a cassette file.')
+@option('--replay', type=Path(exists=True, dir_okay=False),
+        help='Answer requests from a cassette file instead of the API.')
+@option('--replay-latency', type=Choice(cassette.LATENCIES), default=cassette.LATENCY_RECORDED, show_default=True,
+        help='Return replayed responses after the recorded time or immediately.')
 @version_option()
 @pass_context
-def cli(ctx, api_url, api_key, api_secret, api_profile, access_token):
+def cli(ctx, api_url, api_key, api_secret, api_profile, access_token, max_connections, max_per_host,
+        keepalive_timeout, connect_timeout, read_timeout, rate_limit, rate_burst, no_cache, refresh, show_timings,
+        record, replay, replay_latency):
     """
     \f
     :param ctx: internal context instance
@@ -60,18 +114,194 @@ def cli(ctx, api_url, api_key, api_secret, api_profile, access_token):
     :param access_token: Pureport API access token
     :type access_token: str
 
+    :param max_connections: maximum number of requests in flight
+    :type max_connections: int
+
+    :param max_per_host: number of connections kept open per host
+    :type max_per_host: int
+
+    :param keepalive_timeout: seconds before idle connections are closed
+    :type keepalive_timeout: float
+
+    :param connect_timeout: connect timeout in seconds
+    :type connect_timeout: float
+
+    :param read_timeout: read timeout in seconds
+    :type read_timeout: float
+
+    :param rate_limit: maximum number of requests per second
+    :type rate_limit: float
+
+    :param rate_burst: number of requests sent at once before the rate
+        limit applies
+    :type rate_burst: int
+
+    :param no_cache: bypass the response cache
+    :type no_cache: bool
+
+    :param refresh: ignore cached responses
+    :type refresh: bool
+
+    :param show_timings: print the timings of the command to stderr
+    :type show_timings: bool
+
+    :param record: the cassette file to record requests to
+    :type record: str
+
+    :param replay: the cassette file to answer requests from
+    :type replay: str
+
+    :param replay_latency: `recorded` or `none`
+    :type replay_latency: str
+
     :returns: None
     """
-    # FIXME current Session class doesn't allow credentials to be passed in so
-    # we work around it with environment variables
-    if api_url:
-        os.environ['PUREPORT_API_BASE_URL'] = api_url
-    if api_key:
-        os.environ['PUREPORT_API_KEY'] = api_key
-    if api_secret:
-        os.environ['PUREPORT_API_SECRET'] = api_secret
+    if record and replay:
+        raise UsageError('--record and --replay cannot be used together')
+    if ctx.obj is not None:
+        check_shared_session(ctx)
+
+    # recorded and replayed requests are never answered from the
+    # response cache
+    mode = cache_mode(no_cache or record or replay, refresh)
+    ctx.call_on_close(partial(response_cache.reset_mode, response_cache.set_mode(mode)))
+
+    if show_timings:
+        report = timings.Report()
+        ctx.call_on_close(report.close)
+        ctx.call_on_close(partial(timings.remove_collector, timings.add_collector(report)))
+
+    # the session is shared when commands are run in process, for
+    # instance by the daemon
+    if ctx.obj is None:
+        recording = open_cassette(record, replay, replay_latency)
+        if recording is not None:
+            ctx.call_on_close(recording.close)
+        options = TransportOptions(max_connections, max_per_host, keepalive_timeout,
+                                   connect_timeout, read_timeout)
+        ctx.obj = LazySession(partial(create_session, options, api_url=api_url, api_key=api_key,
+                                      api_secret=api_secret, api_profile=api_profile,
+                                      rate_limit=rate_limit, rate_burst=rate_burst, cassette=recording))
+
+
+def check_shared_session(ctx):
+    """Refuse the options of the session given to a command of a shared session
+
+    Commands run by batch, shell or the daemon share a session that
+    can't be configured for one command.
+
+    :param ctx: the context of the root command
+    :type ctx: `click.Context`
+
+    :raises: `click.UsageError`
+    """
+    for param in ctx.command.params:
+        if param.name in SESSION_OPTIONS and \
+                ctx.get_parameter_source(param.name) == ParameterSource.COMMANDLINE:
+            raise UsageError('{} cannot be used with a shared session, give it to the batch '
+                             'or shell command instead'.format(param.opts[-1]))
+
+
+def cache_mode(no_cache, refresh):
+    """Returns the mode of the response cache
+
+    :param no_cache: bypass the response cache
+    :type no_cache: bool
+
+    :param refresh: ignore cached responses
+    :type refresh: bool
+
+    :returns: the mode, see `pureport_client.response_cache.set_mode`
+    :rtype: str
+    """
+    if no_cache:
+        return response_cache.MODE_OFF
+    if refresh:
+        return response_cache.MODE_REFRESH
+    return response_cache.MODE_ON
+
+
+def open_cassette(record=None, replay=None, replay_latency=cassette.LATENCY_RECORDED):
+    """Returns the cassette requests are recorded to or replayed from
+
+    :param record: the cassette file to record requests to
+    :type record: str
+
+    :param replay: the cassette file to answer requests from
+    :type replay: str
+
+    :param replay_latency: `recorded` or `none`
+    :type replay_latency: str
+
+    :returns: the cassette or None if requests aren't recorded or
+        replayed
+    :rtype: `pureport_client.cassette.Cassette`
+
+    :raises: `click.UsageError`
+    """
+    if record:
+        return cassette.Recorder(record)
+    if replay:
+        try:
+            return cassette.Player(replay, replay_latency)
+        except (OSError, ValueError) as exc:
+            raise UsageError('unable to replay {}: {}'.format(replay, exc))
+    return None
+
+
+def create_session(options=None, api_url=None, api_key=None, api_secret=None, api_profile=None,
+                   rate_limit=None, rate_burst=None, cassette=None):
+    """Create the Pureport API session
+
+    The `pureport` modules are imported here so the cost of importing
+    them is only paid by commands that send requests to the API.
+
+    :param options: the connection pool options
+    :type options: `pureport_client.transport.TransportOptions`
+
+    :param api_url: the base URL of the API
+    :type api_url: str
+
+    :param api_key: the API key
+    :type api_key: str
+
+    :param api_secret: the API key secret
+    :type api_secret: str
+
+    :param api_profile: the profile in the credentials file
+    :type api_profile: str
+
+    :param rate_limit: the maximum number of requests per second
+    :type rate_limit: float
+
+    :param rate_burst: the number of requests sent at once before the
+        rate limit applies
+    :type rate_burst: int
+
+    :param cassette: records or replays the requests of the session
+    :type cassette: `pureport_client.cassette.Cassette`
+
+    :returns: an instance of Session
+    :rtype: `pureport_client.session.Session`
+    """
+    from pureport_client.session import create
+    return create(options, api_url=api_url, api_key=api_key, api_secret=api_secret, api_profile=api_profile,
+                  rate_limit=rate_limit, rate_burst=rate_burst, cassette=cassette)
+
 
-    ctx.obj = Session(*default(), automake_bindings=True)
+def find_module(name):
+    """Checks if a module can be imported without importing it
+
+    :param name: the fully qualified name of the module
+    :type name: str
+
+    :returns: True if the module exists otherwise False
+    :rtype: bool
+    """
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ImportError:
+        return False
 
 
 def load(pkg):
@@ -82,19 +312,34 @@ def load(pkg):
     command['commands'] = list()
 
     for item in find_client_commands(module.Command):
-        try:
-            mod = importlib.import_module(".".join((module.__package__, item.__name__)))
+        name = ".".join((module.__package__, item.__name__))
+        if find_module(name):
+            # the sub-command module is only imported once the group
+            # is resolved, see `pureport_client.util.LazyGroup`
             command['commands'].append({
                 'name': item.__name__.replace('_', '-'),
                 'context': getattr(module.Command, item.__name__),
-                'commands': find_client_commands(mod.Command)
+                'module': name
             })
-        except ImportError:
+        else:
             command['commands'].append(item)
 
     return command
 
 
+def load_command(pkg):
+    """Import a command package and construct its command group
+
+    :param pkg: the fully qualified name of the command package
+    :type pkg: str
+
+    :returns: an instance of click Group
+    :rtype: `click.core.Group`
+    """
+    log.debug("loading package {}".format(pkg))
+    return next(construct_commands([load(pkg)]))
+
+
 def find(path):
     for item in glob.glob(os.path.join(path, 'commands/*')):
         if os.path.isdir(item):
@@ -102,27 +347,49 @@ def find(path):
                 yield item
 
 
-def load_plugins():
-    plugins = list()
+def load_plugin(entry_point):
+    """Import a plugin and construct its command group
+
+    The plugin packages are added to the group using loaders so they
+    are only imported when the plugin command is invoked.
 
-    for item in iter_entry_points('pureport_client.plugins'):
-        plugin = item.load()
+    :param entry_point: the plugin entry point
+    :type entry_point: `pureport_client.plugins.EntryPoint`
 
-        plugin_name = item.name.replace('_', '-')
-        plugin_commands = list()
+    :returns: an instance of click Group
+    :rtype: `click.core.Group`
+    """
+    plugin = entry_point.load()
+    module = importlib.import_module('.'.join((plugin.__package__, 'commands')))
+
+    grp = create_client_group(getattr(module, 'Command'),
+                              entry_point.name.replace('_', '-'),
+                              cls=LazyGroup)
+
+    for item in find(os.path.dirname(plugin.__file__)):
+        pkg = ".".join((plugin.__package__, 'commands', os.path.basename(item)))
+        log.debug("found plugin package {}".format(pkg))
+        grp.add_lazy_command(os.path.basename(item).replace('_', '-'),
+                             partial(load_command, pkg))
 
-        for item in find(os.path.dirname(plugin.__file__)):
-            pkg = ".".join((plugin.__package__, 'commands', os.path.basename(item)))
-            log.debug("loading plugin package {}".format(pkg))
-            plugin_commands.append(load(pkg))
+    return grp
 
-        module = importlib.import_module('.'.join((plugin.__package__, 'commands')))
 
-        plugins.append({'name': plugin_name,
-                        'context': getattr(module, 'Command'),
-                        'commands': plugin_commands})
+def load_plugins(entry_points):
+    """Discover all installed plugins
 
-    return plugins
+    :param entry_points: the plugin entry points
+    :type entry_points: list
+
+    :returns: a list of name, loader tuples
+    :rtype: list
+    """
+    items = list()
+
+    for item in entry_points:
+        items.append((item.name.replace('_', '-'), partial(load_plugin, item)))
+
+    return items
 
 
 def make(cli):
@@ -132,6 +399,14 @@ def make(cli):
     module and add them to the CLI tree.  Each command must implement
     the `pureport.commands.CommandBase` object.
 
+    The discovered command tree is saved to the command manifest (see
+    `pureport_client.manifest`) and subsequent calls construct the tree
+    from the manifest instead.  The completion index (see
+    `pureport_client.completion`) is written along with the manifest, or
+    when it is missing.  If the cli is an instance of
+    `pureport_client.util.LazyGroup`, the command packages are not imported
+    until the command is invoked or its help text is displayed.
+
     :param cli: the instance of the cli
     :type cli: `click.core.Group`
 
@@ -142,19 +417,43 @@ def make(cli):
     # introspection is not more than two levels deep.  This will need to be
     # modified in the future, if more than two command levels are required.
 
-    commands = load_plugins()
+    entry_points = plugins.entry_points()
+
+    commands = manifest.read(entry_points)
+    rebuilt = commands is None
+
+    if commands is None:
+        commands = load_plugins(entry_points)
 
-    for item in find(os.path.dirname(__file__)):
-        pkg = ".".join((__package__, 'commands', os.path.basename(item)))
-        log.debug("loading core package {}".format(pkg))
-        commands.append(load(pkg))
+        for item in find(os.path.dirname(__file__)):
+            pkg = ".".join((__package__, 'commands', os.path.basename(item)))
+            log.debug("found core package {}".format(pkg))
+            commands.append((os.path.basename(item).replace('_', '-'),
+                             partial(load_command, pkg)))
 
-    for command in construct_commands(commands):
-        cli.add_command(command)
+        if cache.writable():
+            commands = manifest.write(entry_points, commands) or commands
+
+    commands = list(commands)
+    commands.extend((name, partial(manifest.resolve, ref)) for name, ref in BUILTIN_COMMANDS)
+
+    for name, loader in commands:
+        if isinstance(cli, LazyGroup):
+            cli.add_lazy_command(name, loader)
+        else:
+            cli.add_command(loader(), name)
+
+    # the index is only read when completing, so it isn't validated here
+    if (rebuilt or not completion.exists()) and cache.writable():
+        completion.write(cli, entry_points)
 
 
 def run():
     """Main entry point for the command line interface
+
+    The command tree is constructed and the command is run in this
+    process.  Commands are sent to the daemon by
+    `pureport_client.console.run` before this module is imported.
     """
     make(cli)
     cli()
@@ -0,0 +1,1018 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The aio module runs the Pureport API client under asyncio.
+
+:class:`AsyncSession` sends requests with a native asyncio HTTP/1.1
+connection pool, :class:`AsyncConnectionPool`, so any number of requests
+can be in flight without a thread per request.  The pool is shared by all
+tasks using the session and is configured with the same
+`pureport_client.transport.TransportOptions` as the synchronous session.
+Responses are cached and revalidated by `pureport_client.response_cache`,
+identical GET requests in flight are coalesced and requests are rate
+limited by `pureport_client.ratelimit` just like the synchronous session.
+
+.. code-block:: python
+
+    from pureport_client import aio
+    from pureport_client.commands.accounts import Command as Accounts
+
+    async with aio.AsyncSession(credentials) as session:
+        accounts = aio.asynchronous(Accounts)(session)
+        networks = await accounts.networks('ac-1')
+        for network in await networks.list():
+            ...
+
+The typed functions of the session, such as `find_networks`, and the
+methods of the command classes returned by :func:`asynchronous` are
+coroutines.  New commands can be written as native coroutines by
+deriving from :class:`AsyncCommandBase`, :class:`AsyncAccountsMixin` and
+:class:`AsyncNetworksMixin`.
+
+The existing synchronous command code and the generated functions are
+reused by :meth:`AsyncSession.run`, which runs a synchronous function with
+a stand-in for the session.  Each time the function sends a request, or
+sleeps while waiting for a connection to change state, the function is
+stopped, the request is sent (or the sleep is awaited) without blocking
+the event loop and the function is run again with the responses received
+so far.  Since sleeps are awaited as well, the waiters used by commands
+such as `connections update --wait_until_active` don't block the event
+loop.  Because everything the function does before its last request is
+done again for each request, commands that page through results or have
+side effects between requests, such as `accounts audit-log query --all`
+and `accounts audit-log sync`, raise `NotImplementedError` instead.  Use
+:func:`paginate` to iterate over every page of a paginated result.
+Commands that accept many IDs, such as `connections get`, look up each ID
+with a run of its own, up to `parallel` of them at the same time.
+"""
+
+from __future__ import absolute_import
+
+import io
+import ssl
+import json
+import time
+import asyncio
+
+from contextlib import asynccontextmanager
+from functools import wraps
+from http.client import (
+    parse_headers,
+    BadStatusLine,
+    HTTPException
+)
+from logging import getLogger
+from urllib.parse import (
+    urlencode,
+    urljoin,
+    urlsplit
+)
+
+from click import UsageError
+from pureport import defaults
+from pureport.exceptions import (
+    PureportHttpError,
+    PureportTransportError
+)
+
+from pureport_client import (
+    bindings,
+    helpers,
+    ratelimit,
+    response_cache,
+    routes,
+    timings,
+    tokens,
+    transport
+)
+from pureport_client.commands import (
+    ACCOUNT_URL,
+    DEFAULT_PARALLEL,
+    NETWORK_URL,
+    AccountsMixin,
+    CommandBase,
+    NetworksMixin,
+    Results,
+    Stream,
+    read_ids
+)
+from pureport_client.util import find_client_commands
+
+log = getLogger(__name__)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+HTTP_VERSIONS = ('HTTP/1.0', 'HTTP/1.1')
+
+
+class AsyncResponse(object):
+    """An HTTP response received by :class:`AsyncConnectionPool`
+
+    Provides the same interface as `pureport.transport.Response`.
+    """
+
+    def __init__(self, status, headers, data):
+        self.status = status
+        self.headers = headers
+        self.data = data
+
+    @property
+    def json(self):
+        try:
+            return json.loads(self.data)
+        except ValueError:
+            return None
+
+
+async def read_head(reader):
+    """Read the status line and headers of an HTTP/1.x response
+
+    The headers are parsed by `http.client.parse_headers`.  Informational
+    responses, such as 100 Continue, are skipped.
+
+    :param reader: the stream
+    :type reader: `asyncio.StreamReader`
+
+    :returns: the HTTP version, the status and the headers
+    :rtype: tuple
+
+    :raises: `http.client.HTTPException`
+    """
+    from urllib3._collections import HTTPHeaderDict
+
+    while True:
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError:
+            raise HTTPException("response headers are too long")
+        except asyncio.IncompleteReadError as exc:
+            if not exc.partial:
+                raise ConnectionResetError("connection closed by the server")
+            raise
+
+        line, _, rest = head.partition(b'\r\n')
+        parts = line.decode('latin-1').split(None, 2)
+        if len(parts) < 2 or parts[0] not in HTTP_VERSIONS or not parts[1].isdigit():
+            raise BadStatusLine(line.decode('latin-1'))
+        status = int(parts[1])
+        if status == 101:
+            raise HTTPException("protocol upgrades are not supported")
+        if status >= 200:
+            break
+
+    headers = HTTPHeaderDict()
+    for name, value in parse_headers(io.BytesIO(rest)).items():
+        headers.add(name, value)
+    return parts[0], status, headers
+
+
+async def read_chunked(reader):
+    """Read a body sent with the chunked transfer encoding
+
+    Chunk extensions and trailers are ignored.
+
+    :param reader: the stream
+    :type reader: `asyncio.StreamReader`
+
+    :returns: the body
+    :rtype: bytes
+
+    :raises: `http.client.HTTPException`
+    """
+    chunks = []
+    while True:
+        line = await reader.readline()
+        try:
+            size = int(line.split(b';')[0].strip(), 16)
+        except ValueError:
+            raise HTTPException("invalid chunk size {!r}".format(line))
+        if size == 0:
+            break
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+        pass
+    return b''.join(chunks)
+
+
+async def read_body(reader, method, status, headers):
+    """Read the body of an HTTP/1.x response
+
+    :param reader: the stream
+    :type reader: `asyncio.StreamReader`
+
+    :param method: the request method
+    :type method: str
+
+    :param status: the response status
+    :type status: int
+
+    :param headers: the response headers
+    :type headers: `urllib3._collections.HTTPHeaderDict`
+
+    :returns: the body and True if it was delimited by closing the
+        connection
+    :rtype: tuple
+
+    :raises: `http.client.HTTPException`
+    """
+    if method == 'HEAD' or status in (204, 304):
+        return b'', False
+    if 'chunked' in (headers.get('Transfer-Encoding') or '').lower():
+        return await read_chunked(reader), False
+    if headers.get('Content-Length') is not None:
+        try:
+            length = int(headers['Content-Length'])
+        except ValueError:
+            raise HTTPException("invalid content length {!r}".format(headers['Content-Length']))
+        return await reader.readexactly(length), False
+    return await reader.read(), True
+
+
+async def read_response(reader, method):
+    """Read an HTTP/1.x response from a stream
+
+    Only what the Pureport API sends is supported: bodies delimited by
+    `Content-Length`, the chunked transfer encoding or by closing the
+    connection, without a content encoding since requests are sent with
+    `Accept-Encoding: identity`.  Upgrades aren't supported.
+
+    :param reader: the stream
+    :type reader: `asyncio.StreamReader`
+
+    :param method: the request method
+    :type method: str
+
+    :returns: the response and True if the connection can be reused
+    :rtype: tuple
+
+    :raises: `http.client.HTTPException`
+    """
+    version, status, headers = await read_head(reader)
+
+    timing = timings.current()
+    if timing is not None:
+        timing.end('ttfb')
+
+    data, until_close = await read_body(reader, method, status, headers)
+
+    connection = (headers.get('Connection') or '').lower()
+    if version == 'HTTP/1.1':
+        keep_alive = 'close' not in connection
+    else:
+        keep_alive = 'keep-alive' in connection
+
+    if timing is not None:
+        timing.end('download')
+    return AsyncResponse(status, headers, data), keep_alive and not until_close
+
+
+class AsyncConnectionPool(object):
+    """A pool of keep-alive HTTP/1.1 connections for asyncio
+
+    Connections are kept open to each host and reused by all tasks.  The
+    pool must only be used by one event loop.
+    """
+
+    def __init__(self, options=None, headers=None):
+        """Initialize the instance
+
+        :param options: the pool options
+        :type options: `pureport_client.transport.TransportOptions`
+
+        :param headers: headers sent with every request
+        :type headers: dict
+        """
+        self.options = options or transport.TransportOptions()
+        self.headers = headers or {}
+        self._idle = {}
+        self._slots = {}
+        self._ssl = None
+
+    def _ssl_context(self):
+        if self._ssl is None:
+            self._ssl = ssl.create_default_context()
+        return self._ssl
+
+    def _take(self, key):
+        """Returns an idle connection to a host or None
+        """
+        idle = self._idle.get(key, [])
+        while idle:
+            reader, writer, last_used = idle.pop()
+            expired = self.options.keepalive_timeout and \
+                time.monotonic() - last_used > self.options.keepalive_timeout
+            if expired or writer.is_closing() or reader.at_eof():
+                log.debug("closing idle connection to {}".format(key[1]))
+                writer.close()
+                continue
+            return reader, writer
+        return None
+
+    async def _connect(self, key):
+        scheme, host, port = key
+        kwargs = {'ssl': self._ssl_context(), 'server_hostname': host} if scheme == 'https' else {}
+        return await asyncio.wait_for(asyncio.open_connection(host, port, **kwargs),
+                                      self.options.connect_timeout)
+
+    def _encode(self, method, url, body=None, headers=None):
+        """Returns the key of the host of a request and the request bytes
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        key = (scheme, parts.hostname, parts.port or DEFAULT_PORTS.get(scheme, 80))
+
+        target = parts.path or '/'
+        if parts.query:
+            target = '{}?{}'.format(target, parts.query)
+
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        request_headers = {'Host': parts.netloc, 'Accept-Encoding': 'identity'}
+        request_headers.update(self.headers)
+        request_headers.update(headers or {})
+        if body is not None or method in ('POST', 'PUT', 'PATCH'):
+            request_headers['Content-Length'] = str(len(body or b''))
+
+        lines = ['{} {} HTTP/1.1'.format(method, target)]
+        lines.extend('{}: {}'.format(k, v) for k, v in request_headers.items())
+        return key, '\r\n'.join(lines).encode('latin-1') + b'\r\n\r\n' + (body or b'')
+
+    async def _exchange(self, key, conn, method, data):
+        """Send a request on a connection, opened if None, and read the response
+        """
+        timing = timings.current()
+        if conn is None:
+            if timing is not None:
+                timing.start()
+            conn = await self._connect(key)
+            # includes resolving the host and negotiating TLS
+            if timing is not None:
+                timing.end('connect')
+        if timing is not None:
+            timing.start()
+        reader, writer = conn
+        try:
+            writer.write(data)
+            await writer.drain()
+            response, keep_alive = await asyncio.wait_for(read_response(reader, method), self.options.read_timeout)
+        except BaseException:
+            writer.close()
+            raise
+        return response, keep_alive, conn
+
+    async def request(self, method, url, body=None, headers=None):
+        """Send a request
+
+        :param method: the HTTP method
+        :type method: str
+
+        :param url: the absolute URL
+        :type url: str
+
+        :param body: the request body
+        :type body: str
+
+        :param headers: the request headers
+        :type headers: dict
+
+        :returns: the response
+        :rtype: `AsyncResponse`
+
+        :raises: `pureport.exceptions.PureportTransportError`
+        """
+        method = method.upper()
+        key, data = self._encode(method, url, body=body, headers=headers)
+
+        if key not in self._slots:
+            self._slots[key] = asyncio.Semaphore(self.options.max_per_host)
+
+        async with self._slots[key]:
+            conn = self._take(key)
+            try:
+                try:
+                    response, keep_alive, conn = await self._exchange(key, conn, method, data)
+                except (OSError, EOFError, asyncio.IncompleteReadError):
+                    # a connection from the pool may have been closed by
+                    # the server, the request is sent again on a new one
+                    if conn is None:
+                        raise
+                    log.debug("reconnecting to {}".format(key[1]))
+                    response, keep_alive, conn = await self._exchange(key, None, method, data)
+            except (OSError, EOFError, asyncio.IncompleteReadError, HTTPException) as exc:
+                raise PureportTransportError(str(exc) or defaults.generic_transport_error_message, exc=exc)
+            except asyncio.TimeoutError as exc:
+                raise PureportTransportError("request to {} timed out".format(key[1]), exc=exc)
+
+            if keep_alive:
+                self._idle.setdefault(key, []).append((conn[0], conn[1], time.monotonic()))
+            else:
+                conn[1].close()
+
+        return response
+
+    async def close(self):
+        """Close all idle connections
+        """
+        for idle in self._idle.values():
+            for _, writer, _ in idle:
+                writer.close()
+        self._idle.clear()
+
+
+class Pending(BaseException):
+    """Raised to stop a function run by :meth:`AsyncSession.run`
+
+    This derives from `BaseException` so it isn't handled by the
+    function.
+    """
+
+    def __init__(self, event):
+        super(Pending, self).__init__(event)
+        self.event = event
+
+
+class Recorder(object):
+    """Stands in for the session while a function is run by
+    :meth:`AsyncSession.run`
+
+    The results of the requests and sleeps that have already been
+    awaited are returned, in order for identical requests, and any other
+    request or sleep stops the function with :class:`Pending`.  Requests
+    are matched by their content since a function run again may skip a
+    request whose result was cached the first time, for instance the
+    request for the API spec.
+    """
+
+    def __init__(self, session, results):
+        self._session = session
+        self._results = results
+        self._used = set()
+
+    base_url = property(lambda self: self._session.base_url)
+
+    def _next(self, event):
+        for index, (recorded, result) in enumerate(self._results):
+            if index not in self._used and recorded == event:
+                self._used.add(index)
+                if isinstance(result, Exception):
+                    raise result
+                return result
+        raise Pending(event)
+
+    def __call__(self, method, url, body=None, headers=None, query=None):
+        return self._next(('request', method.upper(), url, body, headers, query))
+
+    def sleep(self, seconds):
+        return self._next(('sleep', seconds))
+
+    def get(self, url, body=None, headers=None, query=None, json=None):
+        if url == bindings.API_URL and body is None and query is None:
+            return bindings.ApiResponse(200, bindings.get_api(self).spec)
+        return self('GET', url, body=body_of(body, json), headers=headers, query=query)
+
+    def post(self, url, body=None, headers=None, query=None, json=None):
+        return self('POST', url, body=body_of(body, json), headers=headers, query=query)
+
+    def put(self, url, body=None, headers=None, query=None, json=None):
+        return self('PUT', url, body=body_of(body, json), headers=headers, query=query)
+
+    def delete(self, url, body=None, headers=None, query=None, json=None):
+        return self('DELETE', url, body=body_of(body, json), headers=headers, query=query)
+
+    @property
+    def account_id(self):
+        if self._session._account_id is None:
+            objects = self.get('/accounts').json
+            candidates = [o['id'] for o in objects]
+            for item in objects:
+                if item['parent']['id'] not in candidates:
+                    break
+            else:
+                item = None
+            self._session._account_id = item['id']
+        return self._session._account_id
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        func = bindings.bind(self, name)
+        setattr(self, name, func)
+        return func
+
+
+def body_of(body, obj):
+    return json.dumps(obj) if obj is not None else body
+
+
+class AsyncSession(object):
+    """Pureport API session for asyncio
+    """
+
+    def __init__(self, credentials, base_url=None, options=None, pool=None, token_cache=None,
+                 rate_limiter=None):
+        """Initializes a new instance of `AsyncSession`
+
+        :param credentials: credentials object to use to authorize
+            the session with the Pureport API
+        :type credentials: :class:`pureport.credentials.Credentials`
+
+        :param base_url: sets the base URL to use when making requests
+            of the Pureport API
+        :type base_url: str
+
+        :param options: the connection pool options
+        :type options: `pureport_client.transport.TransportOptions`
+
+        :param pool: the connection pool, to share one pool between
+            sessions, a new pool is created if not set
+        :type pool: `AsyncConnectionPool`
+
+        :param token_cache: saves the access token between sessions,
+            the session logs in every time it is created if not set
+        :type token_cache: `pureport_client.tokens.TokenCache`
+
+        :param rate_limiter: limits the rate of requests, throttled
+            requests are still retried if not set
+        :type rate_limiter: `pureport_client.ratelimit.RateLimiter`
+        """
+        self.credentials = credentials
+        self.base_url = base_url or defaults.api_base_url
+        self.options = options or transport.TransportOptions()
+        self.pool = pool or AsyncConnectionPool(self.options, headers={'Content-Type': 'application/json'})
+        self.authorization_header = None
+        self.authorization_expiration = None
+        self._account_id = None
+        self._limiter = None
+        self._auth_lock = None
+        self._flights = {}
+        self.token_cache = token_cache
+        self.rate_limiter = rate_limiter or ratelimit.RateLimiter()
+
+        scope = getattr(credentials, 'key', None)
+        self.responses = response_cache.ResponseCache(self.base_url, scope)
+        self.validators = response_cache.ValidatorCache(self.base_url, scope)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close the idle connections of the pool
+        """
+        await self.pool.close()
+
+    def __getattr__(self, name):
+        # the typed functions for API operations, such as `find_networks`
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        async def func(*args, **kwargs):
+            return await self.run(lambda client: getattr(client, name)(*args, **kwargs))
+
+        func.__name__ = name
+        setattr(self, name, func)
+        return func
+
+    @property
+    def authorized(self):
+        if self.authorization_header is not None:
+            if self.authorization_expiration >= time.time():
+                return True
+        return False
+
+    async def authorize(self):
+        """Authorize the session against the Pureport API
+
+        Only one task authorizes the session at a time.  The access
+        token is saved to and refreshed from the token cache in the same
+        way as `pureport_client.session.Session.authorize`.
+        """
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        async with self._auth_lock:
+            if self.authorized:
+                return
+            if self.token_cache is None:
+                data = await self.login('/login', self.credentials._asdict())
+                self.authorization_header = {'Authorization': 'Bearer {access_token}'.format(**data)}
+                self.authorization_expiration = time.time() + data['expires_in']
+                return
+
+            entry = self.token_cache.get()
+            if not tokens.usable(entry):
+                if entry is not None and entry.get('refresh_token'):
+                    try:
+                        entry = self.token_cache.put(
+                            await self.login('/login/refresh', {'refreshToken': entry['refresh_token']}), entry)
+                    except PureportTransportError as exc:
+                        log.debug("unable to refresh access token: {}".format(exc))
+                        entry = None
+                else:
+                    entry = None
+                if entry is None:
+                    entry = self.token_cache.put(await self.login('/login', self.credentials._asdict()))
+
+            self.authorization_header, self.authorization_expiration = tokens.authorization(entry)
+
+    async def login(self, url, body):
+        resp = await self.pool.request('POST', urljoin(self.base_url, url), body=json.dumps(body),
+                                       headers={'Content-Type': 'application/json'})
+        if resp.status >= 400:
+            raise PureportHttpError(resp)
+        return json.loads(resp.data)
+
+    @asynccontextmanager
+    async def _acquire(self):
+        if not self.options.max_connections:
+            yield
+            return
+        if self._limiter is None:
+            self._limiter = asyncio.Semaphore(self.options.max_connections)
+        async with self._limiter:
+            yield
+
+    async def __call__(self, method, url, body=None, headers=None, query=None):
+        """Send a request to the API
+
+        :param method: the HTTP method
+        :type method: str
+
+        :param url: the URL relative to the base URL
+        :type url: str
+
+        :param body: the request body
+        :type body: str
+
+        :param headers: the request headers
+        :type headers: dict
+
+        :param query: the query string parameters
+        :type query: dict
+
+        :returns: the response
+        :rtype: `AsyncResponse`
+
+        :raises: `pureport.exceptions.PureportHttpError`
+        """
+        # cached responses are returned before the session is authorized
+        resp = self.responses.get(method, url, query=query, body=body)
+        if resp is not None:
+            return resp
+
+        key = transport.flight_key(method, url, body=body, headers=headers, query=query)
+        if key is None:
+            return await self._send(method, url, body=body, headers=headers, query=query)
+
+        # identical GET requests in flight share the response, the request
+        # is shielded so it isn't cancelled with the first caller
+        flight = self._flights.get(key)
+        if flight is not None:
+            response_cache.count('coalesced')
+            return await asyncio.shield(flight)
+
+        async def send():
+            try:
+                return transport.SharedResponse(await self._send(method, url, body=body, headers=headers, query=query))
+            finally:
+                del self._flights[key]
+
+        flight = self._flights[key] = asyncio.ensure_future(send())
+        return await asyncio.shield(flight)
+
+    async def _send(self, method, url, body=None, headers=None, query=None):
+        saved = None
+        if url != bindings.API_URL:
+            saved = self.validators.get(method, url, headers=headers, query=query, body=body)
+            if saved is not None:
+                headers = dict(headers or {}, **response_cache.conditions(saved))
+
+        if not self.authorized:
+            await self.authorize()
+
+        headers = dict(headers or {})
+        headers.update(self.authorization_header)
+
+        if isinstance(body, dict):
+            body = json.dumps(body)
+
+        target = urljoin(self.base_url, url)
+        if query:
+            target = '{}?{}'.format(target, urlencode(query, doseq=True))
+
+        log.debug("sending {} request to {}".format(method, target))
+        resp = await self._send_throttled(method, url, target, body, headers)
+
+        if resp.status >= 400:
+            raise PureportHttpError(resp)
+
+        if saved is not None and resp.status == 304:
+            response_cache.count('not_modified')
+            resp = response_cache.CachedResponse(saved)
+        elif url != bindings.API_URL:
+            self.validators.put(method, url, resp, query=query, body=body)
+
+        self.responses.put(method, url, resp, query=query, body=body)
+        return resp
+
+    async def _send_throttled(self, method, url, target, body, headers):
+        idempotent = routes.registry.policy(method, url)['idempotent']
+        attempt = 0
+        while True:
+            seconds = self.rate_limiter.wait()
+            if seconds:
+                await asyncio.sleep(seconds)
+                continue
+            async with self._acquire():
+                with timings.measure(method, url) as timing:
+                    resp = await self.pool.request(method, target, body=body, headers=headers)
+                    if timing is not None:
+                        resp = timing.decoded(resp)
+            # throttled requests are retried once the limiter allows it
+            if self.rate_limiter.throttled(resp, attempt, idempotent) is None:
+                return resp
+            attempt += 1
+
+    async def get(self, url, body=None, headers=None, query=None, json=None):
+        return await self('GET', url, body=body_of(body, json), headers=headers, query=query)
+
+    async def post(self, url, body=None, headers=None, query=None, json=None):
+        return await self('POST', url, body=body_of(body, json), headers=headers, query=query)
+
+    async def put(self, url, body=None, headers=None, query=None, json=None):
+        return await self('PUT', url, body=body_of(body, json), headers=headers, query=query)
+
+    async def delete(self, url, body=None, headers=None, query=None, json=None):
+        return await self('DELETE', url, body=body_of(body, json), headers=headers, query=query)
+
+    async def get_account_id(self):
+        """Returns the ID of the account of the credentials
+
+        :returns: the account ID
+        :rtype: str
+        """
+        return await self.run(lambda client: client.account_id)
+
+    async def run(self, func, *args, **kwargs):
+        """Run a synchronous function that sends requests
+
+        The function is called with a stand-in for the session as the
+        first argument followed by `args` and `kwargs` and is run again
+        each time it sends a request or sleeps, see the module
+        documentation.
+
+        :param func: the function
+        :type func: function
+
+        :returns: the return value of the function
+        :rtype: object
+        """
+        results = []
+        while True:
+            recorder = Recorder(self, results)
+            token = helpers.sleeper.set(recorder.sleep)
+            try:
+                return func(recorder, *args, **kwargs)
+            except Pending as pending:
+                event = pending.event
+            finally:
+                helpers.sleeper.reset(token)
+
+            if event[0] == 'sleep':
+                await asyncio.sleep(event[1])
+                results.append((event, None))
+                continue
+
+            try:
+                result = await self(*event[1:])
+            except Exception as exc:
+                result = exc
+            results.append((event, result))
+
+
+class AsyncCommandBase(CommandBase):
+    """Base implementation of a command run under asyncio
+    """
+
+    async def __call__(self, method, url, *args, **kwargs):
+        """Send the request to the API and return the results
+
+        :param method: the HTTP method to call
+        :type method: str
+
+        :param url: the URL to send the call to
+        :type url: str
+
+        :returns: the body of the reponse convered from json
+        :rtype: dict (or list)
+
+        :raises: `pureport_client.exceptions.PureportClientError` if the
+            API doesn't accept the method for the URL
+        """
+        log.debug('{} {}'.format(method.upper(), url))
+        routes.registry.check(method, url)
+        if 'params' in kwargs:
+            kwargs['query'] = kwargs.pop('params')
+        return (await getattr(self.client, method)(url, *args, **kwargs)).json
+
+
+class AsyncAccountsMixin(AccountsMixin):
+    """Mixin class for prepending accounts url under asyncio
+    """
+
+    async def __call__(self, method, url, *args, **kwargs):
+        """Send the request to the API and return the results
+
+        This overload prepends `/accounts/{ account_id }` to relative
+        URLs before sending them to the remote server.
+
+        :param method: the HTTP method to call
+        :type method: str
+
+        :param url: the URL to send the call to
+        :type url: str
+
+        :returns: the body of the reponse convered from json
+        :rtype: dict (or list)
+        """
+        if not url.startswith('/'):
+            url = '{}/{}'.format(self._url(ACCOUNT_URL), url)
+        # skips the synchronous implementation of `AccountsMixin`
+        return await super(AccountsMixin, self).__call__(method, url, *args, **kwargs)
+
+
+class AsyncNetworksMixin(NetworksMixin):
+    """Mixin class for prepending networks url under asyncio
+    """
+
+    async def __call__(self, method, url, *args, **kwargs):
+        """Send the request to the API and return the results
+
+        This overload prepends `/networks/{ network_id }` to relative
+        URLs before sending them to the remote server.
+
+        :param method: the HTTP method to call
+        :type method: str
+
+        :param url: the URL to send the call to
+        :type url: str
+
+        :returns: the body of the reponse convered from json
+        :rtype: dict (or list)
+        """
+        if not url.startswith('/'):
+            url = '{}/{}'.format(self._url(NETWORK_URL), url)
+        # skips the synchronous implementation of `NetworksMixin`
+        return await super(NetworksMixin, self).__call__(method, url, *args, **kwargs)
+
+
+def command_args(command):
+    """Returns the arguments a command instance was created with
+
+    :param command: the command instance
+    :type command: `pureport_client.commands.CommandBase`
+
+    :returns: the arguments after the client
+    :rtype: tuple
+    """
+    if isinstance(command, AccountsMixin):
+        return (command.account_id,)
+    if isinstance(command, NetworksMixin):
+        return (command.network_id,)
+    return ()
+
+
+def _async_method(name):
+    async def method(self, *args, **kwargs):
+        cls = self._command_class
+        arguments = command_args(self)
+
+        def call(client):
+            return getattr(cls(client, *arguments), name)(*args, **kwargs)
+
+        result = await self.client.run(call)
+        if isinstance(result, Stream):
+            close = getattr(result.pages, 'close', None)
+            if close is not None:
+                close()
+            raise NotImplementedError("`{}` returns a stream of pages that can't be read under asyncio, "
+                                      "use `pureport_client.aio.paginate` instead".format(name))
+        if isinstance(result, CommandBase):
+            return asynchronous(type(result))(self.client, *command_args(result))
+        return result
+    return method
+
+
+def _fan_out_method(name):
+    lookup = _async_method(name)
+
+    async def method(self, ids, ids_from=None, parallel=DEFAULT_PARALLEL):
+        # the IDs are looked up by tasks instead of the threads of
+        # `CommandBase._fan_out`, each with a run of its own
+        if isinstance(ids, str):
+            return await lookup(self, ids)
+
+        ids = tuple(ids)
+        if ids_from is None:
+            if not ids:
+                raise UsageError("at least one ID is required")
+            if len(ids) == 1:
+                return await lookup(self, ids[0])
+
+        slots = asyncio.Semaphore(parallel)
+
+        async def get(item):
+            async with slots:
+                try:
+                    return item, await lookup(self, item), None
+                except Exception as exc:
+                    return item, None, exc
+
+        results = Results()
+        for item, result, exc in await asyncio.gather(*(get(item) for item in read_ids(ids, ids_from))):
+            results.add(item, result, exc)
+        return results
+    return method
+
+
+def _synchronous_method(name):
+    async def method(self, *args, **kwargs):
+        raise NotImplementedError("`{}` has side effects between requests and can't be run under "
+                                  "asyncio".format(name))
+    return method
+
+
+_async_classes = {}
+
+
+def asynchronous(cls):
+    """Returns the asyncio variant of a command class
+
+    The methods of the returned class are coroutines that run the
+    methods of the command class with :meth:`AsyncSession.run`.  Methods
+    that return a command, such as `accounts networks`, return the
+    asyncio variant of the command.  Commands that page through results
+    or have side effects between requests raise `NotImplementedError`,
+    see the module documentation.  The returned class is created with
+    an `AsyncSession` and the same arguments as the command class.
+
+    :param cls: the command class
+    :type cls: type
+
+    :returns: the asyncio command class
+    :rtype: type
+    """
+    if cls not in _async_classes:
+        bases = []
+        if issubclass(cls, AccountsMixin):
+            bases.append(AsyncAccountsMixin)
+        if issubclass(cls, NetworksMixin):
+            bases.append(AsyncNetworksMixin)
+        bases.append(AsyncCommandBase)
+
+        attrs = {
+            '__doc__': cls.__doc__,
+            '__module__': cls.__module__,
+            '_command_class': cls
+        }
+        for item in find_client_commands(cls):
+            if getattr(item, 'synchronous_only', False):
+                attrs[item.__name__] = wraps(item)(_synchronous_method(item.__name__))
+            elif getattr(item, 'ids_argument', None):
+                attrs[item.__name__] = wraps(item)(_fan_out_method(item.__name__))
+            else:
+                attrs[item.__name__] = wraps(item)(_async_method(item.__name__))
+
+        _async_classes[cls] = type(cls.__name__, tuple(bases), attrs)
+    return _async_classes[cls]
+
+
+async def paginate(client_fun, *args, **kwargs):
+    """Yield all results of a paginated API function
+
+    The asyncio variant of `pureport_client.helpers.paginate`.
+
+    :param client_fun: a coroutine function that supports the
+        page_size and page_number keyword arguments
+    :type client_fun: function
+
+    :rtype: AsyncIterator
+    """
+    resp = await client_fun(*args, **kwargs)
+    for item in resp['content']:
+        yield item
+    total_elements = resp['totalElements']
+    page_size = resp['pageSize']
+    page_number = resp['pageNumber'] + 1
+    kwargs.pop('page_number', None)
+    while page_number * page_size < total_elements:
+        resp = await client_fun(*args, page_number=page_number, **kwargs)
+        for item in resp['content']:
+            yield item
+        page_number = resp['pageNumber'] + 1
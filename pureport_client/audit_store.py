@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The audit_store module keeps a local copy of the audit log of an account.
+
+Entries are saved to a SQLite database, by default one per account in
+the per-user cache directory, so `accounts audit-log sync` only has to
+request the entries logged since the newest entry it already has.  The
+time of the newest entry is the high-water mark of the store.  Entries
+logged at that time are requested again by the next sync and are
+skipped, since entries are only saved once for each ID.
+
+Audit entries don't have an ID of their own, so the ID of an entry is
+the hash of its content unless the API includes one.  Identical entries,
+for instance the same change made twice in the same millisecond, have the
+same hash, so the hash is combined with the number of identical entries
+received before it in the same sync.  Each sync requests the entries
+logged at its high-water mark from the first one, so the identical
+entries logged at that time are numbered the same way every time.
+"""
+
+from __future__ import absolute_import
+
+import os
+import re
+import json
+import sqlite3
+import hashlib
+
+from collections import Counter
+from logging import getLogger
+
+from pureport_client import cache
+
+log = getLogger(__name__)
+
+AUDIT_LOG_DIR = 'audit-log'
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS entries (id TEXT PRIMARY KEY, timestamp TEXT NOT NULL, entry TEXT NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp)'
+)
+
+
+def store_path(account_id):
+    """Returns the default path of the store of an account
+
+    :param account_id: the account ID
+    :type account_id: str
+
+    :returns: the path to the database
+    :rtype: str
+    """
+    name = '{}.sqlite'.format(re.sub(r'[^\w.-]', '_', account_id))
+    return cache.cache_path('/'.join((AUDIT_LOG_DIR, name)))
+
+
+def entry_id(entry, occurrence=0):
+    """Returns the ID of an audit entry
+
+    :param entry: the audit entry
+    :type entry: dict
+
+    :param occurrence: the number of identical entries before this one
+    :type occurrence: int
+
+    :returns: the `id` of the entry or the hash of its content
+    :rtype: str
+    """
+    if entry.get('id'):
+        return str(entry['id'])
+    digest = hashlib.sha1(json.dumps(entry, sort_keys=True).encode('utf-8')).hexdigest()
+    return '{}-{}'.format(digest, occurrence) if occurrence else digest
+
+
+class AuditStore(object):
+    """A SQLite database of audit entries
+    """
+
+    def __init__(self, path):
+        """Open the database, it is created if it doesn't exist
+
+        :param path: the path to the database
+        :type path: str
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        with self.db:
+            for statement in SCHEMA:
+                self.db.execute(statement)
+
+    def newest(self):
+        """Returns the timestamp of the newest entry
+
+        Timestamps are compared as strings, which orders the ISO-8601
+        timestamps returned by the API by time.
+
+        :returns: the timestamp or None if the store is empty
+        :rtype: str
+        """
+        return self.db.execute('SELECT max(timestamp) FROM entries').fetchone()[0]
+
+    def add(self, entries, received=None):
+        """Save entries that aren't already in the store
+
+        The entries are committed at once.
+
+        :param entries: the audit entries, oldest first
+        :type entries: list
+
+        :param received: the number of times each entry was received so
+            far by the sync, updated with the entries, defaults to only
+            counting the entries given
+        :type received: `collections.Counter`
+
+        :returns: the number of entries added
+        :rtype: int
+        """
+        received = Counter() if received is None else received
+        rows = []
+        for entry in entries:
+            data = json.dumps(entry, sort_keys=True)
+            occurrence = received[data]
+            received[data] += 1
+            rows.append((entry_id(entry, occurrence), entry.get('timestamp') or '', data))
+        with self.db:
+            before = self.db.total_changes
+            self.db.executemany('INSERT OR IGNORE INTO entries (id, timestamp, entry) VALUES (?, ?, ?)', rows)
+            return self.db.total_changes - before
+
+    def count(self):
+        """Returns the number of entries in the store
+
+        :rtype: int
+        """
+        return self.db.execute('SELECT count(*) FROM entries').fetchone()[0]
+
+    def close(self):
+        """Close the database
+        """
+        self.db.close()
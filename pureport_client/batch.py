@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The batch module runs many commands in one process.
+
+Each line of the batch file is a command, either a JSON array of
+arguments such as `["accounts", "networks", "-a", "ac-1", "list"]` or a
+shell style command line such as `accounts networks -a ac-1 list`.  Empty
+lines and lines starting with `#` are ignored.  All commands are run with
+the command tree and API session of the `pureport batch` invocation and
+a JSON record is written to stdout for each command, in the order of the
+file, with the exit code, output and timing of the command.
+"""
+
+from __future__ import absolute_import
+
+import io
+import sys
+import json
+import time
+import shlex
+import threading
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from click import (
+    argument,
+    command,
+    echo,
+    option,
+    pass_context,
+    File,
+    IntRange
+)
+
+from pureport_client.util import invoke
+
+
+class ThreadLocalStream(io.TextIOBase):
+    """Text stream that writes to a different stream for each thread
+
+    Threads write to the stream set with :meth:`redirect` or to the
+    default stream if none is set.
+    """
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    @property
+    def stream(self):
+        return getattr(self._local, 'stream', None) or self._default
+
+    @property
+    def encoding(self):
+        return 'utf-8'
+
+    def redirect(self, stream):
+        self._local.stream = stream
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return self.stream.isatty()
+
+    def write(self, s):
+        return self.stream.write(s)
+
+    def flush(self):
+        return self.stream.flush()
+
+
+@contextmanager
+def redirect_streams():
+    """Replace stdout and stderr with thread local streams
+
+    :returns: the stdout and stderr streams
+    :rtype: tuple
+    """
+    saved = (sys.stdout, sys.stderr)
+    sys.stdout, sys.stderr = ThreadLocalStream(saved[0]), ThreadLocalStream(saved[1])
+    try:
+        yield sys.stdout, sys.stderr
+    finally:
+        sys.stdout, sys.stderr = saved
+
+
+def parse_line(line):
+    """Parse a line of the batch file
+
+    :param line: the line
+    :type line: str
+
+    :returns: the command line arguments or None if the line is empty
+        or a comment
+    :rtype: list
+
+    :raises: ValueError
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('['):
+        args = json.loads(line)
+        if not all(isinstance(item, str) for item in args):
+            raise ValueError("command arguments must be strings")
+        return args
+    return shlex.split(line)
+
+
+def run_command(cli, args, session, streams):
+    """Run a command and capture its output
+
+    :param cli: the root command group
+    :type cli: `click.Group`
+
+    :param args: the command line arguments
+    :type args: list
+
+    :param session: the API session
+    :type session: `pureport_client.util.LazySession`
+
+    :param streams: the thread local stdout and stderr streams
+    :type streams: tuple
+
+    :returns: the exit code, stdout, stderr and elapsed time
+    :rtype: tuple
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    streams[0].redirect(stdout)
+    streams[1].redirect(stderr)
+    start = time.perf_counter()
+    try:
+        code = invoke(cli, args, obj=session)
+    finally:
+        streams[0].redirect(None)
+        streams[1].redirect(None)
+    return code, stdout.getvalue(), stderr.getvalue(), time.perf_counter() - start
+
+
+def start_command(executor, cli, session, streams, lineno, line):
+    """Parse a line of the batch file and start its command
+
+    :param executor: runs the command
+    :type executor: `concurrent.futures.Executor`
+
+    :param cli: the root command group
+    :type cli: `click.Group`
+
+    :param session: the API session
+    :type session: `pureport_client.util.LazySession`
+
+    :param streams: the thread local stdout and stderr streams
+    :type streams: tuple
+
+    :param lineno: the line number
+    :type lineno: int
+
+    :param line: the line
+    :type line: str
+
+    :returns: the record of the command and the future of its result,
+        which is None if the line can't be parsed, or None if the line
+        is empty or a comment
+    :rtype: tuple
+    """
+    record = {'line': lineno}
+    try:
+        args = parse_line(line)
+    except ValueError as exc:
+        record.update({'command': line.strip(), 'exit': 2, 'error': str(exc)})
+        return record, None
+
+    if args is None:
+        return None
+    record['command'] = args
+    return record, executor.submit(run_command, cli, args, session, streams)
+
+
+def finish_command(record, future):
+    """Add the result of a command to its record
+
+    :param record: the record of the command
+    :type record: dict
+
+    :param future: the future of the result, None if the command
+        wasn't run
+    :type future: `concurrent.futures.Future`
+
+    :returns: the record
+    :rtype: dict
+    """
+    if future is not None:
+        code, stdout, stderr, elapsed = future.result()
+        record.update({'exit': code, 'stdout': stdout, 'stderr': stderr, 'elapsed': round(elapsed, 6)})
+    return record
+
+
+def iter_results(cli, session, lines, parallel=1, stop_on_error=False):
+    """Run the commands of a batch file
+
+    Up to `parallel` commands are run at the same time.  The results are
+    returned in the order of the file.  The commands share the command
+    tree, which resolves the commands of each thread safely, see
+    `pureport_client.util.LazyGroup`.
+
+    :param cli: the root command group
+    :type cli: `click.Group`
+
+    :param session: the API session shared by the commands
+    :type session: `pureport_client.util.LazySession`
+
+    :param lines: the lines of the batch file
+    :type lines: iterable
+
+    :param parallel: the maximum number of commands run at the same time
+    :type parallel: int
+
+    :param stop_on_error: stop after the first command that fails
+    :type stop_on_error: bool
+
+    :returns: a generator of result records
+    :rtype: generator
+    """
+    pending = deque()
+
+    with redirect_streams() as streams, ThreadPoolExecutor(max_workers=parallel) as executor:
+        lines = enumerate(lines, 1)
+
+        while True:
+            for lineno, line in lines:
+                started = start_command(executor, cli, session, streams, lineno, line)
+                if started is not None:
+                    pending.append(started)
+                if len(pending) >= parallel * 2:
+                    break
+
+            if not pending:
+                break
+
+            record = finish_command(*pending.popleft())
+            yield record
+
+            if stop_on_error and record['exit'] != 0:
+                for _, future in pending:
+                    if future is not None:
+                        future.cancel()
+                break
+
+
+@command()
+@argument('file', type=File('r'), default='-')
+@option('--parallel', type=IntRange(min=1), default=1, show_default=True,
+        help='The number of commands to run at the same time.')
+@option('--stop-on-error', is_flag=True, help='Stop after the first command that fails.')
+@pass_context
+def batch(ctx, file, parallel, stop_on_error):
+    """Run the commands in FILE, or stdin, in a single process
+
+    Each line of FILE is a command, either a JSON array such as
+    ["accounts", "networks", "-a", "ac-1", "list"] or a command line.
+    A JSON record with the command, exit code, output and elapsed time
+    is written for each command.
+    """
+    root = ctx.find_root()
+    out = sys.stdout
+    failed = False
+
+    for record in iter_results(root.command, root.obj, file, parallel, stop_on_error):
+        failed = failed or record['exit'] != 0
+        echo(json.dumps(record), file=out)
+
+    ctx.exit(1 if failed else 0)
@@ -0,0 +1,445 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The bindings module generates the Python bindings for the Pureport API
+on demand.
+
+The `pureport` package generates a function for every operation and a
+class for every model in the Pureport OpenAPI specification when the
+bindings are made.  This module instead generates the function for an
+operation the first time it is used, along with only the models that the
+operation needs.  Models are generated into the `pureport.models` module
+so they remain compatible with `pureport.models.load` and
+`pureport.models.dump`.
+
+The OpenAPI spec and the schemas derived from it are saved to the per-user
+cache and are revalidated against the remote server at most once per
+revalidate interval, see :func:`load_cached_api`.
+"""
+
+from __future__ import absolute_import
+
+import os
+import copy
+import time
+import hashlib
+import threading
+
+from collections import namedtuple
+from keyword import iskeyword
+from functools import (
+    partial,
+    update_wrapper
+)
+from logging import getLogger
+
+from pureport import models
+from pureport import functions
+from pureport import query
+from pureport.session import Session
+from pureport.helpers import get_value
+from pureport.transforms import to_snake_case
+from pureport.exceptions import PureportError
+from pureport import __version__ as models_version
+
+from pureport_client import (
+    cache,
+    routes
+)
+
+log = getLogger(__name__)
+
+API_URL = '/openapi.json'
+
+DEFAULT_REVALIDATE_INTERVAL = 3600
+
+SPEC_CACHE_VERSION = 1
+
+# query functions bound by `pureport.query` and the functions they use
+QUERY_FUNCTIONS = {
+    'find_connection': 'find_connections',
+    'find_network': 'find_networks'
+}
+
+ApiResponse = namedtuple('ApiResponse', ('status', 'json'))
+
+Api = namedtuple('Api', ('spec', 'schemas', 'operations'))
+
+_apis = {}
+
+_lock = threading.RLock()
+
+_session = None
+
+
+def set_default_session(session):
+    """Sets the session used to retrieve the API spec for models
+
+    :param session: the API session
+    :type session: `pureport.session.Session`
+
+    :returns: None
+    """
+    global _session
+    _session = session
+
+
+def get_default_session():
+    """Returns the session used to retrieve the API spec for models
+
+    If no session has been set, a new session is created using the
+    default credentials, see `pureport_client.session.create`.
+
+    :returns: the API session
+    :rtype: `pureport_client.session.Session`
+    """
+    global _session
+    if _session is None:
+        from pureport_client.session import create
+        _session = create()
+    return _session
+
+
+def fetch_api(session, headers=None):
+    """Retrieve the OpenAPI spec from the remote server
+
+    :param session: the API session
+    :type session: `pureport.session.Session`
+
+    :param headers: optional HTTP headers, for instance to send a
+        conditional request
+    :type headers: dict
+
+    :returns: HTTP Response object
+    :rtype: :class:`pureport.transport.Response`
+
+    :raises: `pureport.exceptions.PureportError`
+    """
+    log.debug("retrieving openapi spec from remote server")
+    resp = Session.get(session, API_URL, headers=headers)
+    if resp.status not in (200, 304):
+        raise PureportError("unable to retrieve api spec")
+    return resp
+
+
+def load_api(spec):
+    """Index the OpenAPI spec
+
+    :param spec: the OpenAPI spec
+    :type spec: dict
+
+    :returns: the indexed API
+    :rtype: `Api`
+    """
+    # models.load_api modifies the schemas in place
+    schemas = models.load_api({'components': {'schemas': copy.deepcopy(spec['components']['schemas'])}})
+
+    operations = {}
+    for uri, properties in spec['paths'].items():
+        for method, attrs in properties.items():
+            if 'operationId' in attrs:
+                operations[to_snake_case(attrs['operationId'])] = (method, uri)
+
+    return Api(spec, schemas, operations)
+
+
+def revalidate_interval():
+    """Returns the number of seconds before a cached spec is revalidated
+
+    The interval can be configured with the
+    `PUREPORT_SPEC_REVALIDATE_INTERVAL` environment variable, an invalid
+    value is ignored.
+
+    :returns: the number of seconds
+    :rtype: int
+    """
+    value = os.getenv('PUREPORT_SPEC_REVALIDATE_INTERVAL')
+    if value:
+        try:
+            return max(int(value), 0)
+        except ValueError:
+            log.debug("invalid spec revalidate interval: {}".format(value))
+    return DEFAULT_REVALIDATE_INTERVAL
+
+
+def spec_filename(base_url):
+    """Returns the name of the cache file for the spec of an API
+
+    :param base_url: the base URL of the API
+    :type base_url: str
+
+    :returns: the cache file name
+    :rtype: str
+    """
+    return 'openapi-{}.json'.format(hashlib.sha1(base_url.encode('utf-8')).hexdigest()[:16])
+
+
+def dump_api(api):
+    """Serialize the indexed API so it can be cached
+
+    :param api: the indexed API
+    :type api: `Api`
+
+    :returns: the serialized API
+    :rtype: dict
+    """
+    schemas = {}
+    for name, schema in api.schemas.items():
+        kind = 'enum' if isinstance(schema, models.Enum) else 'model'
+        schemas[name] = [kind, schema._properties]
+    return {'spec': api.spec, 'schemas': schemas, 'operations': api.operations}
+
+
+def restore_api(data):
+    """Construct the indexed API from the cache
+
+    :param data: the serialized API
+    :type data: dict
+
+    :returns: the indexed API
+    :rtype: `Api`
+    """
+    schemas = {}
+    for name, (kind, properties) in data['schemas'].items():
+        schemas[name] = (models.Enum if kind == 'enum' else models.Model)(**properties)
+    operations = dict((k, tuple(v)) for k, v in data['operations'].items())
+    return Api(data['spec'], schemas, operations)
+
+
+def load_cached_api(session):
+    """Load the indexed API using the on disk cache
+
+    The spec is loaded from the cache without contacting the remote
+    server if it was validated within the revalidate interval.  Otherwise
+    a conditional request is sent using the `ETag` and `Last-Modified`
+    values of the cached spec and the spec is only downloaded and indexed
+    again if it has changed.
+
+    :param session: the API session
+    :type session: `pureport.session.Session`
+
+    :returns: the indexed API
+    :rtype: `Api`
+    """
+    name = spec_filename(session.base_url)
+
+    data = cache.read_json(name)
+    if data and data.get('key') != [SPEC_CACHE_VERSION, models_version]:
+        data = None
+
+    now = time.time()
+
+    if data and now - data['checked'] < revalidate_interval():
+        log.debug("using cached openapi spec")
+        return restore_api(data)
+
+    headers = {}
+    if data and data.get('etag'):
+        headers['If-None-Match'] = data['etag']
+    if data and data.get('last_modified'):
+        headers['If-Modified-Since'] = data['last_modified']
+
+    resp = fetch_api(session, headers=headers or None)
+
+    if resp.status == 304 and data:
+        log.debug("cached openapi spec has not been modified")
+        data['checked'] = now
+        cache.write_json(name, data)
+        return restore_api(data)
+
+    api = load_api(resp.json)
+
+    data = dump_api(api)
+    data.update({
+        'key': [SPEC_CACHE_VERSION, models_version],
+        'checked': now,
+        'etag': (resp.headers or {}).get('ETag'),
+        'last_modified': (resp.headers or {}).get('Last-Modified')
+    })
+    cache.write_json(name, data)
+
+    return api
+
+
+def get_api(session=None):
+    """Returns the indexed API for a session
+
+    The API is only loaded once per process and base URL.  See
+    :func:`load_cached_api`.
+
+    :param session: the API session
+    :type session: `pureport.session.Session`
+
+    :returns: the indexed API
+    :rtype: `Api`
+    """
+    session = session or get_default_session()
+    with _lock:
+        if session.base_url not in _apis:
+            _apis[session.base_url] = load_cached_api(session)
+            models.__version__ = get_value('info.version', _apis[session.base_url].spec)
+            routes.registry.load_spec(_apis[session.base_url].spec)
+        return _apis[session.base_url]
+
+
+def get_loaded_api(base_url):
+    """Returns the indexed API for a base URL if it was already loaded
+
+    :param base_url: the base URL of the API
+    :type base_url: str
+
+    :returns: the indexed API or None
+    :rtype: `Api`
+    """
+    with _lock:
+        return _apis.get(base_url)
+
+
+def references(schema):
+    """Returns the names of all models a schema refers to
+
+    :param schema: the model schema
+    :type schema: `pureport.models.Schema`
+
+    :returns: a list of model names
+    :rtype: list
+    """
+    refs = list()
+
+    if isinstance(schema, models.Model):
+        refs.extend(schema.base)
+        for value in schema.properties.values():
+            ref = value.get('$ref') or value.get('items', {}).get('$ref')
+            if ref:
+                refs.append(ref)
+        refs.extend(schema.discriminator.get('mapping', {}).values())
+
+    return [item.split('/')[-1] for item in refs]
+
+
+def make_model(name, session=None):
+    """Generate a model and all of the models it refers to
+
+    The model classes are added to the `pureport.models` module.  This
+    function does nothing if the model already exists.
+
+    :param name: the name of the model
+    :type name: str
+
+    :param session: the API session
+    :type session: `pureport.session.Session`
+
+    :returns: the model class
+    :rtype: type
+    """
+    cls = getattr(models, name, None)
+    if isinstance(cls, type) and hasattr(cls, '_schema'):
+        return cls
+
+    with _lock:
+        schemas = get_api(session).schemas
+        if name not in schemas:
+            raise PureportError("unknown model `{}`".format(name))
+        _make_model(name, schemas, set())
+
+    return getattr(models, name)
+
+
+def _make_model(name, schemas, seen):
+    cls = getattr(models, name, None)
+    if name in seen or name not in schemas or (isinstance(cls, type) and hasattr(cls, '_schema')):
+        return
+
+    seen.add(name)
+
+    schema = schemas[name]
+
+    if iskeyword(name):
+        raise PureportError("`{}` is a reserved keyword".format(name))
+
+    for ref in references(schema):
+        _make_model(ref, schemas, seen)
+
+    log.debug("adding model {}".format(name))
+
+    if isinstance(schema, models.Enum):
+        attrs = dict((str(item), index) for index, item in enumerate(schema.values))
+        attrs['_schema'] = schema
+        setattr(models, name, type(name, (object,), attrs))
+
+    elif isinstance(schema, models.Model):
+        properties = {}
+        for item in schema.base:
+            properties.update(schemas[item].properties)
+        properties.update(schema.properties)
+
+        props = {}
+
+        for key, value in properties.items():
+            if iskeyword(key):
+                raise PureportError("`{}` property name is a reserved keyword".format(key))
+
+            kwargs = {
+                'fget': partial(models._get_property, name=key),
+                'doc': value.get('description', 'UNDEFINED')
+            }
+
+            if value.get('readOnly') is not True:
+                kwargs.update({
+                    'fset': partial(models._set_property, name=key),
+                    'fdel': partial(models._delete_property, name=key)
+                })
+
+            props[key] = property(**kwargs)
+
+        props['_schema'] = schema
+        schema._properties['parents'] = dict((item, schemas[item]) for item in schema.base)
+        setattr(models, name, type(name, (models.StrictBase,), props))
+
+
+def bind(session, name):
+    """Generate the function for an API operation
+
+    The models used by the request and response of the operation are
+    generated along with the function.
+
+    :param session: the API session
+    :type session: `pureport.session.Session`
+
+    :param name: the snake case name of the operation
+    :type name: str
+
+    :returns: a function bound to the session
+    :rtype: function
+
+    :raises: AttributeError
+    """
+    if name in QUERY_FUNCTIONS:
+        func = partial(query.find_object, getattr(session, QUERY_FUNCTIONS[name]))
+        update_wrapper(func, query.find_object)
+        return func
+
+    api = get_api(session)
+
+    if name not in api.operations:
+        raise AttributeError(name)
+
+    method, uri = api.operations[name]
+    path = api.spec['paths'][uri][method]
+
+    for item in ('requestBody.content.application/json.schema',
+                 'responses.default.content.application/json.schema'):
+        schema = get_value(item, path) or {}
+        ref = schema.get('$ref') or schema.get('items', {}).get('$ref')
+        if ref:
+            make_model(ref.split('/')[-1], session)
+
+    func = partial(functions.request, session, method, uri)
+    func.__doc__ = path.get('summary')
+    func.__name__ = name
+    log.debug('adding function {}'.format(name))
+
+    return func
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The cache module provides access to the per-user cache directory that
+pureport-client uses to persist data between invocations of the CLI.
+
+The cache directory defaults to `$XDG_CACHE_HOME/pureport` (or
+`~/.cache/pureport` if `XDG_CACHE_HOME` is not set) and can be changed
+by setting the `PUREPORT_CACHE_DIR` environment variable.
+
+Cache files are JSON documents and are always written atomically so
+concurrent invocations never observe a partially written file.  Errors
+reading or writing cache files are logged and otherwise ignored since
+the cache is never the source of truth.
+"""
+
+from __future__ import absolute_import
+
+import os
+import json
+import tempfile
+
+from logging import getLogger
+
+log = getLogger(__name__)
+
+
+def cache_dir():
+    """Returns the path to the per-user cache directory
+
+    :returns: the path to the cache directory
+    :rtype: str
+    """
+    path = os.getenv('PUREPORT_CACHE_DIR')
+    if not path:
+        base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        path = os.path.join(base, 'pureport')
+    return path
+
+
+def installed(path):
+    """Checks if a package was installed to a site-packages directory
+
+    :param path: the path to the package directory
+    :type path: str
+
+    :returns: True if the package is installed otherwise False
+    :rtype: bool
+    """
+    import site
+
+    directories = list(getattr(site, 'getsitepackages', list)())
+    if site.ENABLE_USER_SITE:
+        directories.append(site.getusersitepackages())
+    parent = os.path.dirname(os.path.abspath(path))
+    return any(os.path.abspath(item) == parent for item in directories)
+
+
+def source_stamp(path):
+    """Returns the latest modification time of the Python files in a package
+
+    Cached data derived from the source code of a package, such as the
+    command manifest, includes the stamp in its key so it is rebuilt when
+    the package is modified in place, for instance in a development
+    install.
+
+    A package installed to a site-packages directory only changes when
+    it is installed again, which rewrites all of its files, so only the
+    modification time of its `__init__.py` is read instead of walking
+    the package on every invocation.
+
+    :param path: the path to the package directory
+    :type path: str
+
+    :returns: the modification time in nanoseconds
+    :rtype: int
+    """
+    if installed(path):
+        try:
+            return os.stat(os.path.join(path, '__init__.py')).st_mtime_ns
+        except OSError:
+            pass
+
+    stamp = 0
+    for root, dirs, files in os.walk(path):
+        dirs[:] = [d for d in dirs if d != '__pycache__']
+        for name in files:
+            if name.endswith('.py'):
+                try:
+                    stamp = max(stamp, os.stat(os.path.join(root, name)).st_mtime_ns)
+                except OSError:
+                    pass
+    return stamp
+
+
+def cache_path(name):
+    """Returns the full path to a file in the cache directory
+
+    :param name: the name of the cache file
+    :type name: str
+
+    :returns: the full path to the cache file
+    :rtype: str
+    """
+    return os.path.join(cache_dir(), name)
+
+
+def writable():
+    """Checks if the cache directory can be written to
+
+    The cache directory is created if it does not already exist.
+
+    :returns: True if the cache directory is writable otherwise False
+    :rtype: bool
+    """
+    path = cache_dir()
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+    except OSError:
+        return False
+    return os.access(path, os.W_OK)
+
+
+def read_json(name):
+    """Read a JSON document from the cache
+
+    :param name: the name of the cache file
+    :type name: str
+
+    :returns: the deserialized document or None if it could not be read
+    :rtype: object
+    """
+    try:
+        with open(cache_path(name)) as f:
+            return json.load(f)
+    except (OSError, ValueError) as exc:
+        log.debug("unable to read cache file {}: {}".format(name, exc))
+
+
+def write_json(name, obj):
+    """Atomically write a JSON document to the cache
+
+    The file is written with permissions that only allow the current user
+    to read it.
+
+    :param name: the name of the cache file
+    :type name: str
+
+    :param obj: the object to serialize
+    :type obj: object
+
+    :returns: True if the document was written otherwise False
+    :rtype: bool
+    """
+    path = cache_path(name)
+    try:
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.{}.'.format(os.path.basename(name)))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(obj, f, separators=(',', ':'))
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except (OSError, TypeError, ValueError) as exc:
+        log.debug("unable to write cache file {}: {}".format(name, exc))
+        return False
+    return True
+
+
+def remove(name):
+    """Remove a file from the cache if it exists
+
+    :param name: the name of the cache file
+    :type name: str
+
+    :returns: None
+    """
+    try:
+        os.unlink(cache_path(name))
+    except OSError:
+        pass
+
+
+def touch(name):
+    """Set the modification time of a file in the cache to now
+
+    :param name: the name of the cache file
+    :type name: str
+
+    :returns: None
+    """
+    try:
+        os.utime(cache_path(name))
+    except OSError:
+        pass
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The cassette module records the requests a session sends to the Pureport
+API and replays them later without a network.
+
+A :class:`Recorder` or :class:`Player` replaces the connection pool of a
+`pureport_client.session.Session`, so every request is captured whether
+it is sent by a command, by a generated binding or to log in.  The
+interactions are saved to a cassette, a gzip compressed file of JSON
+lines: a header followed by one line per request with the method, the
+URL relative to the base URL, the request body, the response status,
+a few response headers, the response body and the time the response
+took to arrive.
+
+When a cassette is replayed, each request is answered with the next
+recorded response for the same method, URL and body, or with the last
+one once they have all been used, so polling a resource that stopped
+changing still works.  Responses are returned after the recorded time
+(`LATENCY_RECORDED`) or immediately (`LATENCY_NONE`).  Requests that
+weren't recorded aren't sent, the command fails with an error naming the
+cassette and the request instead.
+
+Credentials and access tokens are never written to a cassette: login
+requests aren't recorded and are answered with a placeholder token when
+a cassette is replayed.  The OpenAPI spec the session used is always
+saved, even when it was loaded from the cache, so typed calls can be
+replayed on a machine that has never seen the API.
+"""
+
+from __future__ import absolute_import
+
+import gzip
+import json
+import time
+import threading
+
+from collections import (
+    defaultdict,
+    namedtuple
+)
+from logging import getLogger
+from urllib.parse import (
+    parse_qsl,
+    urlencode,
+    urlsplit
+)
+
+from click import ClickException
+
+log = getLogger(__name__)
+
+CASSETTE_VERSION = 1
+
+LATENCY_RECORDED = 'recorded'
+LATENCY_NONE = 'none'
+
+LATENCIES = (LATENCY_RECORDED, LATENCY_NONE)
+
+# the response headers saved with an interaction
+HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Location', 'Retry-After')
+
+# requests that carry credentials, see `Player.login`
+LOGIN_URLS = ('/login', '/login/refresh')
+
+API_URL = '/openapi.json'
+
+# the lifetime of the placeholder access token in seconds
+REPLAY_TOKEN_LIFETIME = 3600
+
+Credentials = namedtuple('Credentials', ('key', 'secret'))
+
+Interaction = namedtuple('Interaction', ('method', 'url', 'body', 'status', 'headers', 'data', 'elapsed'))
+
+
+class ReplayedResponse(object):
+    """A recorded response returned in place of a `urllib3` response
+    """
+
+    def __init__(self, status, data, headers=None):
+        self.status = status
+        self.data = data
+        self.headers = dict(headers or {})
+
+
+def encode(data):
+    """Decode a body so it can be saved to JSON, undone by :func:`decode`
+
+    :param data: the body
+    :type data: bytes
+
+    :returns: the body as text
+    :rtype: str
+    """
+    if data is None:
+        return None
+    if isinstance(data, str):
+        return data
+    return data.decode('utf-8', 'surrogateescape')
+
+
+def decode(text):
+    """Encode a body saved by :func:`encode`
+
+    :param text: the body as text
+    :type text: str
+
+    :returns: the body
+    :rtype: bytes
+    """
+    return text.encode('utf-8', 'surrogateescape')
+
+
+def request_key(method, url, body=None, fields=None, prefix=''):
+    """Returns the key requests are matched by
+
+    Query parameters are sorted and JSON bodies are normalized so the
+    order of the keys in dictionaries doesn't matter.
+
+    :param method: the HTTP method
+    :type method: str
+
+    :param url: the request URL
+    :type url: str
+
+    :param body: the request body
+    :type body: str
+
+    :param fields: the query parameters not already in the URL
+    :type fields: dict
+
+    :param prefix: the path of the base URL, removed from the path
+    :type prefix: str
+
+    :returns: the method, the relative URL and the body
+    :rtype: tuple
+    """
+    parts = urlsplit(url)
+    path = parts.path
+    if prefix and path.startswith(prefix):
+        path = path[len(prefix):] or '/'
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if fields:
+        query.extend(parse_qsl(urlencode(fields), keep_blank_values=True))
+    if query:
+        path = '{}?{}'.format(path, urlencode(sorted(query)))
+
+    body = encode(body)
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True)
+        except ValueError:
+            pass
+    return method.upper(), path, body or None
+
+
+class CassettePool(object):
+    """Sends the requests of a session to a recorder or a player
+
+    Implements the methods of `urllib3.PoolManager` that
+    `pureport.transport.Request` uses, every other attribute is the
+    attribute of the connection pool.
+    """
+
+    def __init__(self, cassette, pool):
+        self.cassette = cassette
+        self.pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self.pool, name)
+
+    def urlopen(self, method, url, body=None, headers=None, **kwargs):
+        def send():
+            return self.pool.urlopen(method, url, body=body, headers=headers, **kwargs)
+        return self.cassette.send(send, method, url, body=body)
+
+    def request_encode_url(self, method, url, fields=None, headers=None, **kwargs):
+        def send():
+            return self.pool.request_encode_url(method, url, fields=fields, headers=headers, **kwargs)
+        return self.cassette.send(send, method, url, fields=fields)
+
+    def request(self, method, url, fields=None, headers=None, **kwargs):
+        def send():
+            return self.pool.request(method, url, fields=fields, headers=headers, **kwargs)
+        return self.cassette.send(send, method, url, fields=fields)
+
+
+class Cassette(object):
+    """Base class of :class:`Recorder` and :class:`Player`
+    """
+
+    # whether requests are answered from the cassette
+    replaying = False
+
+    def __init__(self, path):
+        self.path = path
+        self.base_url = None
+        self.prefix = ''
+        self._lock = threading.Lock()
+
+    def wrap(self, session):
+        """Send the requests of a session through the cassette
+
+        :param session: the API session
+        :type session: `pureport_client.session.Session`
+
+        :returns: the session
+        :rtype: `pureport_client.session.Session`
+        """
+        self.base_url = session.base_url
+        self.prefix = urlsplit(session.base_url).path.rstrip('/')
+        session.http = CassettePool(self, session.http)
+        return session
+
+    def key(self, method, url, body=None, fields=None):
+        return request_key(method, url, body=body, fields=fields, prefix=self.prefix)
+
+    def send(self, send, method, url, body=None, fields=None):
+        raise NotImplementedError
+
+    def close(self):
+        """Finish using the cassette
+        """
+
+
+class Recorder(Cassette):
+    """Records the requests of a session to a cassette
+
+    The cassette is written when the recorder is closed.
+    """
+
+    def __init__(self, path):
+        """Initialize the instance
+
+        :param path: the cassette file
+        :type path: str
+        """
+        super(Recorder, self).__init__(path)
+        self.interactions = []
+
+    def send(self, send, method, url, body=None, fields=None):
+        started = time.perf_counter()
+        resp = send()
+        elapsed = time.perf_counter() - started
+
+        method, url, body = self.key(method, url, body=body, fields=fields)
+        if url.partition('?')[0] in LOGIN_URLS or url == API_URL:
+            return resp
+
+        headers = dict((name, resp.headers[name]) for name in HEADERS if name in resp.headers)
+        interaction = Interaction(method, url, body, resp.status, headers, encode(resp.data), round(elapsed, 6))
+        with self._lock:
+            self.interactions.append(interaction)
+        return resp
+
+    def close(self):
+        """Write the cassette
+
+        The OpenAPI spec the session used is added to the cassette.
+        """
+        from pureport_client import bindings
+
+        interactions = list(self.interactions)
+        api = bindings.get_loaded_api(self.base_url) if self.base_url else None
+        if api is not None:
+            interactions.insert(0, Interaction('GET', API_URL, None, 200, {'Content-Type': 'application/json'},
+                                               json.dumps(api.spec, separators=(',', ':')), 0))
+
+        with gzip.open(self.path, 'wt', encoding='utf-8') as f:
+            header = {'version': CASSETTE_VERSION, 'base_url': self.base_url, 'recorded': int(time.time())}
+            f.write(json.dumps(header) + '\n')
+            for interaction in interactions:
+                f.write(json.dumps(interaction._asdict(), separators=(',', ':')) + '\n')
+        log.debug("recorded {} requests to {}".format(len(interactions), self.path))
+
+
+class Player(Cassette):
+    """Answers the requests of a session from a cassette
+    """
+
+    replaying = True
+
+    # the credentials of replayed sessions, login requests are never sent
+    credentials = Credentials('replayed', 'replayed')
+
+    def __init__(self, path, latency=LATENCY_RECORDED):
+        """Initialize the instance
+
+        :param path: the cassette file
+        :type path: str
+
+        :param latency: `LATENCY_RECORDED` to return responses after the
+            time they took to arrive when they were recorded or
+            `LATENCY_NONE` to return them immediately
+        :type latency: str
+
+        :raises: ValueError if the file isn't a cassette
+        """
+        super(Player, self).__init__(path)
+        if latency not in LATENCIES:
+            raise ValueError("unknown latency `{}`".format(latency))
+        self.latency = latency
+        self.interactions = defaultdict(list)
+        self._played = defaultdict(int)
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            header = json.loads(f.readline() or '{}')
+            if header.get('version') != CASSETTE_VERSION:
+                raise ValueError("`{}` is not a cassette or has an unsupported version".format(path))
+            self.recorded_url = header.get('base_url')
+            for line in f:
+                interaction = Interaction(**json.loads(line))
+                self.interactions[(interaction.method, interaction.url, interaction.body)].append(interaction)
+
+    def login(self):
+        data = {'access_token': 'replayed', 'refresh_token': 'replayed', 'expires_in': REPLAY_TOKEN_LIFETIME}
+        return ReplayedResponse(200, json.dumps(data).encode('utf-8'), {'Content-Type': 'application/json'})
+
+    def send(self, send, method, url, body=None, fields=None):
+        key = self.key(method, url, body=body, fields=fields)
+        if key[0] == 'POST' and key[1] in LOGIN_URLS:
+            return self.login()
+
+        with self._lock:
+            recorded = self.interactions.get(key)
+            if not recorded:
+                raise ClickException("no response to {} {} was recorded in {}".format(key[0], key[1], self.path))
+            index = self._played[key]
+            self._played[key] = index + 1
+        interaction = recorded[min(index, len(recorded) - 1)]
+
+        if self.latency == LATENCY_RECORDED and interaction.elapsed:
+            time.sleep(interaction.elapsed)
+        return ReplayedResponse(interaction.status, decode(interaction.data), interaction.headers)
@@ -5,12 +5,178 @@
 
 from __future__ import absolute_import
 
-import urllib
-
+from json import dumps as json_dumps
 from logging import getLogger
 
+from click import (
+    argument,
+    option,
+    File,
+    IntRange,
+    UsageError
+)
+
+from pureport_client import (
+    routes,
+    timings
+)
+from pureport_client.helpers import fan_out
+from pureport_client.ratelimit import AdaptiveConcurrency
+
 log = getLogger(__name__)
 
+# the number of IDs looked up at the same time by commands that accept
+# many IDs, see `ids_argument`
+DEFAULT_PARALLEL = 10
+
+ACCOUNT_URL = '/accounts/{accountId}'
+
+NETWORK_URL = '/networks/{networkId}'
+
+
+class Results(list):
+    """The results of a command run for many IDs
+
+    The IDs that failed are included as `{'id': ..., 'error': ...}`
+    objects in the order of the IDs and are also listed in `errors`.
+    """
+
+    def __init__(self, items=(), errors=()):
+        super(Results, self).__init__(items)
+        self.errors = list(errors)
+
+    def add(self, item, result=None, exc=None):
+        """Append the result of an ID or the error it failed with
+
+        :param item: the ID
+        :type item: str
+
+        :param result: the result
+        :type result: object
+
+        :param exc: the exception, None if the ID was looked up
+        :type exc: Exception
+        """
+        if exc is None:
+            self.append(result)
+            return
+        error = {'id': item, 'error': getattr(exc, 'message', None) or str(exc)}
+        self.append(error)
+        self.errors.append(error)
+
+
+class Stream(object):
+    """The results of a command that are written as they arrive
+
+    Instead of formatting the results as a whole, the print wrapper of
+    the command calls :meth:`write_lines` so every item is written as a
+    line of JSON and only one page of items is held at a time.
+    """
+
+    def __init__(self, pages, max_items=None):
+        """Initialize the instance
+
+        :param pages: the pages of the results, the items of a page are
+            its `content`, see `pureport_client.helpers.paginate_pages`
+        :type pages: iterable
+
+        :param max_items: the number of items after which no more pages
+            are read
+        :type max_items: int
+        """
+        self.pages = pages
+        self.max_items = max_items
+        self.count = 0
+
+    def write_lines(self, file):
+        """Write the items, one JSON object per line
+
+        The file is flushed after every page.
+
+        :param file: the text stream the items are written to
+        :type file: file
+        """
+        try:
+            for page in self.pages:
+                items = page['content']
+                if self.max_items is not None:
+                    items = items[:self.max_items - self.count]
+                with timings.local('format'):
+                    lines = ''.join(json_dumps(item) + '\n' for item in items)
+                file.write(lines)
+                file.flush()
+                self.count += len(items)
+                if self.max_items is not None and self.count >= self.max_items:
+                    break
+        finally:
+            # the pages that haven't been requested are cancelled
+            close = getattr(self.pages, 'close', None)
+            if close is not None:
+                close()
+
+
+def ids_argument(name):
+    """Decorator for commands that accept one or more IDs
+
+    Adds the variadic `name` argument along with the `--ids-from` option
+    to read more IDs from a file, or stdin if `-`, and the `--parallel`
+    option.  See :meth:`CommandBase._fan_out`.  The IDs are looked up by
+    `pureport_client.aio` with a run of the command for each ID.
+
+    :param name: the name of the argument
+    :type name: str
+
+    :returns: the decorator
+    :rtype: function
+    """
+    def decorator(f):
+        f = option('--parallel', type=IntRange(min=1), default=DEFAULT_PARALLEL, show_default=True,
+                   help='The number of IDs looked up at the same time.')(f)
+        f = option('--ids-from', type=File('r'),
+                   help='Read more IDs, one per line, from a file or - for stdin.')(f)
+        f.ids_argument = name
+        return argument(name, nargs=-1)(f)
+    return decorator
+
+
+def synchronous_only(f):
+    """Decorator for commands that can't be run under asyncio
+
+    `pureport_client.aio.AsyncSession.run` runs a command again from the
+    start after each request, so commands that page through results or
+    have side effects between requests are only run synchronously.
+
+    :param f: the command
+    :type f: function
+
+    :returns: the command
+    :rtype: function
+    """
+    f.synchronous_only = True
+    return f
+
+
+def read_ids(ids, ids_from=None):
+    """Returns the IDs given as arguments followed by the IDs in a file
+
+    Empty lines and lines starting with `#` in the file are ignored.
+
+    :param ids: the IDs
+    :type ids: list
+
+    :param ids_from: the file
+    :type ids_from: file
+
+    :returns: a generator of IDs
+    :rtype: generator
+    """
+    yield from ids
+    if ids_from is not None:
+        for line in ids_from:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
 
 class CommandBase(object):
     """Base implementation of a CLI command
@@ -40,12 +206,72 @@ class CommandBase(object):
 
         :returns: the body of the reponse convered from json
         :rtype: dict (or list)
+
+        :raises: `pureport_client.exceptions.PureportClientError` if the
+            API doesn't accept the method for the URL
         """
         log.debug('{} {}'.format(method.upper(), url))
+        routes.registry.check(method, url)
         if 'params' in kwargs:
             kwargs['query'] = kwargs.pop('params')
         return getattr(self.client, method)(url, *args, **kwargs).json
 
+    def _url(self, template, *args, **kwargs):
+        """Returns the URL for a path template of the API
+
+        See `pureport_client.routes.url`.
+
+        :param template: the path template
+        :type template: str
+
+        :returns: the URL
+        :rtype: str
+        """
+        return routes.url(template, *args, **kwargs)
+
+    def _fan_out(self, func, ids, ids_from=None, parallel=DEFAULT_PARALLEL):
+        """Look up one or more IDs
+
+        The IDs are looked up by up to `parallel` threads at the same time,
+        fewer while the API throttles the requests or slows down, see
+        `pureport_client.ratelimit.AdaptiveConcurrency`.  A failed lookup
+        doesn't stop the others, its error is included in the results
+        instead.
+
+        :param func: the function that looks up an ID
+        :type func: function
+
+        :param ids: an ID or a list of IDs
+        :type ids: str or list
+
+        :param ids_from: a file to read more IDs from
+        :type ids_from: file
+
+        :param parallel: the number of IDs looked up at the same time
+        :type parallel: int
+
+        :returns: the result of `func` if a single ID is given otherwise
+            the results in the order of the IDs
+        :rtype: object or `Results`
+
+        :raises: `click.UsageError`
+        """
+        if isinstance(ids, str):
+            return func(ids)
+
+        ids = tuple(ids)
+        if ids_from is None:
+            if not ids:
+                raise UsageError("at least one ID is required")
+            if len(ids) == 1:
+                return func(ids[0])
+
+        results = Results()
+        concurrency = AdaptiveConcurrency(parallel)
+        for item, result, exc in fan_out(func, read_ids(ids, ids_from), parallel, concurrency):
+            results.add(item, result, exc)
+        return results
+
 
 class AccountsMixin(object):
     """Mixin class for prepending accounts url
@@ -72,8 +298,8 @@ class AccountsMixin(object):
     def __call__(self, method, url, *args, **kwargs):
         """Send the request to the API and return the results
 
-        This overload prepends `/accounts/{ account_id }` to the
-        provided URL before sending it to the remote server.
+        This overload prepends `/accounts/{ account_id }` to relative
+        URLs before sending them to the remote server.
 
         :param method: the HTTP method to call
         :type method: str
@@ -84,9 +310,26 @@ class AccountsMixin(object):
         :returns: the body of the reponse convered from json
         :rtype: dict (or list)
         """
-        url = urllib.parse.urljoin('/accounts/{}/'.format(self.account_id), url)
+        if not url.startswith('/'):
+            url = '{}/{}'.format(self._url(ACCOUNT_URL), url)
         return super(AccountsMixin, self).__call__(method, url, *args, **kwargs)
 
+    def _url(self, template, *args, **kwargs):
+        """Returns the URL for a path template of the API
+
+        Templates that start with `/accounts/{accountId}` are expanded with
+        the account ID followed by the other parameters.
+
+        :param template: the path template
+        :type template: str
+
+        :returns: the URL
+        :rtype: str
+        """
+        if template.startswith(ACCOUNT_URL):
+            args = (self.account_id,) + args
+        return super(AccountsMixin, self)._url(template, *args, **kwargs)
+
 
 class NetworksMixin(object):
     """Mixin class for prepending networks url
@@ -112,8 +355,8 @@ class NetworksMixin(object):
     def __call__(self, method, url, *args, **kwargs):
         """Send the request to the API and return the results
 
-        This overload prepends `/networks/{ network_id }` to the
-        provided URL before sending it to the remote server.
+        This overload prepends `/networks/{ network_id }` to relative
+        URLs before sending them to the remote server.
 
         :param method: the HTTP method to call
         :type method: str
@@ -124,5 +367,22 @@ class NetworksMixin(object):
         :returns: the body of the reponse convered from json
         :rtype: dict (or list)
         """
-        url = urllib.parse.urljoin('/networks/{}/'.format(self.network_id), url)
+        if not url.startswith('/'):
+            url = '{}/{}'.format(self._url(NETWORK_URL), url)
         return super(NetworksMixin, self).__call__(method, url, *args, **kwargs)
+
+    def _url(self, template, *args, **kwargs):
+        """Returns the URL for a path template of the API
+
+        Templates that start with `/networks/{networkId}` are expanded with
+        the network ID followed by the other parameters.
+
+        :param template: the path template
+        :type template: str
+
+        :returns: the URL
+        :rtype: str
+        """
+        if template.startswith(NETWORK_URL):
+            args = (self.network_id,) + args
+        return super(NetworksMixin, self)._url(template, *args, **kwargs)
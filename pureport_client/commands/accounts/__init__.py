@@ -12,7 +12,7 @@ from click import (
 
 from pureport_client.util import JSON
 from pureport_client.commands import CommandBase
-from pureport import models
+from pureport_client import models
 
 
 class Command(CommandBase):
@@ -13,7 +13,7 @@ from pureport_client.commands import (
 )
 
 from pureport_client.util import JSON
-from pureport import models
+from pureport_client import models
 
 
 class Command(AccountsMixin, CommandBase):
@@ -5,16 +5,30 @@
 
 from __future__ import absolute_import
 
+from collections import Counter
+from contextlib import closing
+
 from click import (
     option,
-    Choice
+    Choice,
+    IntRange,
+    Path,
+    UsageError
 )
 
-from pureport_client.helpers import format_date
+from pureport_client import audit_store
+
+from pureport_client.helpers import (
+    format_date,
+    paginate_pages
+)
 from pureport_client.commands import (
     CommandBase,
-    AccountsMixin
+    AccountsMixin,
+    Stream,
+    synchronous_only
 )
+from pureport_client.ratelimit import AdaptiveConcurrency
 
 
 EVENT_TYPES = ('USER_LOGIN', 'USER_FORGOT_PASSWORD', 'API_LOGIN',
@@ -80,13 +94,22 @@ class Command(AccountsMixin, CommandBase):
             help='The subject type')
     @option('-ics', '--include_child_subjects', is_flag=True,
             help='If the results should include entries from child subjects from the subject id.')
+    @option('--all', 'all_pages', is_flag=True,
+            help='Write the entries of every page, one JSON object per line, as they arrive.')
+    @option('--max-items', type=IntRange(min=1),
+            help='Stop after this many entries, with --all.')
+    @option('--parallel', type=IntRange(min=1), default=1, show_default=True,
+            help='The number of pages requested at the same time, with --all.')
     def query(self, page_number=None, page_size=None, sort=None, sort_direction=None,
               start_time=None, end_time=None, include_child_accounts=None, event_types=None,
               result=None, principal_id=None, ip_address=None, correlation_id=None, subject_id=None,
-              subject_type=None, include_child_subjects=None):
+              subject_type=None, include_child_subjects=None, all_pages=False, max_items=None, parallel=1):
         """
         Query the audit log for this account.
 
+        With --all, every page from --page_number on is requested and the
+        entries are written as newline delimited JSON whatever the format.
+
         \f
         :param int page_number:
         :param int page_size:
@@ -103,9 +126,18 @@ class Command(AccountsMixin, CommandBase):
         :param str subject_id:
         :param str subject_type:
         :param bool include_child_subjects:
-        :rtype: Page[AuditEntry]
+        :param bool all_pages: stream the entries of every page
+        :param int max_items: the number of entries after which no more
+            pages are requested
+        :param int parallel: the number of pages requested at the same time
+        :rtype: Page[AuditEntry] or `pureport_client.commands.Stream`
         :raises: .exception.ClientHttpError
+        :raises: `click.UsageError` if --max-items or --parallel is given
+            without --all
         """
+        if not all_pages and (max_items is not None or parallel != 1):
+            raise UsageError("--max-items and --parallel can only be used with --all")
+
         params = {
             'pageNumber': page_number,
             'pageSize': page_size,
@@ -124,4 +156,70 @@ class Command(AccountsMixin, CommandBase):
             'includeChildSubjects': include_child_subjects
         }
         kwargs = {'query': dict(((k, v) for k, v in params.items() if v))}
-        return self.__call__('get', 'auditLog', **kwargs)
+        if not all_pages:
+            return self.__call__('get', self._url('/accounts/{accountId}/auditLog'), **kwargs)
+
+        def query_page(page_number=None):
+            query = dict(kwargs['query'])
+            if page_number is not None:
+                query['pageNumber'] = page_number
+            return self.__call__('get', self._url('/accounts/{accountId}/auditLog'), query=query)
+
+        concurrency = AdaptiveConcurrency(parallel) if parallel > 1 else None
+        return Stream(paginate_pages(query_page, parallel=parallel, concurrency=concurrency), max_items)
+
+    @option('--database', type=Path(dir_okay=False),
+            help='The SQLite database of the entries, defaults to one per account in the cache directory.')
+    @option('-st', '--start_time',
+            help='The time of the oldest entry to save when the database is empty.')
+    @option('-ps', '--page_size', type=IntRange(min=1), default=100, show_default=True,
+            help='The page size for pagination.')
+    @option('--parallel', type=IntRange(min=1), default=1, show_default=True,
+            help='The number of pages requested at the same time.')
+    @synchronous_only
+    def sync(self, database=None, start_time=None, page_size=100, parallel=1):
+        """
+        Save the audit log entries logged since the last sync to a local database.
+
+        Only the entries logged at or after the newest entry already in the
+        database are requested, and entries already saved are skipped.
+        Entries without an ID are told apart by their content and by how
+        many identical entries came before them, so identical entries
+        logged at the same time are all saved but can't be told apart.
+
+        \f
+        :param str database: the path to the database
+        :param str start_time: formatted as 'YYYY-MM-DDT00:00:00.000Z'
+        :param int page_size:
+        :param int parallel: the number of pages requested at the same time
+        :returns: the database, the number of entries received and added
+            and the timestamp of the newest entry
+        :rtype: dict
+        """
+        path = database or audit_store.store_path(self.account_id)
+        with closing(audit_store.AuditStore(path)) as store:
+            query = {
+                'sort': 'timestamp',
+                'sortDirection': 'ASC',
+                'pageSize': page_size,
+                'startTime': store.newest() or format_date(start_time)
+            }
+            query = dict((k, v) for k, v in query.items() if v)
+
+            def query_page(page_number=None):
+                params = dict(query)
+                if page_number is not None:
+                    params['pageNumber'] = page_number
+                return self.__call__('get', self._url('/accounts/{accountId}/auditLog'), query=params)
+
+            # entries are oldest first and saved a page at a time, so an
+            # interrupted sync resumes from the last page it saved
+            received = added = 0
+            counts = Counter()
+            concurrency = AdaptiveConcurrency(parallel) if parallel > 1 else None
+            with closing(paginate_pages(query_page, parallel=parallel, concurrency=concurrency)) as pages:
+                for page in pages:
+                    received += len(page['content'])
+                    added += store.add(page['content'], counts)
+
+            return {'database': path, 'received': received, 'added': added, 'newest': store.newest()}
@@ -26,7 +26,7 @@ class Command(AccountsMixin, CommandBase):
         :returns: an AccountBilling object
         :rtype: dict
         """
-        return self.__call__('get', 'billing')
+        return self.__call__('get', self._url('/accounts/{accountId}/billing'))
 
     def get_configured(self):
         """Display all billing information
@@ -35,7 +35,7 @@ class Command(AccountsMixin, CommandBase):
         :returns: a boolean if billing is configured
         :rtype: bool
         """
-        return self.__call__('get', 'billing/configured')
+        return self.__call__('get', self._url('/accounts/{accountId}/billing/configured'))
 
     @argument('account_billing', type=JSON)
     def create(self, account_billing):
@@ -48,7 +48,7 @@ class Command(AccountsMixin, CommandBase):
         :returns: an updated AccountBilling object
         :rtype: dict
         """
-        return self.__call__('post', 'billing', json=account_billing)
+        return self.__call__('post', self._url('/accounts/{accountId}/billing'), json=account_billing)
 
     @argument('account_billing', type=JSON)
     def update(self, account_billing):
@@ -61,11 +61,11 @@ class Command(AccountsMixin, CommandBase):
         :returns: an updated AccountBilling object
         :rtype: dict
         """
-        return self.__call__('put', 'billing', json=account_billing)
+        return self.__call__('put', self._url('/accounts/{accountId}/billing'), json=account_billing)
 
     def delete(self):
         """Delete the current billing information
         \f
         :returns: None
         """
-        self.__call__('delete', 'billing')
+        self.__call__('delete', self._url('/accounts/{accountId}/billing'))
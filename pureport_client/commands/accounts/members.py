@@ -30,7 +30,7 @@ class Command(AccountsMixin, CommandBase):
         :returns: an AccountMember object
         :rtype: dict
         """
-        return self.__call__('get', 'members/{}'.format(user_id))
+        return self.__call__('get', self._url('/accounts/{accountId}/members/{userId}', user_id))
 
     @argument('member', type=JSON)
     def create(self, member):
@@ -43,7 +43,7 @@ class Command(AccountsMixin, CommandBase):
         :returns: the created AccountMember object
         :rtype: dict
         """
-        return self.__call__('post', 'members', json=member)
+        return self.__call__('post', self._url('/accounts/{accountId}/members'), json=member)
 
     @argument('member', type=JSON)
     def update(self, member):
@@ -56,7 +56,7 @@ class Command(AccountsMixin, CommandBase):
         :returns: the created AccountMember object
         :rtype: dict
         """
-        return self.__call__('put', 'members/{user}'.format(**member), json=member)
+        return self.__call__('put', self._url('/accounts/{accountId}/members/{userId}', member['user']), json=member)
 
     @argument('user_id')
     def delete(self, user_id):
@@ -68,4 +68,4 @@ class Command(AccountsMixin, CommandBase):
 
         :returns: None
         """
-        self.__call__('delete', 'members/{}'.format(user_id))
+        self.__call__('delete', self._url('/accounts/{accountId}/members/{userId}', user_id))
@@ -30,7 +30,7 @@ class Command(AccountsMixin, CommandBase):
         :returns: a list of NetworkConnectionEgressIngress objects
         :rtype: list
         """
-        return self.__call__('post', 'metrics/usageByConnection', json=options)
+        return self.__call__('post', self._url('/accounts/{accountId}/metrics/usageByConnection'), json=options)
 
     @argument('options', type=JSON)
     def usage_by_connection_and_time(self, options):
@@ -43,7 +43,7 @@ class Command(AccountsMixin, CommandBase):
         :returns: a list of ConnectionTimeEgressIngress objects
         :rtype: list
         """
-        return self.__call__('post', 'metrics/usageByConnectionAndTime', json=options)
+        return self.__call__('post', self._url('/accounts/{accountId}/metrics/usageByConnectionAndTime'), json=options)
 
     @argument('options', type=JSON)
     def usage_by_network_and_time(self, options):
@@ -56,4 +56,4 @@ class Command(AccountsMixin, CommandBase):
         :returns: a list of NetworkTimeUsage objects
         :rtype: list
         """
-        return self.__call__('post', 'metrics/usageByNetworkAndTime', json=options)
+        return self.__call__('post', self._url('/accounts/{accountId}/metrics/usageByNetworkAndTime'), json=options)
@@ -22,4 +22,4 @@ class Command(AccountsMixin, CommandBase):
         :returns: an AccountPermissions object
         :rtype: dict
         """
-        return self.__call__('get', 'permissions')
+        return self.__call__('get', self._url('/accounts/{accountId}/permissions'))
@@ -39,4 +39,4 @@ class Command(AccountsMixin, CommandBase):
         :returns: an updated Port object
         :rtype: dict
         """
-        return self.__call__('post', 'ports', json=port)
+        return self.__call__('post', self._url('/accounts/{accountId}/ports'), json=port)
@@ -11,7 +11,12 @@ from click import option, argument
 
 from pureport_client.util import JSON
 from pureport_client.helpers import retry
-from pureport_client.commands import CommandBase
+from pureport_client.routes import url
+from pureport_client.commands import (
+    CommandBase,
+    DEFAULT_PARALLEL,
+    ids_argument
+)
 
 from pureport_client.exceptions import (
     ClientHttpError,
@@ -57,7 +62,7 @@ def get_connection_until_state(client, connection_id, expected_state, failed_sta
 
     :raises: ConnectionOperationTimeoutError
     """
-    connection = client('get', '/connections/{}'.format(connection_id))
+    connection = client('get', url('/connections/{connectionId}', connection_id))
 
     if ConnectionState[connection['state']] in failed_states:
         raise ConnectionOperationFailedError(connection=connection)
@@ -88,7 +93,7 @@ def get_connection_until_not_found(client, connection_id, failed_states):
     :raises: ConnectionOperationTimeoutError
     """
     try:
-        connection = client('get', '/connections/{}'.format(connection_id))
+        connection = client('get', url('/connections/{connectionId}', connection_id))
     except ClientHttpError:
         return
 
@@ -102,18 +107,26 @@ class Command(CommandBase):
     """Manage Pureport connections
     """
 
-    @argument('connection_id')
-    def get(self, connection_id):
-        """Display connection identified by connection id
+    @ids_argument('connection_id')
+    def get(self, connection_id, ids_from=None, parallel=DEFAULT_PARALLEL):
+        """Display connections identified by connection id
 
         \f
-        :param connection_id: the id of the connection to retrieve
-        :type connection_id: str
+        :param connection_id: the id of the connection to retrieve, or a list of ids
+        :type connection_id: str or list
 
-        :returns: a Connection object
-        :rtype: dict
+        :param ids_from: a file to read more ids from, one per line
+        :type ids_from: file
+
+        :param parallel: the number of ids retrieved at the same time
+        :type parallel: int
+
+        :returns: a Connection object, or a list of Connection objects in the order of the ids
+            if more than one id is given
+        :rtype: dict or list
         """
-        return self.__call__('get', '/connections/{}'.format(connection_id))
+        return self._fan_out(lambda item: self.__call__('get', self._url('/connections/{connectionId}', item)),
+                             connection_id, ids_from, parallel)
 
     @argument('connection', type=JSON)
     @option('-w', '--wait_until_active', is_flag=True,
@@ -132,7 +145,7 @@ class Command(CommandBase):
         :rtype: dict
         """
         connection = self.__call__(
-            'put', '/connections/{id}'.format(**connection), json=connection
+            'put', self._url('/connections/{connectionId}', connection['id']), json=connection
         )
 
         if wait_until_active:
@@ -163,7 +176,7 @@ class Command(CommandBase):
         :raises: `pureport_client.exceptions.ClientHttpError`
         """
         try:
-            self.__call__('delete', '/connections/{}'.format(connection_id))
+            self.__call__('delete', self._url('/connections/{connectionId}', connection_id))
         except ClientHttpError as exc:
             if exc.status_code == 404:
                 return
@@ -187,7 +200,7 @@ class Command(CommandBase):
         :returns: a list of Task objects
         :rtype: list
         """
-        return self.__call__('get', '/connections/{}/tasks'.format(connection_id))
+        return self.__call__('get', self._url('/connections/{connectionId}/tasks', connection_id))
 
     @argument('connection_id')
     @argument('task', type=JSON)
@@ -205,5 +218,5 @@ class Command(CommandBase):
         :rtype: dict
         """
         return self.__call__(
-            'post', '/connections/{}/tasks'.format(connection_id), json=task
+            'post', self._url('/connections/{connectionId}/tasks', connection_id), json=task
         )
@@ -8,25 +8,37 @@ from __future__ import absolute_import
 from click import argument
 
 from pureport_client.util import JSON
-from pureport_client.commands import CommandBase
+from pureport_client.commands import (
+    CommandBase,
+    DEFAULT_PARALLEL,
+    ids_argument
+)
 
 
 class Command(CommandBase):
     """Display Pureport gateway information
     """
 
-    @argument('gateway_id')
-    def get(self, gateway_id):
-        """Get a gateway by its id
+    @ids_argument('gateway_id')
+    def get(self, gateway_id, ids_from=None, parallel=DEFAULT_PARALLEL):
+        """Get gateways by their ids
 
         \f
-        :param gateway_id: the id of the gateway to retrieve
-        :type gateway_id: str
+        :param gateway_id: the id of the gateway to retrieve, or a list of ids
+        :type gateway_id: str or list
 
-        :returns: a gateway object
-        :rtype: dict
+        :param ids_from: a file to read more ids from, one per line
+        :type ids_from: file
+
+        :param parallel: the number of ids retrieved at the same time
+        :type parallel: int
+
+        :returns: a gateway object, or a list of gateway objects in the order of the ids
+            if more than one id is given
+        :rtype: dict or list
         """
-        return self.__call__('get', '/gateways/{}'.format(gateway_id))
+        return self._fan_out(lambda item: self.__call__('get', self._url('/gateways/{gatewayId}', item)),
+                             gateway_id, ids_from, parallel)
 
     @argument('gateway_id')
     def get_bgp_routes(self, gateway_id):
@@ -39,7 +51,7 @@ class Command(CommandBase):
         :returns: a  list of bgp route objects
         :rtype: list
         """
-        return self.__call__('get', '/gateways/{}/bgpRoutes'.format(gateway_id))
+        return self.__call__('get', self._url('/gateways/{gatewayId}/bgpRoutes', gateway_id))
 
     @argument('gateway_id')
     @argument('date_filter', type=JSON)
@@ -56,7 +68,7 @@ class Command(CommandBase):
         """
         return self.__call__(
             'post',
-            '/gateways/{}/metrics/connectivity'.format(gateway_id),
+            self._url('/gateways/{gatewayId}/metrics/connectivity', gateway_id),
             json=date_filter
         )
 
@@ -71,7 +83,7 @@ class Command(CommandBase):
         """
         return self.__call__(
             'get',
-            '/gateways/{}/metrics/connectivity/current'.format(gateway_id)
+            self._url('/gateways/{gatewayId}/metrics/connectivity/current', gateway_id)
         )
 
     @argument('gateway_id')
@@ -85,7 +97,7 @@ class Command(CommandBase):
         :returns: a Task object
         :rtype: dict
         """
-        self.__call__('get', '/gateways/{}/tasks'.format(gateway_id))
+        self.__call__('get', self._url('/gateways/{gatewayId}/tasks', gateway_id))
 
     @argument('gateway_id')
     @argument('task', type=JSON)
@@ -99,4 +111,4 @@ class Command(CommandBase):
         :param task: task object to be created
         :type task: dict
         """
-        self.__call__('post', '/gateways/{}/tasks'.format(gateway_id), json=task)
+        self.__call__('post', self._url('/gateways/{gatewayId}/tasks', gateway_id), json=task)
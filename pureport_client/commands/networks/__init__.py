@@ -11,7 +11,11 @@ from click import (
 )
 
 from pureport_client.util import JSON
-from pureport_client.commands import CommandBase
+from pureport_client.commands import (
+    CommandBase,
+    DEFAULT_PARALLEL,
+    ids_argument
+)
 
 from pureport_client.commands.networks import connections
 
@@ -20,18 +24,26 @@ class Command(CommandBase):
     """Manage Pureport networks
     """
 
-    @argument('network_id')
-    def get(self, network_id):
-        """Get a network with the provided network id.
+    @ids_argument('network_id')
+    def get(self, network_id, ids_from=None, parallel=DEFAULT_PARALLEL):
+        """Get the networks with the provided network ids.
 
         \f
-        :param network_id: the network id to retrieve
-        :type network_id: str
+        :param network_id: the network id to retrieve, or a list of ids
+        :type network_id: str or list
 
-        :returns: a network object
-        :rtype: dict
+        :param ids_from: a file to read more ids from, one per line
+        :type ids_from: file
+
+        :param parallel: the number of ids retrieved at the same time
+        :type parallel: int
+
+        :returns: a network object, or a list of network objects in the order of the ids
+            if more than one id is given
+        :rtype: dict or list
         """
-        return self.__call__('get', '/networks/{}'.format(network_id))
+        return self._fan_out(lambda item: self.__call__('get', self._url('/networks/{networkId}', item)),
+                             network_id, ids_from, parallel)
 
     @argument('network', type=JSON)
     def update(self, network):
@@ -44,7 +56,7 @@ class Command(CommandBase):
         :returns: a network object
         :rtype: dict
         """
-        return self.__call__('put', '/networks/{id}'.format(**network), json=network)
+        return self.__call__('put', self._url('/networks/{networkId}', network['id']), json=network)
 
     @argument('network_id')
     def delete(self, network_id):
@@ -56,7 +68,7 @@ class Command(CommandBase):
 
         :returns: None
         """
-        self.__call__('delete', '/networks/{}'.format(network_id))
+        self.__call__('delete', self._url('/networks/{networkId}', network_id))
 
     @option('-n', '--network_id', envvar='PUREPORT_NETWORK_ID', required=True)
     def connections(self, network_id):
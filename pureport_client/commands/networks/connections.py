@@ -34,7 +34,7 @@ class Command(NetworksMixin, CommandBase):
         :returns: a list of connection objects
         :rtype: list
         """
-        return self.__call__('get', 'connections')
+        return self.__call__('get', self._url('/networks/{networkId}/connections'))
 
     @argument('connection', type=JSON)
     @option('-w', '--wait_until_active', is_flag=True,
@@ -52,7 +52,7 @@ class Command(NetworksMixin, CommandBase):
         :returns: a connection object
         :rtype: dict
         """
-        connection = self.__call__('post', 'connections', json=connection)
+        connection = self.__call__('post', self._url('/networks/{networkId}/connections'), json=connection)
 
         if wait_until_active:
             connection = get_connection_until_state(
@@ -31,4 +31,4 @@ class Command(CommandBase):
         :rtype: list
         """
         kwargs = {'query': {'types': types}} if types else {}
-        return self.__call__('get', '/options', **kwargs)
+        return self.__call__('get', self._url('/options'), **kwargs)
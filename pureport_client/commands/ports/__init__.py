@@ -8,25 +8,37 @@ from __future__ import absolute_import
 from click import argument
 
 from pureport_client.util import JSON
-from pureport_client.commands import CommandBase
+from pureport_client.commands import (
+    CommandBase,
+    DEFAULT_PARALLEL,
+    ids_argument
+)
 
 
 class Command(CommandBase):
     """Manage Pureport ports
     """
 
-    @argument('port_id')
-    def get(self, port_id):
-        """Get the port with the provided port id.
+    @ids_argument('port_id')
+    def get(self, port_id, ids_from=None, parallel=DEFAULT_PARALLEL):
+        """Get the ports with the provided port ids.
 
         \f
-        :param port_id: the id of the port to retrieve
-        :type port_id: str
+        :param port_id: the id of the port to retrieve, or a list of ids
+        :type port_id: str or list
 
-        :returns: a port object
-        :rtype: dict
+        :param ids_from: a file to read more ids from, one per line
+        :type ids_from: file
+
+        :param parallel: the number of ids retrieved at the same time
+        :type parallel: int
+
+        :returns: a port object, or a list of port objects in the order of the ids
+            if more than one id is given
+        :rtype: dict or list
         """
-        return self.__call__('get', '/ports/{}'.format(port_id))
+        return self._fan_out(lambda item: self.__call__('get', self._url('/ports/{portId}', item)),
+                             port_id, ids_from, parallel)
 
     @argument('port_id')
     def get_accounts_using_port(self, port_id):
@@ -39,7 +51,7 @@ class Command(CommandBase):
         :returns: a list of Link objects
         :rtype: list
         """
-        return self.__call__('get', '/ports/{}/accounts'.format(port_id))
+        return self.__call__('get', self._url('/ports/{portId}/accounts', port_id))
 
     @argument('port', type=JSON)
     def update(self, port):
@@ -52,7 +64,7 @@ class Command(CommandBase):
         :returns: a Port object
         :rtype: dict
         """
-        return self.__call__('put', '/ports/{id}'.format(**port), json=port)
+        return self.__call__('put', self._url('/ports/{portId}', port['id']), json=port)
 
     @argument('port_id')
     def delete(self, port_id):
@@ -64,4 +76,4 @@ class Command(CommandBase):
 
         :returns: None
         """
-        self.__call__('delete', '/ports/{}'.format(port_id))
+        self.__call__('delete', self._url('/ports/{portId}', port_id))
@@ -7,11 +7,14 @@ from __future__ import absolute_import
 
 from click import (
    option,
-   argument,
    Choice
 )
 
-from pureport_client.commands import CommandBase
+from pureport_client.commands import (
+    CommandBase,
+    DEFAULT_PARALLEL,
+    ids_argument
+)
 
 
 STATE_CHOICES = ('CREATED', 'RUNNING', 'COMPLETED', 'FAILED', 'DELETED')
@@ -44,17 +47,25 @@ class Command(CommandBase):
         params = {'state': state, 'pageNumber': page_number,
                   'pageSize': page_size}
         kwargs = {'query': dict(((k, v) for k, v in params.items() if v))}
-        return self.__call__('get', '/tasks', **kwargs)
+        return self.__call__('get', self._url('/tasks'), **kwargs)
 
-    @argument('task_id')
-    def get(self, task_id):
-        """Get a task by it's id.
+    @ids_argument('task_id')
+    def get(self, task_id, ids_from=None, parallel=DEFAULT_PARALLEL):
+        """Get tasks by their ids.
 
         \f
-        :param task_id: the ide of the task to retrieve
-        :type task_id: string
+        :param task_id: the id of the task to retrieve, or a list of ids
+        :type task_id: str or list
+
+        :param ids_from: a file to read more ids from, one per line
+        :type ids_from: file
+
+        :param parallel: the number of ids retrieved at the same time
+        :type parallel: int
 
-        :returns: a Task object
-        :rtype: dict
+        :returns: a Task object, or a list of Task objects in the order of the ids
+            if more than one id is given
+        :rtype: dict or list
         """
-        return self.__call__('get', '/tasks/{}'.format(task_id))
+        return self._fan_out(lambda item: self.__call__('get', self._url('/tasks/{taskId}', item)),
+                             task_id, ids_from, parallel)
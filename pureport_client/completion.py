@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The completion module answers shell completion requests from a
+precomputed index of the command tree.
+
+Click completes the command line by constructing the complete command
+tree, which is too slow to run on every press of the TAB key.  Instead,
+the names, help text and parameters of every command are saved to the
+completion index in the per-user cache whenever the command manifest is
+built (see :func:`write`), and :func:`complete` answers completion
+requests by walking the index without importing click or any of the
+command modules.  Requests that can't be answered from the index, such as
+generating the completion script, fall back to click.
+
+The IDs of accounts, networks and connections returned by commands can
+also be saved to the cache and offered as completions for the
+`account_id`, `network_id` and `connection_id` parameters.  This is
+disabled by default and is enabled by setting the
+`PUREPORT_COMPLETION_IDS` environment variable.
+"""
+
+from __future__ import absolute_import
+
+import os
+import sys
+import json
+import shlex
+import hashlib
+
+import pureport_client
+
+from pureport_client import (
+    cache,
+    plugins
+)
+
+INDEX_FILENAME = 'completion.json'
+
+INDEX_VERSION = 1
+
+IDS_FILENAME = 'completion-ids.json'
+
+# the number of IDs saved for each parameter
+MAX_IDS = 100
+
+# ID prefixes of the resources saved for completion by parameter name
+ID_PREFIXES = {
+    'account_id': 'ac-',
+    'network_id': 'network-',
+    'connection_id': 'conn-'
+}
+
+
+def index_key(entry_points):
+    """Returns the key used to validate the completion index
+
+    :param entry_points: the installed plugin entry points
+    :type entry_points: list
+
+    :returns: a hash of the package version, sources and plugins
+    :rtype: str
+    """
+    key = json.dumps([INDEX_VERSION,
+                      pureport_client.__version__,
+                      os.path.dirname(pureport_client.__file__),
+                      cache.source_stamp(os.path.dirname(pureport_client.__file__)),
+                      sorted(str(item) for item in entry_points)])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def dump(cmd):
+    """Serialize a click command for the completion index
+
+    :param cmd: the command
+    :type cmd: `click.Command`
+
+    :returns: the serialized command
+    :rtype: dict
+    """
+    from click import Choice
+
+    params = []
+    for param in cmd.params:
+        if getattr(param, 'hidden', False):
+            continue
+        params.append({
+            'name': param.name,
+            'opts': param.opts + param.secondary_opts if param.param_type_name == 'option' else [],
+            'flag': bool(getattr(param, 'is_flag', False)) or bool(getattr(param, 'count', False)),
+            'multiple': param.multiple,
+            'choices': list(param.type.choices) if isinstance(param.type, Choice) else None,
+            'help': getattr(param, 'help', None)
+        })
+
+    data = {'help': cmd.get_short_help_str(), 'params': params}
+
+    if hasattr(cmd, 'commands'):
+        data['commands'] = {}
+        for name in cmd.list_commands(None):
+            sub = cmd.get_command(None, name)
+            if sub is not None and not sub.hidden:
+                data['commands'][name] = dump(sub)
+
+    return data
+
+
+def write(cli, entry_points):
+    """Build the completion index and write it to the cache
+
+    This resolves every command in the tree, so it should only be called
+    when the tree is constructed from the command manifest.
+
+    :param cli: the root command group
+    :type cli: `click.Group`
+
+    :param entry_points: the installed plugin entry points
+    :type entry_points: list
+
+    :returns: True if the index was written
+    :rtype: bool
+    """
+    return cache.write_json(INDEX_FILENAME, {'key': index_key(entry_points), 'root': dump(cli)})
+
+
+def read(entry_points=None):
+    """Read the completion index from the cache
+
+    :param entry_points: the installed plugin entry points, discovered
+        if not set
+    :type entry_points: list
+
+    :returns: the root of the command tree or None if the index is
+        missing or out of date
+    :rtype: dict
+    """
+    if entry_points is None:
+        entry_points = plugins.entry_points()
+    data = cache.read_json(INDEX_FILENAME)
+    if not data or data.get('key') != index_key(entry_points):
+        return None
+    return data['root']
+
+
+def exists():
+    """Returns whether the completion index is in the cache
+
+    The index isn't read, it is written along with the command manifest
+    so it is up to date whenever the manifest is, see
+    `pureport_client.__main__.make`.
+
+    :rtype: bool
+    """
+    return os.path.isfile(cache.cache_path(INDEX_FILENAME))
+
+
+def ids_enabled():
+    return bool(os.getenv('PUREPORT_COMPLETION_IDS'))
+
+
+def remember_ids(response):
+    """Save the IDs of the resources in a command response
+
+    Does nothing unless `PUREPORT_COMPLETION_IDS` is set.
+
+    :param response: the command response
+    :type response: object
+
+    :returns: None
+    """
+    if not ids_enabled() or response is None:
+        return
+
+    items = response if isinstance(response, (list, tuple)) else [response]
+
+    found = {}
+    for item in items:
+        value = item.get('id') if isinstance(item, dict) else getattr(item, 'id', None)
+        if not isinstance(value, str):
+            continue
+        for name, prefix in ID_PREFIXES.items():
+            if value.startswith(prefix):
+                found.setdefault(name, []).append(value)
+
+    if not found:
+        return
+
+    data = cache.read_json(IDS_FILENAME) or {}
+    for name, values in found.items():
+        saved = [item for item in data.get(name, []) if item not in values]
+        data[name] = (values + saved)[:MAX_IDS]
+    cache.write_json(IDS_FILENAME, data)
+
+
+def find_option(node, name):
+    for param in node['params']:
+        if name in param['opts']:
+            return param
+    return None
+
+
+def values(param, incomplete):
+    """Returns the values that complete a parameter
+
+    :param param: the serialized parameter
+    :type param: dict
+
+    :param incomplete: the value being completed
+    :type incomplete: str
+
+    :returns: a list of value, help tuples
+    :rtype: list
+    """
+    if param.get('choices'):
+        return [(item, None) for item in param['choices'] if item.startswith(incomplete)]
+    if param['name'] in ID_PREFIXES and ids_enabled():
+        saved = (cache.read_json(IDS_FILENAME) or {}).get(param['name'], [])
+        return [(item, None) for item in saved if item.startswith(incomplete)]
+    return []
+
+
+def walk(root, args):
+    """Walk the index along the arguments of a command line
+
+    :param root: the root of the command tree from the index
+    :type root: dict
+
+    :param args: the arguments before the one being completed
+    :type args: list
+
+    :returns: the command that was reached, the names of the options
+        already given to it, the number of its arguments given and the
+        option waiting for a value or None
+    :rtype: tuple
+    """
+    node = root
+    used = set()
+    position = 0
+    expecting = None
+
+    for arg in args:
+        if expecting is not None:
+            expecting = None
+        elif arg.startswith('-') and len(arg) > 1 and arg != '--':
+            name, sep, _ = arg.partition('=')
+            param = find_option(node, name)
+            if param is not None:
+                used.add(param['name'])
+                if not param['flag'] and not sep:
+                    expecting = param
+        elif arg in node.get('commands', {}):
+            node = node['commands'][arg]
+            used = set()
+            position = 0
+        else:
+            position += 1
+
+    return node, used, position, expecting
+
+
+def option_completions(node, used, incomplete):
+    """Returns the options of a command that complete an argument
+
+    Options already given are left out unless they can be repeated.
+
+    :returns: a list of value, help tuples
+    :rtype: list
+    """
+    items = []
+    for param in node['params']:
+        if param['opts'] and (param['multiple'] or param['name'] not in used):
+            items.extend((opt, param['help']) for opt in param['opts'])
+    items.append(('--help', 'Show this message and exit.'))
+    return [item for item in items if item[0].startswith(incomplete)]
+
+
+def completions(root, args, incomplete):
+    """Returns the completions for a command line
+
+    This follows the rules click uses to complete a command line.
+
+    :param root: the root of the command tree from the index
+    :type root: dict
+
+    :param args: the arguments before the one being completed
+    :type args: list
+
+    :param incomplete: the argument being completed
+    :type incomplete: str
+
+    :returns: a list of value, help tuples
+    :rtype: list
+    """
+    node, used, position, expecting = walk(root, args)
+
+    if expecting is not None:
+        return values(expecting, incomplete)
+
+    if incomplete.startswith('-'):
+        return option_completions(node, used, incomplete)
+
+    if 'commands' in node:
+        return [(name, value['help'] or None) for name, value in sorted(node['commands'].items())
+                if name.startswith(incomplete)]
+
+    arguments = [param for param in node['params'] if not param['opts']]
+    if position < len(arguments):
+        return values(arguments[position], incomplete)
+
+    return []
+
+
+def format_completion(shell, value, help=None):
+    if shell == 'zsh':
+        return 'plain\n{}\n{}'.format(value.replace(':', r'\:') if help else value, help or '_')
+    if shell == 'fish' and help:
+        return 'plain,{}\t{}'.format(value, help.replace('\n', '\\n').replace('\t', ' '))
+    return 'plain,{}'.format(value)
+
+
+def completion_args(shell):
+    """Returns the arguments and incomplete argument from the environment
+
+    :param shell: the name of the shell
+    :type shell: str
+
+    :returns: the arguments and the incomplete argument
+    :rtype: tuple
+    """
+    words = shlex.split(os.environ.get('COMP_WORDS', ''))
+    if shell == 'fish':
+        incomplete = os.environ.get('COMP_CWORD', '')
+        if incomplete:
+            incomplete = shlex.split(incomplete)[0]
+        args = words[1:]
+        if incomplete and args and args[-1] == incomplete:
+            args.pop()
+        return args, incomplete
+    cword = int(os.environ['COMP_CWORD'])
+    args = words[1:cword]
+    incomplete = words[cword] if cword < len(words) else ''
+    return args, incomplete
+
+
+def complete(prog_name=None):
+    """Answer a shell completion request from the completion index
+
+    :param prog_name: the name of the program, defaults to the name
+        the program was run as
+    :type prog_name: str
+
+    :returns: the exit code or None if there is no completion request
+        or it can't be answered from the index
+    :rtype: int
+    """
+    prog_name = prog_name or os.path.basename(sys.argv[0])
+    var = '_{}_COMPLETE'.format(prog_name).replace('-', '_').replace('.', '_').upper()
+
+    shell, _, instruction = os.environ.get(var, '').partition('_')
+    if instruction != 'complete' or shell not in ('bash', 'zsh', 'fish'):
+        return None
+
+    try:
+        root = read()
+        if root is None:
+            return None
+        args, incomplete = completion_args(shell)
+    except (KeyError, ValueError):
+        return None
+
+    items = completions(root, args, incomplete)
+
+    out = getattr(sys.stdout, 'buffer', sys.stdout)
+    text = '\n'.join(format_completion(shell, value, help) for value, help in items) + '\n'
+    out.write(text.encode('utf-8') if out is not sys.stdout else text)
+    out.flush()
+
+    return 0
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The console module provides the entry point of the `pureport` script.
+
+Shell completion requests are answered from the completion index, and
+commands are sent to the daemon if one is running, before the command
+line interface is imported, see `pureport_client.completion` and
+`pureport_client.daemon_client`.
+"""
+
+from __future__ import absolute_import
+
+import sys
+
+from pureport_client import (
+    completion,
+    daemon_client
+)
+
+
+def run():
+    """Entry point of the `pureport` script
+    """
+    code = completion.complete()
+    if code is not None:
+        sys.exit(code)
+
+    code = daemon_client.forward(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
+    from pureport_client.__main__ import run as main
+    main()
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The daemon module runs the command line interface as a resident process.
+
+Starting the CLI pays for the Python interpreter, constructing the
+command tree, resolving credentials, authenticating and opening
+connections to the API.  `pureport daemon start` keeps a process running
+that holds all of those, and invocations of `pureport` become a thin
+client that forwards the command line arguments, environment and stdin
+to the daemon over a Unix socket and streams stdout and stderr back.
+The exit code of the command is the exit code of the client.  The client
+is implemented by `pureport_client.daemon_client` and runs before the
+command line interface is imported.
+
+The daemon is opt-in: the client only forwards commands when a daemon is
+listening.  There is one daemon per user and per API profile.  The
+sockets are created in a directory only accessible by the user, see
+`pureport_client.daemon_client.runtime_dir`.  Commands are run locally instead of by the daemon
+when credentials or other options of the session, such as
+`--max-connections`, are given on the command line or the ones in the
+environment don't match the ones the daemon was started with.  Setting
+the `PUREPORT_NO_DAEMON` environment variable disables forwarding.
+
+The daemon exits after it hasn't received a request for the idle
+timeout.
+"""
+
+from __future__ import absolute_import
+
+import io
+import os
+import sys
+import time
+import base64
+import socket
+
+from logging import getLogger
+
+from click import (
+    echo,
+    group,
+    option,
+    pass_context,
+    ClickException
+)
+
+from pureport_client.daemon_client import (
+    ENV_PREFIX,
+    connect,
+    receive,
+    request,
+    send,
+    session_env,
+    socket_path
+)
+from pureport_client.exceptions import PureportClientError
+from pureport_client.util import invoke
+
+log = getLogger(__name__)
+
+DEFAULT_IDLE_TIMEOUT = 600
+
+
+class RemoteWriter(io.RawIOBase):
+    """Stream that writes to the stdout or stderr of the client
+    """
+
+    def __init__(self, wfile, name, tty=False):
+        self._wfile = wfile
+        self._name = name
+        self._tty = tty
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return self._tty
+
+    def write(self, b):
+        send(self._wfile, **{self._name: base64.b64encode(bytes(b)).decode('ascii')})
+        return len(b)
+
+
+class RemoteReader(io.RawIOBase):
+    """Stream that reads from the stdin of the client
+
+    The client only starts sending its stdin once the command reads it.
+    """
+
+    def __init__(self, rfile, wfile):
+        self._rfile = rfile
+        self._wfile = wfile
+        self._buffer = b''
+        self._requested = False
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer and not self._eof:
+            if not self._requested:
+                send(self._wfile, stdin=True)
+                self._requested = True
+            msg = receive(self._rfile) or {}
+            if msg.get('stdin'):
+                self._buffer = base64.b64decode(msg['stdin'])
+            else:
+                self._eof = True
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class Server(object):
+    """Runs commands sent by clients over a Unix socket
+
+    Commands are run one at a time in this process using the same command
+    tree and API session.
+    """
+
+    def __init__(self, cli, session, path, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        """Initialize the instance
+
+        :param cli: the root command group
+        :type cli: `click.Group`
+
+        :param session: the API session shared by all commands
+        :type session: `pureport_client.util.LazySession`
+
+        :param path: the path of the socket
+        :type path: str
+
+        :param idle_timeout: the number of seconds without a request
+            after which the server exits, 0 to never exit
+        :type idle_timeout: int
+        """
+        self.cli = cli
+        self.session = session
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.env = session_env(os.environ)
+        self.started = time.time()
+        self.requests = 0
+        self.running = False
+        self.socket = None
+
+    def listen(self):
+        """Create the socket and start listening for clients
+
+        :returns: None
+
+        :raises: `pureport_client.exceptions.PureportClientError`
+        """
+        if os.path.exists(self.path):
+            try:
+                connect(self.path).close()
+            except OSError:
+                log.debug("removing stale socket {}".format(self.path))
+                os.remove(self.path)
+            else:
+                raise PureportClientError("the daemon is already running")
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o077)
+        try:
+            sock.bind(self.path)
+        finally:
+            os.umask(umask)
+        sock.listen(16)
+        sock.settimeout(self.idle_timeout or None)
+        self.socket = sock
+
+    def serve_forever(self):
+        """Handle clients until stopped or the idle timeout expires
+
+        :returns: None
+        """
+        if self.socket is None:
+            self.listen()
+
+        self.running = True
+        try:
+            while self.running:
+                try:
+                    conn, _ = self.socket.accept()
+                except socket.timeout:
+                    log.info("daemon idle for {} seconds, exiting".format(self.idle_timeout))
+                    break
+                with conn:
+                    conn.settimeout(None)
+                    try:
+                        self.handle(conn)
+                    except (OSError, ValueError) as exc:
+                        log.debug("client error: {}".format(exc))
+        finally:
+            self.running = False
+            self.socket.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def handle(self, conn):
+        """Handle a client connection
+
+        :param conn: the client socket
+        :type conn: `socket.socket`
+
+        :returns: None
+        """
+        with conn.makefile('rb') as rfile, conn.makefile('wb') as wfile:
+            msg = receive(rfile)
+            if msg is None:
+                return
+
+            if msg.get('control') == 'stop':
+                self.running = False
+                send(wfile, stopped=True)
+            elif msg.get('control') == 'status':
+                send(wfile, pid=os.getpid(), started=self.started, requests=self.requests,
+                     idle_timeout=self.idle_timeout)
+            elif session_env(msg.get('env', {})) != self.env:
+                send(wfile, error="credentials or session options do not match the daemon")
+            else:
+                send(wfile, started=True)
+                self.requests += 1
+                send(wfile, exit=self.run(msg, rfile, wfile))
+
+    def run(self, msg, rfile, wfile):
+        """Run a command sent by a client
+
+        :param msg: the request with the `argv`, `env`, `cwd` and `tty`
+            of the client
+        :type msg: dict
+
+        :param rfile: the socket file opened for reading
+        :type rfile: file
+
+        :param wfile: the socket file opened for writing
+        :type wfile: file
+
+        :returns: the exit code
+        :rtype: int
+        """
+        tty = msg.get('tty') or (False, False)
+
+        saved = (sys.stdin, sys.stdout, sys.stderr, dict(os.environ), os.getcwd())
+
+        streams = (
+            io.TextIOWrapper(io.BufferedReader(RemoteReader(rfile, wfile)), encoding='utf-8'),
+            io.TextIOWrapper(RemoteWriter(wfile, 'stdout', tty[0]), encoding='utf-8', write_through=True),
+            io.TextIOWrapper(RemoteWriter(wfile, 'stderr', tty[1]), encoding='utf-8', write_through=True)
+        )
+
+        try:
+            sys.stdin, sys.stdout, sys.stderr = streams
+
+            for key in [k for k in os.environ if k.startswith(ENV_PREFIX)]:
+                del os.environ[key]
+            os.environ.update(msg.get('env') or {})
+
+            if msg.get('cwd'):
+                os.chdir(msg['cwd'])
+
+            return invoke(self.cli, msg.get('argv') or [], obj=self.session)
+
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = saved[:3]
+            os.environ.clear()
+            os.environ.update(saved[3])
+            os.chdir(saved[4])
+            for stream in streams:
+                try:
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass
+                stream.detach()
+
+
+def profile_name(ctx):
+    root = ctx.find_root()
+    return root.params.get('api_profile') or os.getenv('PUREPORT_API_PROFILE')
+
+
+@group()
+def daemon():
+    """Run commands in a resident process
+
+    While the daemon is running, pureport commands for the same user and
+    API profile are sent to it instead of starting a new process.
+    """
+
+
+@daemon.command()
+@option('--idle-timeout', type=int, default=DEFAULT_IDLE_TIMEOUT, show_default=True,
+        help='Exit after this many seconds without a command, 0 to never exit.')
+@option('--detach', is_flag=True, help='Run the daemon in the background.')
+@pass_context
+def start(ctx, idle_timeout, detach):
+    """Start the daemon
+    """
+    root = ctx.find_root()
+
+    try:
+        server = Server(root.command, root.obj, socket_path(profile_name(ctx), create=True), idle_timeout)
+        server.listen()
+    except PureportClientError as exc:
+        raise ClickException(exc.message)
+
+    if detach:
+        if os.fork():
+            return
+        os.setsid()
+        with open(os.devnull, 'r+b') as devnull:
+            for fd in (0, 1, 2):
+                os.dup2(devnull.fileno(), fd)
+
+    server.serve_forever()
+
+
+@daemon.command()
+@pass_context
+def stop(ctx):
+    """Stop the daemon
+    """
+    try:
+        request(socket_path(profile_name(ctx)), {'control': 'stop'})
+    except (OSError, PureportClientError):
+        raise ClickException("the daemon is not running")
+    echo("daemon stopped")
+
+
+@daemon.command()
+@pass_context
+def status(ctx):
+    """Display the status of the daemon
+    """
+    try:
+        reply = request(socket_path(profile_name(ctx)), {'control': 'status'})
+    except (OSError, PureportClientError):
+        raise ClickException("the daemon is not running")
+    echo("daemon running, pid {}, {} commands, up {:.0f} seconds, idle timeout {} seconds".format(
+        reply['pid'], reply['requests'], time.time() - reply['started'], reply['idle_timeout']))
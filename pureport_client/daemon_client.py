@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The daemon_client module sends commands to the daemon.
+
+This is the thin client side of `pureport_client.daemon`: the entry point
+calls :func:`forward` before the command line interface is imported, so
+it only uses the standard library.  The root options are parsed with
+:data:`ROOT_OPTIONS`, a copy of the options of the `pureport` command
+that is checked against the command by the tests, instead of the click
+command tree.
+"""
+
+from __future__ import absolute_import
+
+import os
+import sys
+import json
+import base64
+import socket
+import hashlib
+import tempfile
+import threading
+
+from logging import getLogger
+
+from pureport_client.exceptions import PureportClientError
+
+log = getLogger(__name__)
+
+DEFAULT_PROFILE = 'default'
+
+CHUNK_SIZE = 65536
+
+ENV_PREFIX = 'PUREPORT_'
+
+# the options of the root command, see `pureport_client.__main__.cli`,
+# by their name with their option strings and whether they take a value
+ROOT_OPTIONS = (
+    ('api_url', ('-u', '--api_url'), True),
+    ('api_key', ('-k', '--api_key'), True),
+    ('api_secret', ('-s', '--api_secret'), True),
+    ('api_profile', ('-p', '--api_profile'), True),
+    ('access_token', ('-t', '--access_token'), True),
+    ('max_connections', ('--max-connections',), True),
+    ('max_per_host', ('--max-per-host',), True),
+    ('keepalive_timeout', ('--keepalive-timeout',), True),
+    ('connect_timeout', ('--connect-timeout',), True),
+    ('read_timeout', ('--read-timeout',), True),
+    ('rate_limit', ('--rate-limit',), True),
+    ('rate_burst', ('--rate-burst',), True),
+    ('no_cache', ('--no-cache',), False),
+    ('refresh', ('--refresh',), False),
+    ('show_timings', ('--timings',), False),
+    ('record', ('--record',), True),
+    ('replay', ('--replay',), True),
+    ('replay_latency', ('--replay-latency',), True),
+    ('version', ('--version',), False)
+)
+
+# the root options that configure the session, the daemon and the
+# commands run by `batch` and `shell` share a session so they can't be
+# given to a single command
+SESSION_OPTIONS = (
+    'api_url',
+    'api_key',
+    'api_secret',
+    'access_token',
+    'max_connections',
+    'max_per_host',
+    'keepalive_timeout',
+    'connect_timeout',
+    'read_timeout',
+    'rate_limit',
+    'rate_burst',
+    'record',
+    'replay',
+    'replay_latency'
+)
+
+# environment variables that configure the session, a command is only
+# run by the daemon if they match
+SESSION_ENV = (
+    'PUREPORT_API_BASE_URL',
+    'PUREPORT_API_KEY',
+    'PUREPORT_API_SECRET',
+    'PUREPORT_ACCESS_TOKEN'
+) + tuple('{}{}'.format(ENV_PREFIX, name.upper()) for name in SESSION_OPTIONS)
+
+# commands that are always run by the client
+LOCAL_COMMANDS = ('daemon', 'shell')
+
+_option_table = dict((opt, (name, value)) for name, opts, value in ROOT_OPTIONS for opt in opts)
+
+
+def runtime_dir(create=False):
+    """Returns the directory the daemon sockets are created in
+
+    The directory is `$XDG_RUNTIME_DIR/pureport-<uid>`, or in the
+    temporary directory if `XDG_RUNTIME_DIR` is not set, and can be
+    changed with the `PUREPORT_RUNTIME_DIR` environment variable.  It
+    must be owned by the user and not accessible by anyone else.
+
+    :param create: create the directory if it doesn't exist
+    :type create: bool
+
+    :returns: the path to the directory
+    :rtype: str
+
+    :raises: `pureport_client.exceptions.PureportClientError`
+    """
+    path = os.getenv('PUREPORT_RUNTIME_DIR')
+    if not path:
+        base = os.getenv('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+        path = os.path.join(base, 'pureport-{}'.format(os.getuid()))
+
+    if create:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+
+    if os.path.isdir(path):
+        st = os.stat(path)
+        if st.st_uid != os.getuid() or st.st_mode & 0o077:
+            raise PureportClientError("{} must only be accessible by the current user".format(path))
+
+    return path
+
+
+def socket_path(profile=None, create=False):
+    """Returns the path to the socket of the daemon for a profile
+
+    :param profile: the name of the API profile
+    :type profile: str
+
+    :param create: create the parent directory if it doesn't exist
+    :type create: bool
+
+    :returns: the path to the socket
+    :rtype: str
+    """
+    digest = hashlib.sha1((profile or DEFAULT_PROFILE).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(runtime_dir(create), 'daemon-{}.sock'.format(digest))
+
+
+def parse_args(args):
+    """Returns the root options and the name of the command
+
+    No command is returned if an option is unknown, so the command is
+    run locally and the error is reported there.
+
+    :param args: the command line arguments
+    :type args: list
+
+    :returns: a dict of root options by their name and the command name
+    :rtype: tuple
+    """
+    options = {}
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if not arg.startswith('-'):
+            return options, arg
+        opt, sep, value = arg.partition('=')
+        if opt not in _option_table and not arg.startswith('--') and arg[:2] in _option_table:
+            # a short option followed by its value, such as `-pprod`
+            opt, sep, value = arg[:2], True, arg[2:]
+        if opt not in _option_table:
+            return options, None
+        name, takes_value = _option_table[opt]
+        if not takes_value:
+            options[name] = True
+        else:
+            options[name] = value if sep else (args.pop(0) if args else None)
+    return options, None
+
+
+def session_env(env):
+    """Returns the environment variables that configure the session
+
+    :param env: the environment
+    :type env: dict
+
+    :returns: the session environment variables
+    :rtype: dict
+    """
+    return dict((key, env[key]) for key in SESSION_ENV if env.get(key))
+
+
+def send(wfile, **message):
+    """Send a message over the socket
+
+    :param wfile: the socket file opened for writing
+    :type wfile: file
+
+    :returns: None
+    """
+    wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+    wfile.flush()
+
+
+def receive(rfile):
+    """Receive a message from the socket
+
+    :param rfile: the socket file opened for reading
+    :type rfile: file
+
+    :returns: the message or None if the socket was closed
+    :rtype: dict
+    """
+    line = rfile.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+
+def connect(path):
+    """Connect to a daemon
+
+    :param path: the path to the socket
+    :type path: str
+
+    :returns: the connected socket
+    :rtype: `socket.socket`
+
+    :raises: OSError
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def request(path, message):
+    """Send a message to a daemon and return the reply
+
+    :param path: the path to the socket
+    :type path: str
+
+    :param message: the message
+    :type message: dict
+
+    :returns: the reply
+    :rtype: dict
+
+    :raises: OSError
+    """
+    with connect(path) as sock:
+        with sock.makefile('rb') as rfile, sock.makefile('wb') as wfile:
+            send(wfile, **message)
+            return receive(rfile)
+
+
+def _send_stdin(stdin, wfile):
+    try:
+        while True:
+            data = stdin.read1(CHUNK_SIZE) if hasattr(stdin, 'read1') else stdin.read(CHUNK_SIZE)
+            if not data:
+                break
+            send(wfile, stdin=base64.b64encode(data).decode('ascii'))
+        send(wfile, stdin=None)
+    except (OSError, ValueError):
+        pass
+
+
+def connect_daemon(args):
+    """Connect to the daemon that can run a command
+
+    :param args: the command line arguments
+    :type args: list
+
+    :returns: the connected socket or None if the command should be run
+        locally
+    :rtype: `socket.socket`
+    """
+    if os.getenv('PUREPORT_NO_DAEMON'):
+        return None
+
+    options, command = parse_args(args)
+    if command is None or command in LOCAL_COMMANDS:
+        return None
+    # the session of the daemon can't be configured for one command
+    if any(name in options for name in SESSION_OPTIONS):
+        return None
+
+    profile = options.get('api_profile') or os.getenv('PUREPORT_API_PROFILE')
+
+    try:
+        path = socket_path(profile)
+        if not os.path.exists(path):
+            return None
+        return connect(path)
+    except (OSError, PureportClientError) as exc:
+        log.debug("unable to connect to daemon: {}".format(exc))
+        return None
+
+
+def relay(rfile, wfile, stdin, stdout, stderr):
+    """Relay the input and output of a command run by the daemon
+
+    :param rfile: the socket file opened for reading
+    :type rfile: file
+
+    :param wfile: the socket file opened for writing
+    :type wfile: file
+
+    :param stdin: binary stream forwarded to the command
+    :type stdin: file
+
+    :param stdout: binary stream the output is written to
+    :type stdout: file
+
+    :param stderr: binary stream the errors are written to
+    :type stderr: file
+
+    :returns: the exit code of the command
+    :rtype: int
+    """
+    while True:
+        msg = receive(rfile)
+        if msg is None:
+            stderr.write(b"Error: lost connection to the pureport daemon\n")
+            stderr.flush()
+            return 1
+        if 'exit' in msg:
+            return msg['exit']
+        for name, stream in (('stdout', stdout), ('stderr', stderr)):
+            if name in msg:
+                stream.write(base64.b64decode(msg[name]))
+                stream.flush()
+        if msg.get('stdin'):
+            thread = threading.Thread(target=_send_stdin, args=(stdin, wfile))
+            thread.daemon = True
+            thread.start()
+
+
+def forward(args, stdin=None, stdout=None, stderr=None):
+    """Run a command with the daemon, if there is one
+
+    :param args: the command line arguments
+    :type args: list
+
+    :param stdin: binary stream forwarded to the command, defaults
+        to stdin
+    :type stdin: file
+
+    :param stdout: binary stream the output is written to, defaults
+        to stdout
+    :type stdout: file
+
+    :param stderr: binary stream the errors are written to, defaults
+        to stderr
+    :type stderr: file
+
+    :returns: the exit code of the command or None if the command was
+        not run by the daemon
+    :rtype: int
+    """
+    sock = connect_daemon(args)
+    if sock is None:
+        return None
+
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+    stderr = stderr or sys.stderr.buffer
+
+    with sock, sock.makefile('rb') as rfile, sock.makefile('wb') as wfile:
+        send(wfile, argv=list(args), cwd=os.getcwd(),
+             env=dict((k, v) for k, v in os.environ.items() if k.startswith(ENV_PREFIX)),
+             tty=[stdout.isatty(), stderr.isatty()])
+
+        msg = receive(rfile)
+        if not msg or not msg.get('started'):
+            log.debug("daemon refused command: {}".format((msg or {}).get('error')))
+            return None
+
+        return relay(rfile, wfile, stdin, stdout, stderr)
@@ -6,8 +6,14 @@
 from __future__ import absolute_import
 
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from contextvars import (
+    ContextVar,
+    copy_context
+)
 from json import dumps as json_dumps
-from yaml import dump as yaml_dumps
 
 from pureport_client.column_printer import print_columns as column_dumps
 
@@ -17,11 +23,14 @@ from datetime import (
     datetime
 )
 
-from pureport import models
 from pureport_client.column_settings import column_settings
 
 SERVER_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
 
+# the function `retry` sleeps with, replaced by `pureport_client.aio`
+# so retries don't block the event loop
+sleeper = ContextVar('pureport_sleeper', default=None)
+
 
 def format_date(value):
     """Formats a datetime, date or string as an ISO-8601 string
@@ -97,7 +106,7 @@ def retry(exception, tries=10, delay=1, backoff=2, max_delay=30):
                 try:
                     return f(*args, **kwargs)
                 except exception:
-                    time.sleep(min(m_delay, max_delay))
+                    (sleeper.get() or time.sleep)(min(m_delay, max_delay))
                     m_tries -= 1
                     m_delay *= backoff
             return f(*args, **kwargs)
@@ -110,22 +119,129 @@ def paginate(client_fun, *args, **kwargs):
     Given a client function that supports the page_size and page_number
     keyword arguments for pagination, this generator will yield all results
     from that function.
+
+    Takes the `parallel` and `concurrency` keyword arguments of
+    :func:`paginate_pages`.
+
     :param function client_fun:
     :rtype: Iterator
     """
+    with closing(paginate_pages(client_fun, *args, **kwargs)) as pages:
+        for resp in pages:
+            yield from resp['content']
+
+
+def paginate_pages(client_fun, *args, parallel=1, concurrency=None, **kwargs):
+    """Yield every page of a paginated client function
+
+    The first page gives the number of pages, so when `parallel` is more
+    than 1 the remaining pages are requested by a pool of worker threads
+    as soon as it arrives, see :func:`fan_out`.  Pages are still yielded
+    in order and the pages that haven't been requested yet are cancelled
+    if the generator is closed early.
+
+    :param client_fun: a function that supports the page_size and
+        page_number keyword arguments
+    :type client_fun: function
+
+    :param parallel: the maximum number of pages requested at the same
+        time
+    :type parallel: int
+
+    :param concurrency: adjusts the number of pages requested at the
+        same time while requests are throttled
+    :type concurrency: `pureport_client.ratelimit.AdaptiveConcurrency`
+
+    :returns: a generator of the responses
+    :rtype: generator
+    """
     resp = client_fun(*args, **kwargs)
-    yield from resp['content']
+    yield resp
     total_elements = resp['totalElements']
     page_size = resp['pageSize']
     page_number = resp['pageNumber'] + 1
     if 'page_number' in kwargs:
         kwargs.pop('page_number')
+    if not page_size:
+        return
+
+    if parallel > 1:
+        def fetch(number):
+            return client_fun(*args, page_number=number, **kwargs)
+
+        pages = range(page_number, -(-total_elements // page_size))
+        for _, resp, exc in fan_out(fetch, pages, parallel=parallel, concurrency=concurrency):
+            if exc is not None:
+                raise exc
+            yield resp
+        return
+
     while page_number * page_size < total_elements:
         resp = client_fun(*args, page_number=page_number, **kwargs)
-        yield from resp['content']
+        yield resp
         page_number = resp['pageNumber'] + 1
 
 
+def fan_out(func, items, parallel=1, concurrency=None):
+    """Call a function for each item using a pool of worker threads
+
+    Up to `parallel` calls run at the same time and only a bounded number
+    of items are read ahead, so `items` can be a stream.  Each call runs
+    with a copy of the caller's context variables.
+
+    :param func: the function, called with an item
+    :type func: function
+
+    :param items: the items
+    :type items: iterable
+
+    :param parallel: the maximum number of calls run at the same time
+    :type parallel: int
+
+    :param concurrency: adjusts the number of calls run at the same
+        time, up to `parallel`
+    :type concurrency: `pureport_client.ratelimit.AdaptiveConcurrency`
+
+    :returns: a generator of item, result, exception tuples in the order
+        of the items, exception is None if the call succeeded
+    :rtype: generator
+    """
+    pending = deque()
+    items = iter(items)
+
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        done = False
+        try:
+            while True:
+                while not done and len(pending) < parallel * 2:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        done = True
+                        break
+                    if concurrency is None:
+                        future = executor.submit(copy_context().run, func, item)
+                    else:
+                        future = executor.submit(copy_context().run, concurrency.run, func, item)
+                    pending.append((item, future))
+
+                if not pending:
+                    break
+
+                item, future = pending.popleft()
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    yield item, None, exc
+                else:
+                    yield item, result, None
+        finally:
+            # the calls that haven't started are not run if the
+            # generator is closed early
+            for _, future in pending:
+                future.cancel()
+
+
 def format_output(response, response_format):
     """Formats the output of the response object into the specified format option
 
@@ -156,10 +272,14 @@ def format_output(response, response_format):
         elif response_format == 'json':
             return json_dumps(response)
         elif response_format == 'yaml':
+            from yaml import dump as yaml_dumps
             return yaml_dumps(response)
 
 
 def contains_model_object(response):
+    # model classes are generated into `pureport.models`, see
+    # `pureport_client.bindings`
+    from pureport import models
     if hasattr(models, type(response).__name__):
         return True
     if isinstance(response, list) and len(response) > 0 and hasattr(models, type(response[0]).__name__):
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The manifest module persists a description of the complete command tree
+to the per-user cache so the CLI can be constructed without importing or
+introspecting the command modules.
+
+The manifest records the name, help text and click parameters of every
+group and command along with a reference to the function that implements
+it.  When a command is invoked, only the modules required to run it are
+imported.  The manifest is keyed on the installed version of
+pureport-client and the installed plugins and is rebuilt whenever
+either of them change.
+"""
+
+from __future__ import absolute_import
+
+import os
+import json
+import inspect
+import hashlib
+import importlib
+
+from functools import partial
+from logging import getLogger
+
+from click import (
+    Argument,
+    Choice,
+    Command,
+    File,
+    IntRange,
+    Option,
+    Path,
+    pass_context,
+    pass_obj,
+    BOOL,
+    FLOAT,
+    INT,
+    STRING,
+    UUID
+)
+
+try:
+    from click.core import UNSET
+except ImportError:
+    UNSET = None
+
+import pureport_client
+
+from pureport_client import cache
+from pureport_client.util import (
+    create_print_wrapper,
+    LazyGroup,
+    JSON
+)
+
+log = getLogger(__name__)
+
+MANIFEST_FILENAME = 'manifest.json'
+
+MANIFEST_VERSION = 2
+
+PARAM_TYPES = {
+    'STRING': STRING,
+    'INT': INT,
+    'FLOAT': FLOAT,
+    'BOOL': BOOL,
+    'UUID': UUID,
+    'JSON': JSON
+}
+
+# the arguments of `click.Path` saved in the manifest
+PATH_ATTRIBUTES = ('exists', 'file_okay', 'dir_okay', 'writable', 'readable', 'resolve_path', 'allow_dash')
+
+
+def cache_key(entry_points):
+    """Returns the key used to validate the cached manifest
+
+    :param entry_points: the installed plugin entry points
+    :type entry_points: list
+
+    :returns: a hash of the package version, sources and plugins
+    :rtype: str
+    """
+    key = json.dumps([MANIFEST_VERSION,
+                      pureport_client.__version__,
+                      os.path.dirname(pureport_client.__file__),
+                      cache.source_stamp(os.path.dirname(pureport_client.__file__)),
+                      sorted(str(item) for item in entry_points)])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def resolve(ref):
+    """Resolve a reference to the function that implements a command
+
+    :param ref: a reference in the form `module:qualname`
+    :type ref: str
+
+    :returns: the referenced object
+    :rtype: object
+    """
+    name, qualname = ref.split(':')
+    obj = importlib.import_module(name)
+    for attr in qualname.split('.'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def dump_type(obj):
+    if isinstance(obj, Choice):
+        return {'choices': list(obj.choices), 'case_sensitive': obj.case_sensitive}
+    if isinstance(obj, File):
+        return {'file': obj.mode}
+    if isinstance(obj, IntRange):
+        return {'int_range': [obj.min, obj.max]}
+    if isinstance(obj, Path):
+        return {'path': dict((name, getattr(obj, name)) for name in PATH_ATTRIBUTES)}
+    for name, value in PARAM_TYPES.items():
+        if type(obj) is type(value):
+            return name
+    raise ValueError("unsupported parameter type {!r}".format(obj))
+
+
+def load_type(value):
+    if isinstance(value, dict) and 'file' in value:
+        return File(value['file'])
+    if isinstance(value, dict) and 'int_range' in value:
+        return IntRange(*value['int_range'])
+    if isinstance(value, dict) and 'path' in value:
+        return Path(**value['path'])
+    if isinstance(value, dict):
+        return Choice(value['choices'], case_sensitive=value['case_sensitive'])
+    return PARAM_TYPES[value]
+
+
+def dump_param(param):
+    """Serialize a click parameter
+
+    :param param: the parameter to serialize
+    :type param: `click.Parameter`
+
+    :returns: the serialized parameter
+    :rtype: dict
+
+    :raises: ValueError
+    """
+    data = {
+        'param_type': param.param_type_name,
+        'name': param.name,
+        'opts': param.opts,
+        'secondary_opts': param.secondary_opts,
+        'type': dump_type(param.type),
+        'required': param.required,
+        'multiple': param.multiple,
+        'nargs': param.nargs,
+        'envvar': param.envvar
+    }
+
+    if param.default is not None and param.default is not UNSET:
+        if callable(param.default):
+            raise ValueError("unsupported default value for {}".format(param.name))
+        data['default'] = param.default
+
+    if isinstance(param, Option):
+        data.update({
+            'help': param.help,
+            'is_flag': param.is_flag,
+            'hidden': param.hidden,
+            'show_default': bool(param.show_default)
+        })
+
+    json.dumps(data)
+
+    return data
+
+
+def load_param(data):
+    """Construct a click parameter
+
+    :param data: the serialized parameter
+    :type data: dict
+
+    :returns: an instance of click Parameter
+    :rtype: `click.Parameter`
+    """
+    kwargs = {'required': data['required'], 'envvar': data['envvar']}
+
+    if 'default' in data:
+        kwargs['default'] = data['default']
+
+    if data['param_type'] == 'option':
+        decls = [data['name']] + data['opts']
+        if data['secondary_opts']:
+            decls[-1] = '/'.join([decls[-1]] + data['secondary_opts'])
+        if data['is_flag']:
+            kwargs['is_flag'] = True
+        else:
+            kwargs['type'] = load_type(data['type'])
+        return Option(decls, multiple=data['multiple'], help=data['help'], hidden=data['hidden'],
+                      show_default=data.get('show_default', False), **kwargs)
+
+    return Argument([data['name']], type=load_type(data['type']), nargs=data['nargs'], **kwargs)
+
+
+def dump(cmd):
+    """Serialize a command tree created by `pureport_client.util`
+
+    Any lazy groups in the command tree are loaded in order to serialize
+    their commands.
+
+    :param cmd: the command or group to serialize
+    :type cmd: `click.Command`
+
+    :returns: the serialized command
+    :rtype: dict
+
+    :raises: ValueError
+    """
+    ref = '{}:{}'.format(cmd.callback.__module__, cmd.callback.__qualname__)
+
+    if resolve(ref) is None:
+        raise ValueError("unable to resolve command {}".format(cmd.name))
+
+    data = {
+        'name': cmd.name,
+        'ref': ref,
+        'help': inspect.cleandoc(cmd.help or '').split('\f')[0].rstrip(),
+        'short_help': cmd.short_help,
+        'params': [dump_param(p) for p in cmd.params]
+    }
+
+    if hasattr(cmd, 'commands'):
+        data['commands'] = [dump(cmd.get_command(None, name)) for name in cmd.list_commands(None)]
+
+    return data
+
+
+def construct(data):
+    """Construct a click command from the manifest
+
+    The modules that implement the command are not imported until the
+    command is invoked.  The commands of a group are constructed the first
+    time the group is resolved.
+
+    :param data: the serialized command
+    :type data: dict
+
+    :returns: an instance of click Command
+    :rtype: `click.Command`
+    """
+    kwargs = {
+        'params': [load_param(p) for p in data['params']],
+        'help': data['help'],
+        'short_help': data['short_help']
+    }
+
+    if 'commands' in data:
+        @pass_obj
+        @pass_context
+        def new_func(ctx, obj, *args, **kwargs):
+            ctx.obj = resolve(data['ref'])(obj, *args, **kwargs)
+
+        lazy_commands = dict((c['name'], partial(construct, c)) for c in data['commands'])
+        return LazyGroup(data['name'], callback=new_func, lazy_commands=lazy_commands, **kwargs)
+
+    @pass_obj
+    def new_func(obj, *args, **kwargs):
+        return create_print_wrapper(resolve(data['ref']))(obj, *args, **kwargs)
+
+    return Command(data['name'], callback=new_func, **kwargs)
+
+
+def read(entry_points):
+    """Read the command manifest from the cache
+
+    :param entry_points: the installed plugin entry points
+    :type entry_points: list
+
+    :returns: a list of name, loader tuples or None if the manifest is
+        missing or out of date
+    :rtype: list
+    """
+    manifest = cache.read_json(MANIFEST_FILENAME)
+    if not manifest or manifest.get('key') != cache_key(entry_points):
+        log.debug("command manifest is missing or out of date")
+        return None
+    return [(c['name'], partial(construct, c)) for c in manifest['commands']]
+
+
+def write(entry_points, commands):
+    """Build the command manifest and write it to the cache
+
+    This will load every command in the tree.
+
+    :param entry_points: the installed plugin entry points
+    :type entry_points: list
+
+    :param commands: a list of name, loader tuples
+    :type commands: list
+
+    :returns: a list of name, loader tuples constructed from the manifest
+        or None if the manifest could not be built
+    :rtype: list
+    """
+    try:
+        data = list()
+        for name, loader in commands:
+            item = dump(loader())
+            item['name'] = name
+            data.append(item)
+    except (ValueError, AttributeError, ImportError) as exc:
+        log.debug("unable to build command manifest: {}".format(exc))
+        return None
+
+    manifest = {'key': cache_key(entry_points), 'commands': data}
+
+    if not cache.write_json(MANIFEST_FILENAME, manifest):
+        return None
+
+    return [(c['name'], partial(construct, c)) for c in data]
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The models module provides access to the Pureport API models.
+
+Models are generated the first time they are used instead of all at once
+when the API session is created.  The generated classes are the same
+classes found in `pureport.models`.
+
+Command modules import this module, so the `pureport` modules are only
+imported once a model is used to keep the CLI startup time low.
+"""
+
+from __future__ import absolute_import
+
+
+def load(clsname, data):
+    """Serialize data to an instance of a model
+
+    :param clsname: the name of the model to create
+    :type clsname: str
+
+    :param data: key value data to load
+    :type data: dict
+
+    :returns: an instance of the model
+    :rtype: `pureport.models.Base`
+    """
+    from pureport import models
+    from pureport_client import bindings
+    bindings.make_model(clsname)
+    return models.load(clsname, data)
+
+
+def dump(obj):
+    """Deserialize a model to a Python dict
+
+    :param obj: an instance of a model
+    :type obj: `pureport.models.Base`
+
+    :returns: a Python dict object with camel case keys
+    :rtype: dict
+    """
+    from pureport import models
+    return models.dump(obj)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The plugins module discovers the installed pureport-client plugins.
+
+Plugins register an entry point in the `pureport_client.plugins` group.
+Scanning the installed distributions for entry points is expensive in
+large environments so the discovered entry points are saved to the
+per-user cache along with the modification times of the directories on
+`sys.path`.  The cache is invalidated as soon as any of those directories
+change, which happens whenever a distribution is installed or removed.
+
+Plugin loading can be disabled entirely by setting the
+`PUREPORT_NO_PLUGINS` environment variable.
+"""
+
+from __future__ import absolute_import
+
+import os
+import sys
+import importlib
+
+from collections import namedtuple
+from logging import getLogger
+
+from pureport_client import cache
+
+log = getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'pureport_client.plugins'
+
+PLUGINS_FILENAME = 'plugins.json'
+
+
+class EntryPoint(namedtuple('EntryPoint', ('name', 'value'))):
+    """A plugin entry point in the form `name = module:attr`
+    """
+
+    def __str__(self):
+        return '{} = {}'.format(self.name, self.value)
+
+    def load(self):
+        """Import the entry point and return the referenced object
+
+        :returns: the referenced object
+        :rtype: object
+        """
+        name, _, attrs = self.value.partition(':')
+        obj = importlib.import_module(name.strip())
+        for attr in filter(None, attrs.strip().split('.')):
+            obj = getattr(obj, attr)
+        return obj
+
+
+def search_paths():
+    """Returns the modification times of the directories on `sys.path`
+
+    :returns: a mapping of path to modification time in nanoseconds
+    :rtype: dict
+    """
+    paths = {}
+    for path in sys.path:
+        try:
+            paths[path or os.curdir] = os.stat(path or os.curdir).st_mtime_ns
+        except OSError:
+            pass
+    return paths
+
+
+def scan():
+    """Scan the installed distributions for plugin entry points
+
+    :returns: a list of entry points
+    :rtype: list
+    """
+    try:
+        from importlib import metadata
+    except ImportError:
+        # Python < 3.8
+        from pkg_resources import iter_entry_points
+        return [EntryPoint(item.name, str(item).partition('=')[2].strip())
+                for item in iter_entry_points(ENTRY_POINT_GROUP)]
+
+    entry_points = metadata.entry_points()
+
+    if hasattr(entry_points, 'select'):
+        items = entry_points.select(group=ENTRY_POINT_GROUP)
+    else:
+        items = entry_points.get(ENTRY_POINT_GROUP, ())
+
+    return sorted(set(EntryPoint(item.name, item.value) for item in items))
+
+
+def entry_points():
+    """Returns the installed plugin entry points
+
+    The entry points are loaded from the cache if none of the directories
+    on `sys.path` have changed since they were last discovered.
+
+    :returns: a list of entry points
+    :rtype: list
+    """
+    if os.getenv('PUREPORT_NO_PLUGINS'):
+        log.debug("plugin loading is disabled")
+        return []
+
+    paths = search_paths()
+
+    data = cache.read_json(PLUGINS_FILENAME)
+    if data and data.get('paths') == paths:
+        return [EntryPoint(*item) for item in data['entry_points']]
+
+    log.debug("scanning installed distributions for plugins")
+    items = scan()
+
+    cache.write_json(PLUGINS_FILENAME, {'paths': paths, 'entry_points': items})
+
+    return items
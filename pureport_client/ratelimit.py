@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The ratelimit module keeps the requests sent to the Pureport API within
+the limits of the API.
+
+:class:`RateLimiter` is used by `pureport_client.session.Session` for
+every request.  If a rate is configured, each request takes a token from
+a :class:`TokenBucket` that refills at that many tokens per second and
+holds up to `burst` tokens.  The bucket of a profile is shared by the
+threads of a process and, through a lock file in the cache directory, by
+every process using the same profile, so concurrent invocations of the
+CLI don't add up to more than the configured rate.
+
+Requests that are throttled by the API, with a 429 or 503 status, are
+retried after the time given by the `Retry-After` header or an
+exponential backoff if there isn't one.  All requests using the limiter
+wait until then, not just the throttled one.  A 503 response is only
+retried if the request is idempotent according to the policy of its
+route, see `pureport_client.routes.RouteRegistry.policy`.
+
+The rate is set with the `--rate-limit` and `--rate-burst` options or the
+`rate_limit` and `rate_burst` values of the profile in the credentials
+file.
+
+Commands that send many requests at the same time, see
+`pureport_client.helpers.fan_out`, adjust their concurrency with
+:class:`AdaptiveConcurrency`, which backs off when requests are throttled
+or slow down and slowly increases the concurrency again otherwise.
+"""
+
+from __future__ import absolute_import
+
+import os
+import re
+import math
+import time
+import threading
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from logging import getLogger
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from pureport_client import (
+    cache,
+    helpers
+)
+
+log = getLogger(__name__)
+
+RATELIMIT_DIR = 'ratelimit'
+
+# the response statuses of throttled requests
+RETRY_STATUSES = (429, 503)
+
+DEFAULT_MAX_RETRIES = 5
+
+# the exponential backoff used when a response has no Retry-After header
+BACKOFF_DELAY = 1
+
+MAX_BACKOFF_DELAY = 30
+
+# the concurrency controller of the calling thread, see
+# `AdaptiveConcurrency.run`
+_concurrency = ContextVar('pureport_concurrency', default=None)
+
+_started = ContextVar('pureport_concurrency_started', default=0)
+
+
+def sleep(seconds):
+    (helpers.sleeper.get() or time.sleep)(seconds)
+
+
+def retry_after(headers, now=None):
+    """Returns the delay requested by the `Retry-After` header
+
+    :param headers: the response headers
+    :type headers: dict
+
+    :param now: the current time, defaults to now
+    :type now: float
+
+    :returns: the delay in seconds or None if the header is missing or
+        invalid
+    :rtype: float
+    """
+    value = None
+    for name, item in (headers or {}).items():
+        if name.lower() == 'retry-after':
+            value = item.strip()
+            break
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+class TokenBucket(object):
+    """A token bucket shared by threads and, optionally, processes
+
+    The state of the bucket is kept in memory or, if `path` is set, in a
+    file that is locked while the state is updated.
+    """
+
+    def __init__(self, rate, burst=None, path=None):
+        """Initialize the instance
+
+        :param rate: the number of tokens added per second
+        :type rate: float
+
+        :param burst: the maximum number of tokens, defaults to the rate
+        :type burst: int
+
+        :param path: the path to the state file
+        :type path: str
+        """
+        self.rate = float(rate)
+        self.burst = burst or max(1, int(math.ceil(self.rate)))
+        self.path = path if fcntl is not None else None
+        self._lock = threading.Lock()
+        # the number of tokens, when it was updated and the time
+        # requests are paused until
+        self._state = [float(self.burst), time.time(), 0.0]
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if self.path is None:
+                yield self._state
+                return
+
+            try:
+                os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+                f = os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600), 'r+')
+            except OSError as exc:
+                log.debug("unable to open rate limit file {}: {}".format(self.path, exc))
+                yield self._state
+                return
+
+            with f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    state = [float(item) for item in f.read().split()]
+                except ValueError:
+                    state = []
+                if len(state) != 3:
+                    state = list(self._state)
+
+                yield state
+
+                f.seek(0)
+                f.truncate()
+                f.write(' '.join(repr(item) for item in state))
+                self._state = state
+
+    def take(self):
+        """Take a token from the bucket
+
+        :returns: 0 if a token was taken otherwise the number of seconds
+            to wait before trying again
+        :rtype: float
+        """
+        now = time.time()
+        with self._locked() as state:
+            tokens, updated, paused = state
+            if paused > now:
+                return paused - now
+            tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+            if tokens >= 1:
+                state[:] = [tokens - 1, now, paused]
+                return 0
+            state[:] = [tokens, now, paused]
+            return (1 - tokens) / self.rate
+
+    def paused(self):
+        """Returns the number of seconds the bucket is paused for
+
+        :returns: the number of seconds, 0 if the bucket isn't paused
+        :rtype: float
+        """
+        now = time.time()
+        with self._locked() as state:
+            return max(0.0, state[2] - now)
+
+    def pause(self, seconds):
+        """Don't hand out tokens for a number of seconds
+
+        :param seconds: the number of seconds
+        :type seconds: float
+        """
+        with self._locked() as state:
+            state[2] = max(state[2], time.time() + seconds)
+
+
+class RateLimiter(object):
+    """Limits the rate of requests and retries throttled requests
+    """
+
+    def __init__(self, rate=None, burst=None, profile=None, max_retries=DEFAULT_MAX_RETRIES):
+        """Initialize the instance
+
+        :param rate: the maximum number of requests per second, None or
+            0 for no limit
+        :type rate: float
+
+        :param burst: the number of requests that can be sent at once
+            before the rate applies, defaults to the rate
+        :type burst: int
+
+        :param profile: the profile the limit is shared by, the limit is
+            only shared by the threads of this process if not set
+        :type profile: str
+
+        :param max_retries: the number of times a throttled request is
+            retried
+        :type max_retries: int
+        """
+        path = None
+        if profile is not None:
+            name = '{}.state'.format(re.sub(r'[^\w.-]', '_', profile))
+            path = cache.cache_path('/'.join((RATELIMIT_DIR, name)))
+        self.rate = rate or None
+        self.max_retries = max_retries
+        # without a rate the bucket is only used to pause requests
+        self.bucket = TokenBucket(rate or 1, burst, path if rate else None)
+
+    def wait(self):
+        """Returns the number of seconds to wait before sending a request
+
+        A token is taken from the bucket if the request can be sent now.
+
+        :returns: the number of seconds, 0 if the request can be sent
+        :rtype: float
+        """
+        if self.rate is None:
+            return self.bucket.paused()
+        return self.bucket.take()
+
+    def acquire(self):
+        """Wait until a request can be sent
+        """
+        while True:
+            seconds = self.wait()
+            if not seconds:
+                return
+            sleep(seconds)
+
+    def throttled(self, response, attempt, idempotent=True):
+        """Handle a response to a request that failed
+
+        :param response: the response
+        :type response: `pureport.transport.Response`
+
+        :param attempt: the number of times the request was retried
+        :type attempt: int
+
+        :param idempotent: whether the request can be sent again safely,
+            requests that aren't are only retried if the status is 429
+        :type idempotent: bool
+
+        :returns: None if the request should not be retried otherwise
+            the number of seconds requests are paused for
+        :rtype: float
+        """
+        status = getattr(response, 'status', None)
+        if status not in RETRY_STATUSES or attempt >= self.max_retries:
+            return None
+        if status != 429 and not idempotent:
+            return None
+
+        delay = retry_after(getattr(response, 'headers', None))
+        if delay is None:
+            delay = min(BACKOFF_DELAY * 2 ** attempt, MAX_BACKOFF_DELAY)
+
+        log.debug("request throttled with status {}, pausing for {} seconds".format(response.status, delay))
+        self.bucket.pause(delay)
+
+        concurrency = _concurrency.get()
+        if concurrency is not None:
+            concurrency.throttled()
+
+        return delay
+
+
+class AdaptiveConcurrency(object):
+    """Adjusts the number of calls run at the same time
+
+    The limit is increased by one for every `limit` calls that complete
+    without being throttled and it is halved when a call is throttled.
+    Calls that take more than `tolerance` times as long as the fastest
+    call seen so far also reduce the limit by 10 percent.  The limit is
+    reduced at most once for the calls in flight when it is reduced.
+    """
+
+    def __init__(self, maximum, minimum=1, tolerance=3.0):
+        """Initialize the instance
+
+        :param maximum: the maximum and initial limit
+        :type maximum: int
+
+        :param minimum: the minimum limit
+        :type minimum: int
+
+        :param tolerance: the latency, as a multiple of the lowest
+            latency, above which the limit is reduced
+        :type tolerance: float
+        """
+        self.maximum = maximum
+        self.minimum = minimum
+        self.tolerance = tolerance
+        self.limit = float(maximum)
+        self.baseline = None
+        self._active = 0
+        self._started = 0
+        self._decreased = 0
+        self._condition = threading.Condition()
+
+    def _decrease(self, factor, started):
+        # calls that started before the last decrease don't decrease
+        # the limit again
+        if started < self._decreased:
+            return
+        self.limit = max(self.minimum, self.limit * factor)
+        self._decreased = self._started + 1
+        log.debug("concurrency limit decreased to {}".format(int(self.limit)))
+
+    def throttled(self):
+        """Called when a call running under the controller is throttled
+        """
+        with self._condition:
+            self._decrease(0.5, _started.get())
+
+    def run(self, func, *args, **kwargs):
+        """Run a function once the number of calls in flight is below
+        the limit
+
+        :param func: the function
+        :type func: function
+
+        :returns: the result of the function
+        :rtype: object
+        """
+        with self._condition:
+            while self._active >= int(self.limit):
+                self._condition.wait()
+            self._active += 1
+            self._started += 1
+            started = self._started
+
+        token = _concurrency.set(self)
+        started_token = _started.set(started)
+        begin = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            latency = time.monotonic() - begin
+            _started.reset(started_token)
+            _concurrency.reset(token)
+            with self._condition:
+                self._active -= 1
+                if self.baseline is None or latency < self.baseline:
+                    self.baseline = latency
+                # calls that take a few milliseconds are too noisy to
+                # compare with the baseline
+                if latency > self.baseline * self.tolerance and latency > 0.01:
+                    self._decrease(0.9, started)
+                elif self._decreased <= started:
+                    self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                self._condition.notify_all()
@@ -0,0 +1,651 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The response_cache module caches the responses of the API endpoints that
+return reference data, such as the facilities, locations and cloud
+regions, which rarely changes.
+
+Responses are cached by :class:`pureport_client.session.Session` for
+the typed functions, such as `find_facilities`, and for the requests sent
+by :class:`pureport_client.commands.CommandBase` alike.  The cache has two
+layers, a memory layer shared by the commands run by one process, for
+instance by `pureport batch`, and a disk layer in the `responses`
+directory of the per-user cache (see `pureport_client.cache`) shared by
+all invocations of the CLI.  A response answered from the cache doesn't
+authorize the session, so a command served entirely from the cache never
+contacts the API.
+
+Each cached endpoint belongs to a class that sets how long its responses
+are kept:
+
+* `reference` cloud regions, cloud services, facilities and locations,
+  kept for a day
+* `options` the enumerations returned by `/options`, kept for a day
+* `supported` supported connections and the supported ports of an
+  account, kept for an hour
+
+The time to live of a class, in seconds, can be changed by setting the
+`PUREPORT_CACHE_TTL_<CLASS>` environment variable, for instance
+`PUREPORT_CACHE_TTL_REFERENCE`, and is disabled by setting it to 0.
+
+The responses to all other GET requests that include an `ETag` or
+`Last-Modified` header are saved by :class:`ValidatorCache` along with
+the validators.  The next request for the same URL is sent as a
+conditional request with the `If-None-Match` and `If-Modified-Since`
+headers and when the server replies `304 Not Modified` the saved body is
+returned instead, so unchanged documents are not downloaded again.  At most
+`VALIDATORS_SIZE` of these responses are kept on disk, the least recently
+used are removed first.
+
+The `--no-cache` option of the CLI bypasses the cache and `--refresh`
+ignores cached responses but saves the new ones.  Conditional requests are
+always validated by the server so `--refresh` does not affect them.
+"""
+
+from __future__ import absolute_import
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+from collections import (
+    Counter,
+    OrderedDict
+)
+from contextvars import ContextVar
+from logging import getLogger
+from urllib.parse import urlparse
+
+from click import (
+    echo,
+    group,
+    option
+)
+
+from pureport_client import cache
+
+log = getLogger(__name__)
+
+RESPONSES_DIR = 'responses'
+
+VALIDATORS_DIR = 'validators'
+
+# the cache modes, set by the `--no-cache` and `--refresh` options
+MODE_ON = 'on'
+MODE_REFRESH = 'refresh'
+MODE_OFF = 'off'
+
+# the time to live, in seconds, of the responses in each class
+TTLS = OrderedDict((
+    ('reference', 86400),
+    ('options', 86400),
+    ('supported', 3600),
+))
+
+# the paths of the cached endpoints and their classes
+ENDPOINTS = (
+    (re.compile(r'/cloudRegions(/[^/]+)?'), 'reference'),
+    (re.compile(r'/cloudServices(/[^/]+)?'), 'reference'),
+    (re.compile(r'/facilities(/[^/]+)?'), 'reference'),
+    (re.compile(r'/locations(/[^/]+)?'), 'reference'),
+    (re.compile(r'/options'), 'options'),
+    (re.compile(r'/supportedConnections/[^/]+'), 'supported'),
+    (re.compile(r'/accounts/[^/]+/supportedPorts'), 'supported'),
+)
+
+# the number of responses kept in the memory layer
+MEMORY_SIZE = 256
+
+# the number of responses saved for conditional requests, the least
+# recently used are removed from the disk layer
+VALIDATORS_SIZE = 1000
+
+_mode = ContextVar('pureport_response_cache_mode', default=MODE_ON)
+
+# the memory layers, shared by all sessions of the process
+_memory = OrderedDict()
+
+_validators = OrderedDict()
+
+_memory_lock = threading.Lock()
+
+# requests answered by this process, see `pureport cache stats`
+counters = Counter()
+
+_counters_lock = threading.Lock()
+
+
+def count(name):
+    with _counters_lock:
+        counters[name] += 1
+
+
+def get_mode():
+    return _mode.get()
+
+
+def set_mode(mode):
+    """Sets the cache mode for the current command
+
+    The mode is kept in a context variable so commands run concurrently
+    by one process each use their own mode.
+
+    :param mode: one of `MODE_ON`, `MODE_REFRESH` or `MODE_OFF`
+    :type mode: str
+
+    :returns: a token that restores the previous mode when passed to
+        :func:`reset_mode`
+    :rtype: `contextvars.Token`
+    """
+    return _mode.set(mode)
+
+
+def reset_mode(token):
+    _mode.reset(token)
+
+
+def ttl(name):
+    """Returns the time to live of a class of responses
+
+    :param name: the name of the class
+    :type name: str
+
+    :returns: the time to live in seconds
+    :rtype: int
+    """
+    value = os.getenv('PUREPORT_CACHE_TTL_{}'.format(name.upper()))
+    if value:
+        try:
+            return max(int(value), 0)
+        except ValueError:
+            log.debug("invalid time to live for {}: {}".format(name, value))
+    return TTLS[name]
+
+
+def endpoint_class(url):
+    """Returns the class of a cached endpoint
+
+    :param url: the request URL
+    :type url: str
+
+    :returns: the name of the class or None if the endpoint isn't cached
+    :rtype: str
+    """
+    path = urlparse(url).path.rstrip('/')
+    for pattern, name in ENDPOINTS:
+        if pattern.fullmatch(path):
+            return name
+    return None
+
+
+def entry_name(key, directory=RESPONSES_DIR):
+    return '/'.join((directory, '{}.json'.format(key)))
+
+
+def request_key(base_url, scope, url, query=None, body=None):
+    """Returns the key of a GET request
+
+    :param base_url: the base URL of the API
+    :type base_url: str
+
+    :param scope: identifies the credentials of the request
+    :type scope: str
+
+    :param url: the request URL
+    :type url: str
+
+    :param query: the query string parameters
+    :type query: dict
+
+    :param body: the request body
+    :type body: str
+
+    :returns: the key
+    :rtype: str
+    """
+    data = json.dumps([base_url, scope, url, query or {}, body or None],
+                      sort_keys=True, default=list)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def remember(layer, key, entry):
+    """Adds an entry to a memory layer
+
+    The least recently used entries are dropped from the layer once it
+    holds more than `MEMORY_SIZE` entries.
+    """
+    with _memory_lock:
+        layer[key] = entry
+        layer.move_to_end(key)
+        while len(layer) > MEMORY_SIZE:
+            layer.popitem(last=False)
+
+
+def header(headers, name):
+    """Returns the value of an HTTP header ignoring the case of its name
+    """
+    for key, value in (headers or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def make_entry(url, response, **kwargs):
+    """Returns the cache entry for a response
+
+    :param url: the request URL
+    :type url: str
+
+    :param response: the response
+    :type response: `pureport.transport.Response`
+
+    :returns: the entry or None if the response body isn't text
+    :rtype: dict
+    """
+    try:
+        data = response.data.decode('utf-8')
+    except (AttributeError, UnicodeDecodeError):
+        return None
+    entry = {
+        'url': url,
+        'stored': time.time(),
+        'status': response.status,
+        'headers': dict(response.headers or {}),
+        'data': data
+    }
+    entry.update(kwargs)
+    return entry
+
+
+class CachedResponse(object):
+    """A response answered from the cache
+
+    Provides the same interface as `pureport.transport.Response`.
+    """
+
+    def __init__(self, entry):
+        self.status = entry['status']
+        self.headers = entry['headers']
+        self.data = entry['data'].encode('utf-8')
+
+    @property
+    def json(self):
+        return json.loads(self.data) if self.data else None
+
+
+class ResponseCache(object):
+    """Caches responses in memory and on disk
+    """
+
+    def __init__(self, base_url, scope=None):
+        """Initialize the instance
+
+        :param base_url: the base URL of the API
+        :type base_url: str
+
+        :param scope: identifies the credentials the responses are
+            cached for, for instance the API key
+        :type scope: str
+        """
+        self.base_url = base_url
+        self.scope = scope
+
+    def key(self, url, query=None, body=None):
+        """Returns the key of the response to a GET request
+
+        :param url: the request URL
+        :type url: str
+
+        :param query: the query string parameters
+        :type query: dict
+
+        :param body: the request body
+        :type body: str
+
+        :returns: the key
+        :rtype: str
+        """
+        return request_key(self.base_url, self.scope, url, query, body)
+
+    def get(self, method, url, query=None, body=None):
+        """Returns the cached response to a request
+
+        :param method: the HTTP method
+        :type method: str
+
+        :param url: the request URL
+        :type url: str
+
+        :param query: the query string parameters
+        :type query: dict
+
+        :param body: the request body
+        :type body: str
+
+        :returns: the cached response or None if the request is not
+            cached
+        :rtype: `CachedResponse`
+        """
+        if method.upper() != 'GET' or get_mode() != MODE_ON:
+            return None
+
+        name = endpoint_class(url)
+        if name is None or not ttl(name):
+            return None
+
+        key = self.key(url, query, body)
+        now = time.time()
+
+        with _memory_lock:
+            entry = _memory.get(key)
+        if entry is not None and entry['expires'] > now:
+            count('memory_hits')
+            log.debug("response to {} answered from memory".format(url))
+            return CachedResponse(entry)
+
+        entry = cache.read_json(entry_name(key))
+        if entry is not None and entry.get('expires', 0) > now:
+            remember(_memory, key, entry)
+            count('disk_hits')
+            log.debug("response to {} answered from disk".format(url))
+            return CachedResponse(entry)
+
+        count('misses')
+        return None
+
+    def put(self, method, url, response, query=None, body=None):
+        """Saves the response to a request
+
+        Only successful responses from the cached endpoints are saved.
+
+        :param method: the HTTP method
+        :type method: str
+
+        :param url: the request URL
+        :type url: str
+
+        :param response: the response
+        :type response: `pureport.transport.Response`
+
+        :param query: the query string parameters
+        :type query: dict
+
+        :param body: the request body
+        :type body: str
+
+        :returns: True if the response was saved otherwise False
+        :rtype: bool
+        """
+        if method.upper() != 'GET' or get_mode() == MODE_OFF or response.status != 200:
+            return False
+
+        name = endpoint_class(url)
+        if name is None or not ttl(name):
+            return False
+
+        entry = make_entry(url, response, expires=time.time() + ttl(name))
+        if entry is None:
+            return False
+        entry['class'] = name
+
+        key = self.key(url, query, body)
+        remember(_memory, key, entry)
+        count('stores')
+
+        if cache.writable():
+            return cache.write_json(entry_name(key), entry)
+        return False
+
+
+class ValidatorCache(object):
+    """Saves responses with validators for conditional requests
+    """
+
+    def __init__(self, base_url, scope=None):
+        """Initialize the instance
+
+        :param base_url: the base URL of the API
+        :type base_url: str
+
+        :param scope: identifies the credentials the responses are
+            saved for, for instance the API key
+        :type scope: str
+        """
+        self.base_url = base_url
+        self.scope = scope
+
+    def get(self, method, url, headers=None, query=None, body=None):
+        """Returns the saved response to a GET request
+
+        Nothing is returned if the request already is a conditional
+        request, the caller is expected to handle the response itself.
+
+        :param method: the HTTP method
+        :type method: str
+
+        :param url: the request URL
+        :type url: str
+
+        :param headers: the request headers
+        :type headers: dict
+
+        :param query: the query string parameters
+        :type query: dict
+
+        :param body: the request body
+        :type body: str
+
+        :returns: the saved entry or None
+        :rtype: dict
+        """
+        if method.upper() != 'GET' or get_mode() == MODE_OFF:
+            return None
+        if header(headers, 'If-None-Match') or header(headers, 'If-Modified-Since'):
+            return None
+
+        key = request_key(self.base_url, self.scope, url, query, body)
+
+        with _memory_lock:
+            entry = _validators.get(key)
+        if entry is None:
+            entry = cache.read_json(entry_name(key, VALIDATORS_DIR))
+            if entry is not None:
+                remember(_validators, key, entry)
+        if entry is not None:
+            # the modification time orders the saved responses by use
+            cache.touch(entry_name(key, VALIDATORS_DIR))
+        return entry
+
+    def put(self, method, url, response, query=None, body=None):
+        """Saves the response to a GET request if it has validators
+
+        :param method: the HTTP method
+        :type method: str
+
+        :param url: the request URL
+        :type url: str
+
+        :param response: the response
+        :type response: `pureport.transport.Response`
+
+        :param query: the query string parameters
+        :type query: dict
+
+        :param body: the request body
+        :type body: str
+
+        :returns: True if the response was saved otherwise False
+        :rtype: bool
+        """
+        if method.upper() != 'GET' or get_mode() == MODE_OFF or response.status != 200:
+            return False
+        if not (header(response.headers, 'ETag') or header(response.headers, 'Last-Modified')):
+            return False
+
+        entry = make_entry(url, response)
+        if entry is None:
+            return False
+
+        key = request_key(self.base_url, self.scope, url, query, body)
+        remember(_validators, key, entry)
+
+        if cache.writable() and cache.write_json(entry_name(key, VALIDATORS_DIR), entry):
+            prune_validators()
+            return True
+        return False
+
+
+def prune_validators(size=None):
+    """Removes the least recently used responses saved for conditional
+    requests from the disk layer
+
+    :param size: the number of responses to keep, defaults to
+        `VALIDATORS_SIZE`
+    :type size: int
+
+    :returns: the number of responses removed
+    :rtype: int
+    """
+    size = VALIDATORS_SIZE if size is None else size
+    path = cache.cache_path(VALIDATORS_DIR)
+    try:
+        names = [name for name in os.listdir(path) if name.endswith('.json') and not name.startswith('.')]
+    except OSError:
+        return 0
+    if len(names) <= size:
+        return 0
+
+    used = {}
+    for name in names:
+        try:
+            used[name] = os.stat(os.path.join(path, name)).st_mtime_ns
+        except OSError:
+            pass
+    stale = sorted(used, key=used.get)[:max(0, len(used) - size)]
+    for name in stale:
+        cache.remove('/'.join((VALIDATORS_DIR, name)))
+    log.debug("removed {} least recently used conditional responses".format(len(stale)))
+    return len(stale)
+
+
+def conditions(entry):
+    """Returns the headers that make a request conditional
+
+    :param entry: the saved response
+    :type entry: dict
+
+    :returns: the request headers
+    :rtype: dict
+    """
+    headers = {}
+    etag = header(entry['headers'], 'ETag')
+    if etag:
+        headers['If-None-Match'] = etag
+    last_modified = header(entry['headers'], 'Last-Modified')
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+
+def entries(directory=RESPONSES_DIR):
+    """Returns the responses saved in the disk layer
+
+    :param directory: the directory in the cache, `RESPONSES_DIR` or
+        `VALIDATORS_DIR`
+    :type directory: str
+
+    :returns: a generator of filename, entry tuples, entry is None if
+        the file can't be read
+    :rtype: generator
+    """
+    try:
+        names = sorted(os.listdir(cache.cache_path(directory)))
+    except OSError:
+        return
+    for name in names:
+        if name.endswith('.json') and not name.startswith('.'):
+            yield name, cache.read_json('/'.join((directory, name)))
+
+
+def clear(expired=False):
+    """Removes responses from the cache
+
+    :param expired: only remove responses that have expired, the
+        responses saved for conditional requests never expire
+    :type expired: bool
+
+    :returns: the number of responses removed
+    :rtype: int
+    """
+    now = time.time()
+
+    with _memory_lock:
+        for key in [key for key, entry in _memory.items() if not expired or entry['expires'] <= now]:
+            del _memory[key]
+
+    removed = 0
+    for name, entry in entries():
+        if expired and entry is not None and entry.get('expires', 0) > now:
+            continue
+        cache.remove('/'.join((RESPONSES_DIR, name)))
+        removed += 1
+
+    if not expired:
+        with _memory_lock:
+            _validators.clear()
+        for name, _ in entries(VALIDATORS_DIR):
+            cache.remove('/'.join((VALIDATORS_DIR, name)))
+            removed += 1
+
+    return removed
+
+
+@group('cache')
+def cache_group():
+    """Manage the cache of API responses
+    """
+
+
+@cache_group.command()
+def stats():
+    """Display the cached responses by class
+    """
+    now = time.time()
+    rows = OrderedDict((name, Counter()) for name in TTLS)
+
+    for name, entry in entries():
+        if entry is None or entry.get('class') not in rows:
+            continue
+        row = rows[entry['class']]
+        row['fresh' if entry.get('expires', 0) > now else 'expired'] += 1
+        row['bytes'] += len(entry.get('data', ''))
+
+    echo('{:<12}{:>8}{:>8}{:>8}{:>12}'.format('class', 'ttl', 'fresh', 'expired', 'bytes'))
+    for name, row in rows.items():
+        echo('{:<12}{:>8}{:>8}{:>8}{:>12}'.format(name, ttl(name), row['fresh'], row['expired'], row['bytes']))
+
+    row = Counter()
+    for name, entry in entries(VALIDATORS_DIR):
+        if entry is not None:
+            row['fresh'] += 1
+            row['bytes'] += len(entry.get('data', ''))
+    echo('{:<12}{:>8}{:>8}{:>8}{:>12}'.format('conditional', '-', row['fresh'], 0, row['bytes']))
+
+    if any(counters.values()):
+        echo("this process: {} memory hits, {} disk hits, {} misses, {} stored, {} not modified, "
+             "{} coalesced".format(counters['memory_hits'], counters['disk_hits'], counters['misses'],
+                                   counters['stores'], counters['not_modified'], counters['coalesced']))
+
+
+@cache_group.command('clear')
+@option('--expired', is_flag=True, help='Only remove expired responses.')
+def clear_command(expired):
+    """Remove cached responses
+    """
+    echo("removed {} cached responses".format(clear(expired)))
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The routes module builds the URLs of requests from the paths of the
+Pureport API and finds the operation a URL belongs to.
+
+Each path template, for instance `/connections/{connectionId}`, is
+compiled once into a :class:`Route` that expands the template with the
+values of its parameters and matches URLs against it.  The routes are
+kept by :data:`registry`, which is loaded with every path in the API spec
+along with the methods and the operation of each path when the spec is
+loaded by `pureport_client.bindings`.  Templates used before the spec is
+loaded are compiled the first time they are used, so building a URL
+never needs the spec.
+
+.. code-block:: python
+
+    from pureport_client.routes import url
+
+    url('/connections/{connectionId}', 'conn-XXXXXXXXXXXXXXXXXXXX')
+
+Policies for an operation, such as whether it can be retried safely, are
+attached to its route with :meth:`RouteRegistry.set_policy` and looked up
+for a request with :meth:`RouteRegistry.policy`.
+"""
+
+from __future__ import absolute_import
+
+import re
+import threading
+
+from urllib.parse import quote
+
+from pureport_client.exceptions import PureportClientError
+
+# the methods that can be retried without changing the result
+IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'))
+
+_param = re.compile(r'{([^}/]+)}')
+
+
+class Route(object):
+    """A compiled path template
+    """
+
+    def __init__(self, template):
+        """Initialize the instance
+
+        :param template: the path template
+        :type template: str
+        """
+        self.template = template
+        parts = _param.split(template)
+        # the literal parts of the template are at even indexes and the
+        # parameter names at odd indexes
+        self.literals = parts[0::2]
+        self.params = tuple(parts[1::2])
+        self.pattern = re.compile('^{}$'.format(''.join(
+            re.escape(item) if i % 2 == 0 else '(?P<p{}>[^/]+)'.format(i // 2)
+            for i, item in enumerate(parts))))
+        # the number of literal segments, routes with more literal
+        # segments are preferred when a URL matches more than one route
+        self.weight = sum(1 for item in template.split('/') if item and not _param.search(item))
+        self.methods = frozenset()
+        self.operations = {}
+        self.policies = {}
+
+    def __repr__(self):
+        return 'Route({!r})'.format(self.template)
+
+    def allows(self, method):
+        """Checks if the API accepts a method for the route
+
+        :param method: the HTTP method
+        :type method: str
+
+        :returns: True if the method is accepted or the methods of the
+            route are not known
+        :rtype: bool
+        """
+        return not self.methods or method.upper() in self.methods
+
+    def expand(self, *args, **kwargs):
+        """Returns the URL for the values of the parameters
+
+        The values are given in the order of the parameters in the
+        template or by name.
+
+        :returns: the URL
+        :rtype: str
+
+        :raises: `pureport_client.exceptions.PureportClientError`
+        """
+        if len(args) + len(kwargs) != len(self.params):
+            raise PureportClientError("{} expects {} parameters".format(self.template, len(self.params)))
+
+        values = list(args)
+        try:
+            values.extend(kwargs[name] for name in self.params[len(args):])
+        except KeyError as exc:
+            raise PureportClientError("missing parameter {} for {}".format(exc, self.template))
+
+        parts = [self.literals[0]]
+        for value, literal in zip(values, self.literals[1:]):
+            parts.append(quote(str(value), safe=''))
+            parts.append(literal)
+        return ''.join(parts)
+
+    def match(self, path):
+        """Match a URL path against the route
+
+        :param path: the URL path
+        :type path: str
+
+        :returns: the values of the parameters by name or None if the
+            path doesn't match
+        :rtype: dict
+        """
+        match = self.pattern.match(path)
+        if match is None:
+            return None
+        return dict(zip(self.params, match.groups()))
+
+
+class RouteRegistry(object):
+    """The routes of an API
+    """
+
+    def __init__(self):
+        self._routes = {}
+        # the routes by number of segments and first segment
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._routes)
+
+    def __contains__(self, template):
+        return template in self._routes
+
+    def route(self, template):
+        """Returns the route for a template
+
+        The route is compiled and added to the registry if it doesn't
+        exist yet.
+
+        :param template: the path template
+        :type template: str
+
+        :returns: the route
+        :rtype: `Route`
+        """
+        route = self._routes.get(template)
+        if route is not None:
+            return route
+
+        with self._lock:
+            route = self._routes.get(template)
+            if route is None:
+                route = Route(template)
+                segments = template.split('/')
+                key = (len(segments), segments[1] if len(segments) > 1 and not _param.search(segments[1]) else None)
+                routes = sorted(self._index.get(key, []) + [route], key=lambda item: -item.weight)
+                self._index[key] = routes
+                self._routes[template] = route
+        return route
+
+    def add(self, template, method=None, operation=None):
+        """Add a route and one of its methods
+
+        :param template: the path template
+        :type template: str
+
+        :param method: a method accepted by the API for the route
+        :type method: str
+
+        :param operation: the ID of the operation for the method
+        :type operation: str
+
+        :returns: the route
+        :rtype: `Route`
+        """
+        route = self.route(template)
+        if method is not None:
+            method = method.upper()
+            route.methods = route.methods | {method}
+            if operation is not None:
+                route.operations[method] = operation
+        return route
+
+    def load_spec(self, spec):
+        """Add the paths of an OpenAPI spec
+
+        :param spec: the OpenAPI spec
+        :type spec: dict
+
+        :returns: None
+        """
+        for template, properties in spec.get('paths', {}).items():
+            for method, attrs in properties.items():
+                if method.upper() in HTTP_METHODS:
+                    self.add(template, method, (attrs or {}).get('operationId'))
+
+    def match(self, path):
+        """Find the route for a URL path
+
+        :param path: the URL path without the query string
+        :type path: str
+
+        :returns: the route and the values of its parameters or None if
+            no route matches
+        :rtype: tuple
+        """
+        segments = path.split('/')
+        candidates = self._index.get((len(segments), segments[1] if len(segments) > 1 else None), [])
+        for route in candidates + self._index.get((len(segments), None), []):
+            params = route.match(path)
+            if params is not None:
+                return route, params
+        return None
+
+    def check(self, method, path):
+        """Checks that the API accepts a method for a URL
+
+        URLs that don't match a known route are not checked.
+
+        :param method: the HTTP method
+        :type method: str
+
+        :param path: the URL path
+        :type path: str
+
+        :returns: None
+
+        :raises: `pureport_client.exceptions.PureportClientError`
+        """
+        found = self.match(path.split('?', 1)[0])
+        if found is not None and not found[0].allows(method):
+            raise PureportClientError("{} is not allowed for {}".format(method.upper(), found[0].template))
+
+    def operation(self, method, path):
+        """Returns the ID of the operation for a request
+
+        :param method: the HTTP method
+        :type method: str
+
+        :param path: the URL path
+        :type path: str
+
+        :returns: the operation ID or None if it is not known
+        :rtype: str
+        """
+        found = self.match(path)
+        if found is None:
+            return None
+        return found[0].operations.get(method.upper())
+
+    def set_policy(self, template, method=None, **policy):
+        """Attach a policy to a route
+
+        For instance, `registry.set_policy('/tasks', 'GET', timeout=5)`.
+
+        :param template: the path template
+        :type template: str
+
+        :param method: the HTTP method, all methods of the route if not
+            set
+        :type method: str
+
+        :returns: None
+        """
+        route = self.route(template)
+        key = method.upper() if method else None
+        route.policies[key] = dict(route.policies.get(key, {}), **policy)
+
+    def policy(self, method, path):
+        """Returns the policy for a request
+
+        The policy is made up of the defaults for the method, the policy
+        attached to all methods of the route and the policy attached to
+        the method of the route, in that order.
+
+        :param method: the HTTP method
+        :type method: str
+
+        :param path: the URL path
+        :type path: str
+
+        :returns: the policy
+        :rtype: dict
+        """
+        method = method.upper()
+        policy = {'idempotent': method in IDEMPOTENT_METHODS}
+        found = self.match(path.split('?', 1)[0])
+        if found is not None:
+            route = found[0]
+            policy.update(route.policies.get(None, {}))
+            policy.update(route.policies.get(method, {}))
+        return policy
+
+
+registry = RouteRegistry()
+
+
+def url(template, *args, **kwargs):
+    """Returns the URL for a path template of the API
+
+    See :meth:`Route.expand`.
+
+    :param template: the path template
+    :type template: str
+
+    :returns: the URL
+    :rtype: str
+    """
+    return registry.route(template).expand(*args, **kwargs)
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The session module provides the Pureport API session used by the CLI.
+
+:class:`Session` extends `pureport.session.Session` so the Python bindings
+for the Pureport API are generated on demand instead of when the session
+is created.  The function for an API operation, for instance
+`find_networks`, and the models it uses are generated the first time the
+function is accessed.  See `pureport_client.bindings` for details.
+
+All requests, including the requests sent by the generated functions,
+are sent through the connection pool configured by
+`pureport_client.transport`.  The session can be shared by threads and
+identical GET requests made at the same time by many threads are sent
+once and share the response.
+
+Responses from the endpoints that return reference data are answered from
+the cache in `pureport_client.response_cache` when possible and other GET
+requests are sent as conditional requests when a response with validators
+was saved.
+
+Requests are timed by `pureport_client.timings` when a timing hook is
+registered.
+
+The session is authorized with the access token saved by
+`pureport_client.tokens` when one is available, so it doesn't need to log
+in again every time the CLI is run.
+"""
+
+from __future__ import absolute_import
+
+import json
+import threading
+
+from logging import getLogger
+from urllib.parse import urljoin
+
+from pureport.exceptions import (
+    PureportHttpError,
+    PureportTransportError
+)
+from pureport.session import Session as BaseSession
+
+from pureport_client import (
+    bindings,
+    ratelimit,
+    response_cache,
+    routes,
+    timings,
+    tokens,
+    transport
+)
+
+log = getLogger(__name__)
+
+
+class Session(BaseSession):
+    """Pureport API session with lazily generated bindings
+    """
+
+    def __init__(self, credentials, base_url=None, options=None, token_cache=None, rate_limiter=None):
+        """Initializes a new instance of `Session`
+
+        :param credentials: credentials object to use to authorize
+            the session with the Pureport API
+        :type credentials: :class:`pureport.credentials.Credentials`
+
+        :param base_url: sets the base URL to use when making requests
+            of the Pureport API
+        :type base_url: str
+
+        :param options: the connection pool options
+        :type options: `pureport_client.transport.TransportOptions`
+
+        :param token_cache: saves the access token between sessions,
+            the session logs in every time it is created if not set
+        :type token_cache: `pureport_client.tokens.TokenCache`
+
+        :param rate_limiter: limits the rate of requests, throttled
+            requests are still retried if not set
+        :type rate_limiter: `pureport_client.ratelimit.RateLimiter`
+
+        :returns: an instance of `Session`
+        :rtype: `pureport_client.session.Session`
+        """
+        super(Session, self).__init__(credentials, base_url)
+        options = options or transport.TransportOptions()
+        self.http = transport.pool_manager(options, headers={'Content-Type': 'application/json'})
+        self._limiter = transport.RequestLimiter(options.max_connections)
+        self._auth_lock = threading.Lock()
+        self._flights = transport.SingleFlight()
+        self.token_cache = token_cache
+        self.rate_limiter = rate_limiter or ratelimit.RateLimiter()
+        scope = getattr(credentials, 'key', None)
+        self.responses = response_cache.ResponseCache(self.base_url, scope)
+        self.validators = response_cache.ValidatorCache(self.base_url, scope)
+        bindings.set_default_session(self)
+
+    def __getattr__(self, name):
+        # only called for attributes that don't exist, such as the
+        # functions for API operations that haven't been bound yet
+        if name.startswith('_'):
+            raise AttributeError(name)
+        func = bindings.bind(self, name)
+        setattr(self, name, func)
+        return func
+
+    def __call__(self, method, url, body=None, headers=None, query=None):
+        # cached responses are returned before the session is authorized
+        resp = self.responses.get(method, url, query=query, body=body)
+        if resp is not None:
+            return resp
+
+        key = transport.flight_key(method, url, body=body, headers=headers, query=query)
+        if key is None:
+            return self._send(method, url, body=body, headers=headers, query=query)
+
+        def send():
+            return transport.SharedResponse(self._send(method, url, body=body, headers=headers, query=query))
+
+        resp, coalesced = self._flights.do(key, send)
+        if coalesced:
+            response_cache.count('coalesced')
+        return resp
+
+    def _send(self, method, url, body=None, headers=None, query=None):
+        saved = None
+        if url != bindings.API_URL:
+            saved = self.validators.get(method, url, headers=headers, query=query, body=body)
+            if saved is not None:
+                headers = dict(headers or {}, **response_cache.conditions(saved))
+
+        idempotent = routes.registry.policy(method, url)['idempotent']
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                with self._limiter.acquire(), timings.measure(method, url) as timing:
+                    resp = self._request(method, url, body=body, headers=headers, query=query)
+                    if timing is not None:
+                        resp = timing.decoded(resp)
+            except PureportHttpError as exc:
+                # throttled requests are retried once the limiter allows it
+                if self.rate_limiter.throttled(exc._response, attempt, idempotent) is None:
+                    raise
+                attempt += 1
+            else:
+                break
+
+        if saved is not None and resp.status == 304:
+            response_cache.count('not_modified')
+            resp = response_cache.CachedResponse(saved)
+        elif url != bindings.API_URL:
+            self.validators.put(method, url, resp, query=query, body=body)
+
+        self.responses.put(method, url, resp, query=query, body=body)
+        return resp
+
+    def _request(self, method, url, body=None, headers=None, query=None):
+        try:
+            return super(Session, self).__call__(method, url, body=body, headers=headers, query=query)
+        except PureportHttpError as exc:
+            if self.token_cache is None or getattr(exc._response, 'status', None) != 401:
+                raise
+        # the saved token is no longer accepted so log in again
+        log.debug("access token rejected, logging in")
+        self.token_cache.remove()
+        self.authorization_header = None
+        return super(Session, self).__call__(method, url, body=body, headers=headers, query=query)
+
+    def authorize(self):
+        """Authorize the session against the Pureport API
+
+        Only one thread authorizes the session at a time.  If the
+        session has a token cache, the saved access token is used until
+        it is due to be refreshed, it is then refreshed with the saved
+        refresh token and the session only logs in with the API key if
+        there is no saved token or it can't be refreshed.
+        """
+        with self._auth_lock:
+            if self.authorized:
+                return
+            if self.token_cache is None:
+                super(Session, self).authorize()
+                return
+
+            entry = self.token_cache.get()
+            if not tokens.usable(entry):
+                if entry is not None and entry.get('refresh_token'):
+                    entry = self.refresh(entry)
+                else:
+                    entry = None
+                if entry is None:
+                    entry = self.token_cache.put(self.login('/login', self.credentials._asdict()))
+
+            self.authorization_header, self.authorization_expiration = tokens.authorization(entry)
+
+    def refresh(self, entry):
+        """Refresh a saved access token
+
+        :param entry: the saved token
+        :type entry: dict
+
+        :returns: the new token or None if it couldn't be refreshed
+        :rtype: dict
+        """
+        try:
+            data = self.login('/login/refresh', {'refreshToken': entry['refresh_token']})
+        except PureportTransportError as exc:
+            log.debug("unable to refresh access token: {}".format(exc))
+            return None
+        return self.token_cache.put(data, entry)
+
+    def login(self, url, body):
+        """Send a login request
+
+        :param url: the login URL
+        :type url: str
+
+        :param body: the request body
+        :type body: dict
+
+        :returns: the login response
+        :rtype: dict
+
+        :raises: `pureport.exceptions.PureportTransportError`
+        """
+        # the request is sent without authorization and timed on its own
+        # rather than as part of the request that needed the token
+        with timings.measure('POST', url) as timing:
+            resp = super(BaseSession, self).__call__('POST', urljoin(self.base_url, url), body=json.dumps(body),
+                                                     headers={'Content-Type': 'application/json'})
+            if timing is not None:
+                resp = timing.decoded(resp)
+        return json.loads(resp.data)
+
+    def get(self, url, body=None, headers=None, query=None):
+        """HTTP GET method
+
+        Requests for the OpenAPI spec are answered from the spec already
+        retrieved by `pureport_client.bindings`.
+
+        :param url: relative HTTP URL
+        :type url: str
+
+        :param body: HTTP payload
+        :type body: str
+
+        :param headers: Optional HTTP headers
+        :type headers: dict
+
+        :param query: Optional HTTP query string
+        :type query: dict
+
+        :returns: HTTP Response object
+        :rtype: :class:`pureport.transport.Response`
+        """
+        if url == bindings.API_URL and body is None and query is None:
+            return bindings.ApiResponse(200, bindings.get_api(self).spec)
+        return super(Session, self).get(url, body=body, headers=headers, query=query)
+
+
+def create(options=None, api_url=None, api_key=None, api_secret=None, api_profile=None,
+           rate_limit=None, rate_burst=None, cassette=None):
+    """Create a session with the resolved credentials
+
+    See `pureport_client.tokens.find_credentials` for how the credentials
+    are resolved.  The session saves its access token to the cache of
+    the profile and shares the rate limit of the profile with other
+    processes.
+
+    :param options: the connection pool options
+    :type options: `pureport_client.transport.TransportOptions`
+
+    :param api_url: the base URL of the API
+    :type api_url: str
+
+    :param api_key: the API key
+    :type api_key: str
+
+    :param api_secret: the API key secret
+    :type api_secret: str
+
+    :param api_profile: the profile in the credentials file
+    :type api_profile: str
+
+    :param rate_limit: the maximum number of requests per second,
+        defaults to the `rate_limit` of the profile
+    :type rate_limit: float
+
+    :param rate_burst: the number of requests that can be sent at once,
+        defaults to the `rate_burst` of the profile
+    :type rate_burst: int
+
+    :param cassette: records the requests of the session or answers
+        them from a recording, no credentials are needed to replay a
+        recording, see `pureport_client.cassette`
+    :type cassette: `pureport_client.cassette.Cassette`
+
+    :returns: an instance of `Session`
+    :rtype: `pureport_client.session.Session`
+
+    :raises: `pureport.exceptions.PureportError`
+    """
+    if cassette is not None and cassette.replaying:
+        # a recording is replayed without credentials, the saved access
+        # token or the rate limit of a profile
+        session = Session(cassette.credentials, api_url or cassette.recorded_url, options=options)
+        return cassette.wrap(session)
+
+    credentials, base_url, profile = tokens.find_credentials(api_url, api_key, api_secret, api_profile)
+    _, values = tokens.read_profile(profile)
+    rate_limiter = ratelimit.RateLimiter(rate_limit if rate_limit is not None else values.get('rate_limit'),
+                                         rate_burst or values.get('rate_burst'), profile)
+    session = Session(credentials, base_url, options=options,
+                      token_cache=tokens.TokenCache(profile, base_url, credentials.key),
+                      rate_limiter=rate_limiter)
+    if cassette is not None:
+        cassette.wrap(session)
+    return session
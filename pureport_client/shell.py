@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The shell module provides an interactive prompt for the command line
+interface.
+
+Commands entered at the prompt are run in the same process using the
+command tree and API session of the `pureport shell` invocation, so the
+session, its access token and connection pool are reused by every
+command.  Command and option names are completed with the TAB key when
+the `readline` module is available.
+"""
+
+from __future__ import absolute_import
+
+import cmd
+import shlex
+
+from click import (
+    command,
+    echo,
+    pass_context,
+    Group
+)
+
+from pureport_client.util import invoke
+
+
+class Shell(cmd.Cmd):
+    """Interactive prompt that runs commands of the command line interface
+    """
+
+    intro = "Pureport CLI shell.  Type `help` for a list of commands and `exit` to quit."
+
+    prompt = 'pureport> '
+
+    def __init__(self, cli, session, **kwargs):
+        """Initialize the instance
+
+        :param cli: the root command group
+        :type cli: `click.Group`
+
+        :param session: the API session shared by all commands
+        :type session: `pureport_client.util.LazySession`
+        """
+        cmd.Cmd.__init__(self, **kwargs)
+        self.cli = cli
+        self.session = session
+        self.exit_code = 0
+
+    def preloop(self):
+        try:
+            import readline
+        except ImportError:
+            return
+        # option names start with dashes
+        readline.set_completer_delims(' \t\n')
+
+    def run(self, args):
+        """Run a command
+
+        :param args: the command line arguments
+        :type args: list
+
+        :returns: None
+        """
+        self.exit_code = invoke(self.cli, args, obj=self.session)
+
+    def emptyline(self):
+        pass
+
+    def default(self, line):
+        try:
+            args = shlex.split(line)
+        except ValueError as exc:
+            echo("Error: {}".format(exc), err=True)
+            self.exit_code = 2
+            return
+        self.run(args)
+
+    def do_help(self, arg):
+        """Display help for a command"""
+        self.run(shlex.split(arg) + ['--help'])
+
+    def do_exit(self, arg):
+        """Exit the shell"""
+        return True
+
+    do_quit = do_exit
+
+    def do_EOF(self, arg):
+        echo('')
+        return True
+
+    def completions(self, args, text):
+        """Returns the command or option names that complete a command line
+
+        :param args: the arguments before the text being completed
+        :type args: list
+
+        :param text: the text being completed
+        :type text: str
+
+        :returns: a list of completions
+        :rtype: list
+        """
+        current = self.cli
+        for arg in args:
+            if isinstance(current, Group) and not arg.startswith('-'):
+                current = current.get_command(None, arg) or current
+
+        if text.startswith('-'):
+            names = [name for param in current.params for name in param.opts + param.secondary_opts
+                     if name.startswith('-')] + ['--help']
+        elif isinstance(current, Group):
+            names = current.list_commands(None)
+        else:
+            names = []
+
+        return sorted(set(name for name in names if name.startswith(text)))
+
+    def completenames(self, text, line, begidx, endidx):
+        return self.completedefault(text, line, begidx, endidx)
+
+    def completedefault(self, text, line, begidx, endidx):
+        try:
+            args = shlex.split(line[:begidx])
+        except ValueError:
+            return []
+        if args and args[0] == 'help':
+            args = args[1:]
+        return [item + ' ' for item in self.completions(args, text)]
+
+
+@command()
+@pass_context
+def shell(ctx):
+    """Start an interactive shell
+
+    Commands run in the shell share one API session.
+    """
+    root = ctx.find_root()
+    sh = Shell(root.command, root.obj)
+
+    while True:
+        try:
+            sh.cmdloop()
+            break
+        except KeyboardInterrupt:
+            echo('^C')
+            sh.intro = None
+
+    ctx.exit(sh.exit_code)
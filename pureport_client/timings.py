@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The timings module measures where the time of a command is spent.
+
+Every HTTP request sent by `pureport_client.session.Session`, whether by
+:meth:`pureport_client.commands.CommandBase.__call__` or by a typed
+function such as `find_networks`, is measured while at least one hook is
+registered with :func:`add_hook` or :func:`add_collector`.  The hook is
+called with a :class:`Timing` for each request once it completes:
+
+.. code-block:: python
+
+    from pureport_client import timings
+
+    def hook(timing):
+        if isinstance(timing, timings.Timing):
+            print(timing.method, timing.url, timing.status, timing.total)
+
+    timings.add_hook(hook)
+
+A :class:`Timing` holds the time spent resolving the host name, opening
+the connection, negotiating TLS, waiting for the first byte of the
+response, downloading the body and decoding the JSON, along with the
+status and the size of the body.  The DNS, connect and TLS times are None
+when the request reused a kept-alive connection.  Under asyncio the
+connect time includes resolving the host name and negotiating TLS, see
+`pureport_client.aio`.
+
+Local work, such as formatting the output of a command, is reported to
+the hooks as a :class:`LocalTiming`, see :func:`local`.
+
+A hook registered with :func:`add_hook` sees the requests of the whole
+process.  A collector registered with :func:`add_collector` only sees the
+requests of the current context, that is of the command being run and of
+the threads and tasks it starts, so commands run concurrently by `pureport
+batch`, the shell or the daemon each collect their own timings.
+
+The `--timings` option registers a :class:`Report` as a collector that
+prints the number of requests and the p50, p95 and maximum time of each
+endpoint and how much of the command was spent waiting for the network to
+stderr when the command completes.
+"""
+
+from __future__ import absolute_import
+
+import sys
+import time
+import threading
+
+from collections import (
+    OrderedDict,
+    namedtuple
+)
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import urlsplit
+
+from pureport_client import routes
+
+# the phases of a request that are timed by the transport, in order
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'download', 'decode')
+
+# the hooks are replaced rather than modified so they can be read
+# without a lock
+_hooks = ()
+
+_hooks_lock = threading.Lock()
+
+# the hooks of the current command, see `add_collector`
+_collectors = ContextVar('pureport_timing_collectors', default=())
+
+# the timing of the request being sent by the current thread or task
+_current = ContextVar('pureport_timing', default=None)
+
+LocalTiming = namedtuple('LocalTiming', ('name', 'started', 'total'))
+
+
+class Timing(object):
+    """The timing of an HTTP request
+
+    All times are in seconds.  `started` is the time the request started
+    as returned by `time.perf_counter` and `total` is the time from then
+    until the response was decoded.
+    """
+
+    __slots__ = ('method', 'url', 'status', 'bytes', 'started', 'total') + PHASES + ('_mark',)
+
+    def __init__(self, method, url):
+        """Initialize the instance
+
+        :param method: the HTTP method
+        :type method: str
+
+        :param url: the URL of the request
+        :type url: str
+        """
+        self.method = method.upper()
+        self.url = url
+        self.status = None
+        self.bytes = None
+        self.started = self._mark = time.perf_counter()
+        self.total = None
+        for name in PHASES:
+            setattr(self, name, None)
+
+    def __repr__(self):
+        return 'Timing({} {} {} {:.3f}s)'.format(self.method, self.url, self.status, self.total or 0)
+
+    @property
+    def network(self):
+        """The time spent sending the request and receiving the response
+        """
+        if self.total is None:
+            return None
+        return self.total - (self.decode or 0)
+
+    @property
+    def endpoint(self):
+        """The method and the path template of the request, or the path
+        if it doesn't match a known route
+        """
+        path = urlsplit(self.url).path
+        found = routes.registry.match(path)
+        return '{} {}'.format(self.method, found[0].template if found is not None else path)
+
+    def start(self):
+        """Start timing a phase
+        """
+        self._mark = time.perf_counter()
+
+    def end(self, phase):
+        """End the current phase and start the next one
+
+        :param phase: the name of the phase that ended, see `PHASES`
+        :type phase: str
+        """
+        now = time.perf_counter()
+        setattr(self, phase, now - self._mark)
+        self._mark = now
+
+    def decoded(self, response):
+        """Decode the body of a response and record its size
+
+        :param response: the response
+        :type response: `pureport.transport.Response`
+
+        :returns: a response with the body decoded once
+        :rtype: `pureport_client.transport.SharedResponse`
+        """
+        from pureport_client.transport import SharedResponse
+
+        self.status = response.status
+        self.bytes = len(response.data or b'')
+        self.start()
+        response = SharedResponse(response)
+        self.end('decode')
+        return response
+
+
+def add_hook(func):
+    """Register a function called with the timing of every request
+
+    :param func: the function, called with a :class:`Timing` or a
+        :class:`LocalTiming`
+    :type func: function
+    """
+    global _hooks
+    with _hooks_lock:
+        _hooks = _hooks + (func,)
+
+
+def remove_hook(func):
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(item for item in _hooks if item != func)
+
+
+def add_collector(func):
+    """Register a function called with the timing of every request sent
+    in the current context
+
+    :param func: the function, called with a :class:`Timing` or a
+        :class:`LocalTiming`
+    :type func: function
+
+    :returns: a token that removes the collector when passed to
+        :func:`remove_collector`
+    :rtype: `contextvars.Token`
+    """
+    return _collectors.set(_collectors.get() + (func,))
+
+
+def remove_collector(token):
+    _collectors.reset(token)
+
+
+def enabled():
+    return bool(_hooks or _collectors.get())
+
+
+def current():
+    """Returns the timing of the request sent by the current thread
+
+    :returns: the timing or None if requests aren't being timed
+    :rtype: `Timing`
+    """
+    return _current.get()
+
+
+def _emit(timing):
+    for func in _hooks + _collectors.get():
+        func(timing)
+
+
+@contextmanager
+def measure(method, url):
+    """Time a request
+
+    The transport records the phases of the request in the timing while
+    the block runs and the hooks are called when it exits.
+
+    :param method: the HTTP method
+    :type method: str
+
+    :param url: the URL of the request
+    :type url: str
+
+    :returns: the timing or None if no hooks are registered
+    :rtype: `Timing`
+    """
+    if not enabled():
+        yield None
+        return
+
+    timing = Timing(method, url)
+    token = _current.set(timing)
+    try:
+        yield timing
+    except Exception as exc:
+        response = getattr(exc, '_response', None)
+        if response is not None:
+            timing.status = getattr(response, 'status', None)
+            timing.bytes = len(getattr(response, 'data', None) or b'')
+        raise
+    finally:
+        timing.total = time.perf_counter() - timing.started
+        _current.reset(token)
+        _emit(timing)
+
+
+@contextmanager
+def local(name):
+    """Time local work, such as formatting the output of a command
+
+    :param name: the name of the work
+    :type name: str
+    """
+    if not enabled():
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _emit(LocalTiming(name, started, time.perf_counter() - started))
+
+
+def percentile(values, percent):
+    """Returns a percentile of values using the nearest rank
+
+    :param values: the sorted values
+    :type values: list
+
+    :param percent: the percentile, between 0 and 100
+    :type percent: float
+
+    :returns: the value
+    :rtype: float
+    """
+    rank = max(1, int(-(-len(values) * percent // 100)))
+    return values[rank - 1]
+
+
+def busy_time(intervals):
+    """Returns the time covered by possibly overlapping intervals
+
+    :param intervals: the start and end of each interval
+    :type intervals: list
+
+    :returns: the time in seconds
+    :rtype: float
+    """
+    total, end = 0.0, None
+    for start, stop in sorted(intervals):
+        if end is None or start > end:
+            total += stop - start
+            end = stop
+        elif stop > end:
+            total += stop - end
+            end = stop
+    return total
+
+
+class Report(object):
+    """Collects the timings of a command and summarizes them
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = []
+        self.local = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, timing):
+        with self._lock:
+            if isinstance(timing, LocalTiming):
+                self.local[timing.name] = self.local.get(timing.name, 0.0) + timing.total
+            else:
+                self.timings.append(timing)
+
+    def lines(self, elapsed=None):
+        """Returns the lines of the summary
+
+        The time spent waiting for the network is the time at least one
+        request was in flight, so requests sent at the same time are only
+        counted once, and the rest of the command is local work.
+
+        :param elapsed: the duration of the command, defaults to the time
+            since the report was created
+        :type elapsed: float
+
+        :returns: the lines
+        :rtype: list
+        """
+        if elapsed is None:
+            elapsed = time.perf_counter() - self.started
+
+        with self._lock:
+            timings = list(self.timings)
+            local = OrderedDict(self.local)
+
+        endpoints = OrderedDict()
+        for timing in timings:
+            endpoints.setdefault(timing.endpoint, []).append(timing.total)
+
+        width = max([len(name) for name in endpoints] + [len('endpoint')])
+        row = '{:<%d}  {:>6}  {:>9}  {:>9}  {:>9}' % width
+        lines = [row.format('endpoint', 'count', 'p50', 'p95', 'max')]
+        for name, values in sorted(endpoints.items()):
+            values.sort()
+            lines.append(row.format(name, len(values), *('{:.1f}ms'.format(item * 1000) for item in (
+                percentile(values, 50), percentile(values, 95), values[-1]))))
+
+        phases = []
+        for phase in PHASES:
+            values = [getattr(timing, phase) for timing in timings if getattr(timing, phase) is not None]
+            if values:
+                phases.append('{} {:.1f}ms'.format(phase, sum(values) * 1000))
+        if phases:
+            lines.append('request phases: {}'.format(', '.join(phases)))
+
+        network = min(elapsed, busy_time([(item.started, item.started + item.network) for item in timings]))
+        detail = ', '.join('{} {:.3f}s'.format(name, value) for name, value in local.items())
+        lines.append('total {:.3f}s: network {:.3f}s, local {:.3f}s{}'.format(
+            elapsed, network, elapsed - network, ' ({})'.format(detail) if detail else ''))
+        return lines
+
+    def close(self, file=None):
+        """Print the summary
+
+        :param file: where the summary is printed, defaults to stderr
+        :type file: file
+        """
+        elapsed = time.perf_counter() - self.started
+        file = file or sys.stderr
+        for line in self.lines(elapsed):
+            file.write(line + '\n')
+        file.flush()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The tokens module resolves the API credentials and saves the access
+tokens returned by the Pureport API between invocations of the CLI.
+
+Credentials are resolved by :func:`find_credentials` from the command
+line options, the `PUREPORT_API_KEY`, `PUREPORT_API_SECRET` and
+`PUREPORT_API_BASE_URL` environment variables and the selected profile
+in `~/.pureport/credentials.[yml|yaml|json]`, in that order.
+
+The access token, refresh token and expiration time returned by `/login`
+are saved by :class:`TokenCache` to a file for each profile in the
+`tokens` directory of the per-user cache (see `pureport_client.cache`).
+The files can only be read by the current user.  A saved token is only
+used by sessions with the same API URL and API key, and is refreshed
+with `/login/refresh` shortly before it expires, see :func:`refresh_at`,
+so commands run in quick succession only log in once.
+"""
+
+from __future__ import absolute_import
+
+import os
+import re
+import json
+import time
+import hashlib
+
+from collections import namedtuple
+from logging import getLogger
+
+from pureport_client import cache
+
+log = getLogger(__name__)
+
+TOKENS_DIR = 'tokens'
+
+DEFAULT_PROFILE = 'default'
+
+# tokens are refreshed when they expire within this many seconds
+REFRESH_MARGIN = 300
+
+Credentials = namedtuple('Credentials', ('key', 'secret'))
+
+
+def read_profile(profile=None):
+    """Read a profile from the credentials file
+
+    :param profile: the name of the profile, defaults to the current
+        profile of the credentials file
+    :type profile: str
+
+    :returns: the name of the profile and its values
+    :rtype: tuple
+    """
+    import yaml
+    from pureport import defaults
+
+    for ext in ('yml', 'yaml', 'json'):
+        path = os.path.join(defaults.credentials_path, '{}.{}'.format(defaults.credentials_filename, ext))
+        if os.path.exists(path):
+            log.info("loading credentials file {}".format(path))
+            with open(path) as f:
+                content = (json.load if ext == 'json' else yaml.safe_load)(f)
+            break
+    else:
+        content = None
+
+    content = content or {}
+    profile = profile or content.get('current_profile') or DEFAULT_PROFILE
+    profiles = content.get('profiles') or {}
+    return profile, profiles.get(profile, profiles.get(DEFAULT_PROFILE)) or {}
+
+
+def find_credentials(api_url=None, api_key=None, api_secret=None, api_profile=None):
+    """Resolve the credentials for the API
+
+    :param api_url: the base URL of the API
+    :type api_url: str
+
+    :param api_key: the API key
+    :type api_key: str
+
+    :param api_secret: the API key secret
+    :type api_secret: str
+
+    :param api_profile: the profile in the credentials file
+    :type api_profile: str
+
+    :returns: the credentials, the base URL of the API and the name of
+        the profile
+    :rtype: tuple
+
+    :raises: `pureport.exceptions.PureportError`
+    """
+    from pureport import defaults
+    from pureport.exceptions import PureportError
+
+    profile, values = read_profile(api_profile)
+
+    key = api_key or os.getenv('PUREPORT_API_KEY') or values.get('api_key')
+    secret = api_secret or os.getenv('PUREPORT_API_SECRET') or values.get('api_secret')
+    if not key or not secret:
+        raise PureportError("missing or invalid credentials")
+
+    base_url = api_url or os.getenv('PUREPORT_API_BASE_URL') or values.get('api_url') or defaults.api_base_url
+
+    return Credentials(key, secret), base_url, profile
+
+
+class TokenCache(object):
+    """Saves the access token of a profile in the cache
+    """
+
+    def __init__(self, profile, base_url, key):
+        """Initialize the instance
+
+        :param profile: the name of the profile
+        :type profile: str
+
+        :param base_url: the base URL of the API
+        :type base_url: str
+
+        :param key: the API key the tokens are issued for
+        :type key: str
+        """
+        self.profile = profile or DEFAULT_PROFILE
+        self.name = '/'.join((TOKENS_DIR, '{}.json'.format(re.sub(r'[^\w.-]', '_', self.profile))))
+        self.scope = hashlib.sha1(json.dumps([base_url, key]).encode('utf-8')).hexdigest()
+
+    def get(self):
+        """Returns the saved token
+
+        :returns: the saved token or None if there is no token for the
+            API URL and key
+        :rtype: dict
+        """
+        entry = cache.read_json(self.name)
+        if not isinstance(entry, dict) or entry.get('scope') != self.scope:
+            return None
+        return entry
+
+    def put(self, data, previous=None):
+        """Save the token returned by `/login` or `/login/refresh`
+
+        :param data: the login response
+        :type data: dict
+
+        :param previous: the saved token, its refresh token is kept if
+            the response doesn't include one
+        :type previous: dict
+
+        :returns: the saved token
+        :rtype: dict
+        """
+        entry = {
+            'scope': self.scope,
+            'access_token': data['access_token'],
+            'refresh_token': data.get('refresh_token') or (previous or {}).get('refresh_token'),
+            'expires_in': data['expires_in'],
+            'expires': time.time() + data['expires_in']
+        }
+        cache.write_json(self.name, entry)
+        return entry
+
+    def remove(self):
+        cache.remove(self.name)
+
+
+def refresh_at(entry):
+    """Returns the time a saved token should be refreshed
+
+    Tokens are refreshed `REFRESH_MARGIN` seconds before they expire or
+    halfway through their lifetime if that is sooner.
+
+    :param entry: the saved token
+    :type entry: dict
+
+    :returns: the time in seconds since the epoch
+    :rtype: float
+    """
+    return entry['expires'] - min(REFRESH_MARGIN, entry.get('expires_in', 0) / 2.0)
+
+
+def usable(entry):
+    """Checks if a saved token can be used without refreshing it
+
+    :param entry: the saved token
+    :type entry: dict
+
+    :returns: True if the token isn't due to be refreshed
+    :rtype: bool
+    """
+    return entry is not None and refresh_at(entry) > time.time()
+
+
+def authorization(entry):
+    """Returns the authorization header and expiration of a saved token
+
+    The expiration is the time the token should be refreshed, see
+    :func:`refresh_at`, so sessions refresh the token before it expires.
+
+    :param entry: the saved token
+    :type entry: dict
+
+    :returns: the header and the expiration time
+    :rtype: tuple
+    """
+    return {'Authorization': 'Bearer {}'.format(entry['access_token'])}, refresh_at(entry)
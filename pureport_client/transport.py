@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+The transport module configures the HTTP connection pool used to send
+requests to the Pureport API.
+
+Every request, whether it is sent by a typed function such as
+`find_networks` or by :meth:`pureport_client.commands.CommandBase.__call__`,
+is sent by :class:`pureport_client.session.Session` through a single
+`urllib3.PoolManager`.  Connections are kept alive and reused, including
+by concurrent threads, so TLS handshakes are only paid once per
+connection.
+
+The pool is configured with :class:`TransportOptions`:
+
+* `max_connections` limits the number of requests in flight across all
+  hosts, no limit by default
+* `max_per_host` is the number of connections kept open to each host,
+  threads wait for a connection when all of them are in use
+* `keepalive_timeout` closes connections that have been idle for longer
+  than this many seconds instead of reusing them
+* `connect_timeout` and `read_timeout` are the socket timeouts, in
+  seconds, no timeout by default
+
+The connections record the DNS, connect, TLS, time to first byte and
+download times of requests that are being timed, see
+`pureport_client.timings`.
+
+urllib3 only retries requests that failed to connect or to read a
+response.  Responses with a 429 or 503 status are returned as they are,
+so they are only retried by `pureport_client.ratelimit.RateLimiter`.
+
+Identical GET requests made by concurrent threads are coalesced by
+:class:`SingleFlight` so only one of them is sent and the others share
+its response.
+"""
+
+from __future__ import absolute_import
+
+import json
+import time
+import socket
+import threading
+
+from collections import namedtuple
+from contextlib import contextmanager
+from logging import getLogger
+
+from pureport_client import timings
+
+log = getLogger(__name__)
+
+DEFAULT_MAX_PER_HOST = 10
+
+DEFAULT_KEEPALIVE_TIMEOUT = 60
+
+# the number of times urllib3 retries a request that failed to connect
+# or to read a response
+DEFAULT_RETRIES = 3
+
+
+class TransportOptions(namedtuple('TransportOptions', ('max_connections', 'max_per_host', 'keepalive_timeout',
+                                                       'connect_timeout', 'read_timeout'))):
+    """Options for the HTTP connection pool
+    """
+
+    def __new__(cls, max_connections=None, max_per_host=None, keepalive_timeout=None,
+                connect_timeout=None, read_timeout=None):
+        return super(TransportOptions, cls).__new__(
+            cls,
+            max_connections,
+            max_per_host or DEFAULT_MAX_PER_HOST,
+            DEFAULT_KEEPALIVE_TIMEOUT if keepalive_timeout is None else keepalive_timeout,
+            connect_timeout,
+            read_timeout
+        )
+
+
+def _open_connection(conn, new_conn, timing):
+    """Open the socket of a connection, timing the lookup of the host name
+    separately from opening the connection
+
+    :param conn: the urllib3 connection
+    :type conn: `urllib3.connection.HTTPConnection`
+
+    :param new_conn: opens the socket to `conn._dns_host`
+    :type new_conn: function
+
+    :param timing: the timing of the request
+    :type timing: `pureport_client.timings.Timing`
+
+    :returns: the socket
+    :rtype: `socket.socket`
+    """
+    from urllib3.exceptions import NewConnectionError
+
+    host = conn._dns_host
+    try:
+        addresses = socket.getaddrinfo(host, conn.port, 0, socket.SOCK_STREAM)
+    except OSError:
+        return new_conn()
+    timing.end('dns')
+
+    error = None
+    try:
+        for item in addresses:
+            conn._dns_host = item[4][0]
+            try:
+                sock = new_conn()
+                break
+            except NewConnectionError as exc:
+                error = exc
+        else:
+            raise error
+    finally:
+        conn._dns_host = host
+    timing.end('connect')
+    return sock
+
+
+def _response_class(base):
+    """Returns a response class that records the time to the first byte
+
+    :param base: the response class of the urllib3 connection
+    :type base: type
+
+    :returns: the response class
+    :rtype: type
+    """
+    class Response(base):
+
+        def begin(self):
+            super(Response, self).begin()
+            timing = timings.current()
+            if timing is not None:
+                timing.end('ttfb')
+
+    Response.__name__ = base.__name__
+    return Response
+
+
+def _connection_class(base, tls):
+    """Returns a connection class that records the phases of requests
+
+    The phases are recorded in the timing of the request being sent by
+    the current thread, see `pureport_client.timings`.
+
+    :param base: the urllib3 connection class
+    :type base: type
+
+    :param tls: whether the connection negotiates TLS
+    :type tls: bool
+
+    :returns: the connection class
+    :rtype: type
+    """
+    class Connection(base):
+
+        response_class = _response_class(base.response_class)
+
+        def _new_conn(self):
+            timing = timings.current()
+            if timing is None:
+                return super(Connection, self)._new_conn()
+            return _open_connection(self, super(Connection, self)._new_conn, timing)
+
+        def connect(self):
+            timing = timings.current()
+            if timing is not None:
+                timing.start()
+            super(Connection, self).connect()
+            if timing is not None and tls:
+                timing.end('tls')
+
+        def request(self, *args, **kwargs):
+            timing = timings.current()
+            if timing is not None:
+                timing.start()
+            return super(Connection, self).request(*args, **kwargs)
+
+        def getresponse(self, *args, **kwargs):
+            response = super(Connection, self).getresponse(*args, **kwargs)
+            timing = timings.current()
+            # the body is read by urllib3 before the response is returned
+            if timing is not None:
+                timing.end('download')
+            return response
+
+    Connection.__name__ = base.__name__
+    return Connection
+
+
+def _pool_class(base, keepalive_timeout):
+    """Returns a connection pool class that expires idle connections
+
+    :param base: the urllib3 connection pool class
+    :type base: type
+
+    :param keepalive_timeout: the number of seconds a connection can be
+        idle before it is closed
+    :type keepalive_timeout: int
+
+    :returns: the connection pool class
+    :rtype: type
+    """
+    class ConnectionPool(base):
+
+        ConnectionCls = _connection_class(base.ConnectionCls, base.scheme == 'https')
+
+        def _get_conn(self, timeout=None):
+            conn = super(ConnectionPool, self)._get_conn(timeout)
+            last_used = getattr(conn, 'last_used', None)
+            if keepalive_timeout and last_used and time.monotonic() - last_used > keepalive_timeout:
+                log.debug("closing idle connection to {}".format(self.host))
+                conn.close()
+            return conn
+
+        def _put_conn(self, conn):
+            if conn is not None:
+                conn.last_used = time.monotonic()
+            super(ConnectionPool, self)._put_conn(conn)
+
+    ConnectionPool.__name__ = base.__name__
+    return ConnectionPool
+
+
+def pool_manager(options=None, headers=None):
+    """Create the HTTP connection pool
+
+    :param options: the pool options
+    :type options: `TransportOptions`
+
+    :param headers: headers sent with every request
+    :type headers: dict
+
+    :returns: the pool manager
+    :rtype: `urllib3.PoolManager`
+    """
+    import urllib3
+    from urllib3.connectionpool import (
+        HTTPConnectionPool,
+        HTTPSConnectionPool
+    )
+
+    options = options or TransportOptions()
+
+    manager = urllib3.PoolManager(
+        headers=headers,
+        maxsize=options.max_per_host,
+        block=True,
+        timeout=urllib3.Timeout(connect=options.connect_timeout, read=options.read_timeout),
+        # throttled responses are retried by the rate limiter of the
+        # session instead, which also slows down the other requests
+        retries=urllib3.Retry(DEFAULT_RETRIES, status_forcelist=(), respect_retry_after_header=False,
+                              raise_on_status=False)
+    )
+    manager.pool_classes_by_scheme = {
+        'http': _pool_class(HTTPConnectionPool, options.keepalive_timeout),
+        'https': _pool_class(HTTPSConnectionPool, options.keepalive_timeout)
+    }
+
+    return manager
+
+
+class RequestLimiter(object):
+    """Limits the number of requests in flight across all threads
+    """
+
+    def __init__(self, limit=None):
+        """Initialize the instance
+
+        :param limit: the maximum number of requests in flight, None
+            for no limit
+        :type limit: int
+        """
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit) if limit else None
+
+    @contextmanager
+    def acquire(self):
+        if self._semaphore is None:
+            yield
+            return
+        with self._semaphore:
+            yield
+
+
+class SharedResponse(object):
+    """A response shared by coalesced requests
+
+    Provides the same interface as `pureport.transport.Response`.  The
+    body is decoded once and the same object is returned to every caller,
+    so callers must not modify it.
+    """
+
+    def __init__(self, response):
+        self.status = response.status
+        self.headers = response.headers
+        self.data = response.data
+        self.json = response.json
+
+
+class _Flight(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exc = None
+
+
+class SingleFlight(object):
+    """Coalesces identical calls made at the same time by many threads
+
+    The first thread to make a call runs it and the threads that make the
+    same call before it returns wait for and share its result, or its
+    exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, key, func):
+        """Run a function unless a call with the same key is in flight
+
+        :param key: identifies the call
+        :type key: str
+
+        :param func: the function, called without arguments
+        :type func: function
+
+        :returns: the result of the call and True if the call was
+            coalesced with a call made by another thread
+        :rtype: tuple
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.exc is not None:
+                raise flight.exc
+            return flight.result, True
+
+        try:
+            flight.result = func()
+        except BaseException as exc:
+            flight.exc = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        return flight.result, False
+
+
+def flight_key(method, url, body=None, headers=None, query=None):
+    """Returns the key used to coalesce a request
+
+    :returns: the key or None if the request can't be coalesced
+    :rtype: str
+    """
+    if method.upper() != 'GET':
+        return None
+    return json.dumps([url, body, headers or {}, query or {}], sort_keys=True, default=list)
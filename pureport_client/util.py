@@ -5,10 +5,21 @@
 
 from __future__ import absolute_import
 
-from functools import update_wrapper
+import sys
+import importlib
+import threading
+import traceback
+
+from functools import (
+    partial,
+    update_wrapper
+)
 from json import loads as json_loads
 from json import JSONDecodeError
+from pureport_client import timings
+from pureport_client.commands import Stream
 from pureport_client.helpers import format_output
+from pureport_client.completion import remember_ids
 
 from inspect import (
     getfullargspec,
@@ -22,9 +33,11 @@ from click import (
     pass_context,
     pass_obj,
     Choice,
+    Group,
     Option,
     ParamType
 )
+from click.exceptions import Exit
 
 
 class JsonParamType(ParamType):
@@ -58,6 +71,113 @@ class JsonParamType(ParamType):
 JSON = JsonParamType()
 
 
+class LazySession(object):
+    """A proxy that constructs the API session on first use
+
+    The session is constructed by calling the factory function the first
+    time an attribute of the proxy is accessed, for instance when a
+    :class:`pureport_client.commands.CommandBase` sends a request.  This
+    avoids resolving credentials and authenticating for invocations that
+    never call the API, such as displaying help text.
+    """
+
+    def __init__(self, factory):
+        """Initialize the instance
+
+        :param factory: function that returns the API session
+        :type factory: function
+        """
+        self._factory = factory
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Returns the API session, constructing it if necessary
+        """
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._factory()
+        return self._session
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.session, name)
+
+
+class LazyGroup(Group):
+    """A click Group that defers loading of its subcommands
+
+    Subcommands can be registered by name with a loader function using
+    :meth:`add_lazy_command` or all at once using the `loader` keyword
+    argument.  Loaders are only called when a subcommand is resolved,
+    either to be invoked or to display its help text, so the modules
+    that implement a command are not imported until they are needed.
+    Commands can be resolved by many threads at the same time.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the instance
+
+        :param lazy_commands: mapping of command names to loader
+            functions that return a click Command
+        :type lazy_commands: dict
+
+        :param loader: function that returns a list of click Commands
+            to add to this group the first time it is resolved
+        :type loader: function
+        """
+        self.lazy_commands = dict(kwargs.pop('lazy_commands', None) or {})
+        self.loader = kwargs.pop('loader', None)
+        self._lock = threading.RLock()
+        super(LazyGroup, self).__init__(*args, **kwargs)
+
+    def add_lazy_command(self, name, loader):
+        """Registers a subcommand that is loaded on first use
+
+        :param name: the name of the subcommand
+        :type name: str
+
+        :param loader: function that returns a click Command
+        :type loader: function
+
+        :returns: None
+        """
+        self.commands.pop(name, None)
+        self.lazy_commands[name] = loader
+
+    def load(self):
+        """Calls the group loader, if there is one, exactly once
+
+        :returns: None
+        """
+        if self.loader is None:
+            return
+        with self._lock:
+            if self.loader is not None:
+                for cmd in self.loader():
+                    self.add_command(cmd)
+                self.loader = None
+
+    def list_commands(self, ctx):
+        self.load()
+        return sorted(set(self.commands).union(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        self.load()
+        if cmd_name in self.lazy_commands:
+            with self._lock:
+                # the command is added before it is removed from the lazy
+                # commands so other threads always find it in one of them
+                loader = self.lazy_commands.get(cmd_name)
+                if loader is not None:
+                    self.add_command(loader(), cmd_name)
+                    del self.lazy_commands[cmd_name]
+        return self.commands.get(cmd_name)
+
+
 def insert_click_param(f, param):
     """Appends the params on a command
 
@@ -93,10 +213,25 @@ def create_print_wrapper(f):
     def new_func(*args, **kwargs):
         response_format = kwargs.pop('format')
         response = f(*args, **kwargs)
-        echo(format_output(response, response_format))
+        # streamed results are written as they arrive whatever the format
+        if isinstance(response, Stream):
+            response.write_lines(sys.stdout)
+            return response
+        with timings.local('format'):
+            echo(format_output(response, response_format))
+        remember_ids(response)
+        # commands run for many IDs report the IDs that failed
+        errors = getattr(response, 'errors', None)
+        if errors:
+            for error in errors:
+                echo('{id}: {error}'.format(**error), err=True)
+            raise Exit(1)
         return response
 
     new_func = update_wrapper(new_func, f)
+    # update_wrapper shares the wrapped function's params so copy them
+    # before adding the format option
+    new_func.__click_params__ = list(getattr(f, '__click_params__', []))
     insert_click_param(new_func,
                        Option(['--format'],
                               type=Choice(['json_pp', 'json', 'yaml', 'column']),
@@ -105,7 +240,7 @@ def create_print_wrapper(f):
     return new_func
 
 
-def create_client_group(f, name=None):
+def create_client_group(f, name=None, cls=None, **attrs):
     """Constructs a Client Group command.
 
     Given a reference to the Client class function, e.g. the @property Client.accounts or
@@ -127,6 +262,9 @@ def create_client_group(f, name=None):
     :param name: the name of the group
     :type: name: str
 
+    :param cls: the click Group class to create, defaults to `click.Group`
+    :type cls: type
+
     :returns: an instance of click Group
     :rtype: `click.core.Group`
     """
@@ -138,7 +276,7 @@ def create_client_group(f, name=None):
         ctx.obj = actual_f(obj, *args, **kwargs)
 
     new_func = update_wrapper(new_func, actual_f)
-    return group(name)(new_func)
+    return group(name, cls=cls or Group, **attrs)(new_func)
 
 
 def create_client_command(f):
@@ -226,11 +364,27 @@ def find_client_commands(obj):
     return commands
 
 
+def import_client_commands(name):
+    """Imports a command module and constructs its commands
+
+    :param name: the name of the module that implements `Command`
+    :type name: str
+
+    :returns: a list of commands
+    :rtype: list
+    """
+    module = importlib.import_module(name)
+    return list(construct_commands(find_client_commands(module.Command)))
+
+
 def construct_commands(commands):
     """Recursively build a list of commands and groups
 
     Recursively construct a list of click.Command or click.Group and
-    attach them to parent groups if necessary.
+    attach them to parent groups if necessary.  A group that names a
+    `module` instead of its `commands` is constructed as a
+    :class:`LazyGroup` and the module is only imported once the group
+    is resolved.
 
     :param commands: a list of dictionaries
     :type commands: list
@@ -239,10 +393,52 @@ def construct_commands(commands):
     :rtype: list
     """
     for cmd in commands:
-        if isinstance(cmd, dict) and 'context' in cmd:
+        if isinstance(cmd, dict) and 'module' in cmd:
+            yield create_client_group(cmd['context'], cmd['name'], cls=LazyGroup,
+                                      loader=partial(import_client_commands, cmd['module']))
+        elif isinstance(cmd, dict) and 'context' in cmd:
             grp = create_client_group(cmd['context'], cmd['name'])
             for child_cmd in construct_commands(cmd['commands']):
                 grp.add_command(child_cmd)
             yield grp
         else:
             yield create_client_command(cmd)
+
+
+def invoke(cli, args, obj=None, prog_name='pureport'):
+    """Run a command of the command line interface in process
+
+    The command is run the same way as it is from the shell, including
+    error handling, but the exit code is returned instead of exiting
+    the process.  Output is written to the current `sys.stdout` and
+    `sys.stderr`.
+
+    :param cli: the root command group
+    :type cli: `click.Group`
+
+    :param args: the command line arguments
+    :type args: list
+
+    :param obj: the API session shared by the commands, if not set the
+        root group creates a new session
+    :type obj: `pureport_client.util.LazySession`
+
+    :param prog_name: the program name displayed in usage messages
+    :type prog_name: str
+
+    :returns: the exit code
+    :rtype: int
+    """
+    try:
+        cli.main(args=list(args), prog_name=prog_name, obj=obj)
+    except SystemExit as exc:
+        if exc.code is None:
+            return 0
+        if isinstance(exc.code, int):
+            return exc.code
+        echo(exc.code, err=True)
+        return 1
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
@@ -35,8 +35,6 @@ def main():
             "Operating System :: OS Independent",
             "Programming Language :: Python",
             "Programming Language :: Python :: 3",
-            "Programming Language :: Python :: 3.5",
-            "Programming Language :: Python :: 3.6",
             "Programming Language :: Python :: 3.7",
             "Programming Language :: Python :: 3.8",
             "Programming Language :: Python :: 3.9",
@@ -59,10 +57,10 @@ def main():
         packages=find_packages(),
         install_requires=requirements,
         include_package_data=True,
-        python_requires="!=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, !=3.4.*, <4",
+        python_requires=">=3.7, <4",
         entry_points={
             'console_scripts': [
-                'pureport=pureport_client.__main__:run'
+                'pureport=pureport_client.console:run'
             ]
         },
     )
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+Startup and import time benchmarks for the command line interface.
+
+Run the benchmarks from the top level directory of the repository:
+
+    python -m test.benchmark --output results.json
+
+and compare the results against a previous run:
+
+    python -m test.benchmark --baseline results.json --threshold wall=20
+
+The command exits with a non-zero status if any measurement regressed by
+more than its threshold.  See `python -m test.benchmark --help`.
+"""
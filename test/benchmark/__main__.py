@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+from __future__ import absolute_import
+
+import sys
+import json
+import logging
+import argparse
+
+from test.benchmark import benchmark
+
+
+def threshold(value):
+    """Parse a threshold in the form `name=percent`
+    """
+    name, sep, percent = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError("expected name=percent, got `{}`".format(value))
+    try:
+        return name.strip(), float(percent)
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid percent `{}`".format(percent))
+
+
+def format_value(name, value):
+    if value is None:
+        return '-'
+    if name.endswith('peak_rss'):
+        return '{:.1f} MiB'.format(value / 1024 / 1024)
+    return '{:.1f} ms'.format(value * 1000)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m test.benchmark',
+                                     description="Measure the startup cost of the pureport CLI")
+    parser.add_argument('-o', '--output', help="write the results to a JSON file")
+    parser.add_argument('-b', '--baseline', help="compare the results against a JSON file from a previous run")
+    parser.add_argument('-t', '--threshold', type=threshold, action='append', default=[],
+                        help="allowed regression in percent for a kind of measurement "
+                             "(wall, import, rss) or a single measurement, for instance "
+                             "wall=20 or imports.yaml=50, may be repeated")
+    parser.add_argument('-n', '--runs', type=int, default=5,
+                        help="number of times each measurement is repeated (default: 5)")
+    parser.add_argument('-c', '--command', action='append', choices=sorted(benchmark.COMMANDS),
+                        help="only run the given command, may be repeated")
+    parser.add_argument('-m', '--module', action='append',
+                        help="only measure the import of the given module, may be repeated")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    results = benchmark.run(args.runs, args.command, args.module)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    base_metrics = benchmark.metrics(baseline)
+
+    for name, (_, value) in sorted(benchmark.metrics(results).items()):
+        line = '{:<45} {:>12}'.format(name, format_value(name, value))
+        if name in base_metrics:
+            line += '  (baseline {})'.format(format_value(name, base_metrics[name][1]))
+        print(line)
+
+    if args.baseline:
+        regressions = benchmark.compare(results, baseline, dict(args.threshold))
+        for name, base, value, change in regressions:
+            print("REGRESSION {}: {} -> {} (+{:.1f}%)".format(
+                name, format_value(name, base), format_value(name, value), change), file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+Measures the startup cost of the command line interface.
+
+Every measurement runs in a fresh Python process.  Commands are timed
+twice: cold, with an empty per-user cache, and warm, once the cache has
+been populated by a previous run.  Import costs are taken from the output
+of `python -X importtime`.
+"""
+
+from __future__ import absolute_import
+
+import os
+import sys
+import time
+import shutil
+import platform
+import tempfile
+import statistics
+import subprocess
+
+from logging import getLogger
+
+log = getLogger(__name__)
+
+RESULTS_VERSION = 1
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir))
+
+RUN_CLI = 'from pureport_client.console import run; run()'
+
+COMMANDS = {
+    'help': ['-c', RUN_CLI, '--help'],
+    'accounts_help': ['-c', RUN_CLI, 'accounts', '--help'],
+    'accounts_networks_list': ['-m', 'test.benchmark.mock_cli', 'accounts', 'networks', '-a', 'ac-benchmark', 'list']
+}
+
+MODULES = (
+    'pureport_client.__main__',
+    'pureport_client.helpers',
+    'pureport_client.util',
+    'yaml',
+    'pkg_resources'
+)
+
+# allowed regression in percent for each kind of measurement
+DEFAULT_THRESHOLDS = {
+    'wall': 25.0,
+    'import': 25.0,
+    'rss': 10.0
+}
+
+# regressions smaller than this are treated as noise
+DEFAULT_MIN_DELTA = {
+    'wall': 0.005,
+    'import': 0.002,
+    'rss': 1024 * 1024
+}
+
+
+def run_process(args, env=None):
+    """Run a Python process and measure it
+
+    :param args: the arguments passed to the Python interpreter
+    :type args: list
+
+    :param env: additional environment variables
+    :type env: dict
+
+    :returns: the wall time in seconds, the peak RSS in bytes and stderr
+    :rtype: tuple
+
+    :raises: RuntimeError
+    """
+    environ = dict(os.environ)
+    environ.update(env or {})
+
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable] + list(args), cwd=ROOT_DIR, env=environ,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = proc.stderr.read()
+    _, status, rusage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    proc.stderr.close()
+
+    if proc.returncode != 0:
+        raise RuntimeError("`{}` exited with status {}:\n{}".format(
+            ' '.join(args), proc.returncode, stderr.decode('utf-8', 'replace')))
+
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    rss = rusage.ru_maxrss if sys.platform == 'darwin' else rusage.ru_maxrss * 1024
+
+    return elapsed, rss, stderr.decode('utf-8', 'replace')
+
+
+def measure_command(args, runs=5):
+    """Measure the cold and warm wall time and peak RSS of a command
+
+    :param args: the arguments passed to the Python interpreter
+    :type args: list
+
+    :param runs: the number of times to run the command
+    :type runs: int
+
+    :returns: the median measurements
+    :rtype: dict
+    """
+    cold, warm, rss = [], [], []
+
+    for _ in range(runs):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            env = {'PUREPORT_CACHE_DIR': cache_dir}
+            elapsed, _, _ = run_process(args, env)
+            cold.append(elapsed)
+            elapsed, peak, _ = run_process(args, env)
+            warm.append(elapsed)
+            rss.append(peak)
+        finally:
+            shutil.rmtree(cache_dir, True)
+
+    return {
+        'cold': statistics.median(cold),
+        'warm': statistics.median(warm),
+        'peak_rss': statistics.median(rss)
+    }
+
+
+def parse_importtime(output, module):
+    """Returns the cumulative import time of a module
+
+    :param output: the stderr of `python -X importtime`
+    :type output: str
+
+    :param module: the name of the module
+    :type module: str
+
+    :returns: the import time in seconds or None
+    :rtype: float
+    """
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1e6
+    return None
+
+
+def measure_import(module, runs=5):
+    """Measure the cumulative cost of importing a module
+
+    :param module: the name of the module
+    :type module: str
+
+    :param runs: the number of times to import the module
+    :type runs: int
+
+    :returns: the median import time in seconds or None if the module
+        is not installed
+    :rtype: float
+    """
+    values = []
+    for _ in range(runs):
+        try:
+            _, _, stderr = run_process(['-X', 'importtime', '-c', 'import {}'.format(module)])
+        except RuntimeError:
+            log.warning("unable to import {}".format(module))
+            return None
+        value = parse_importtime(stderr, module)
+        if value is None:
+            return None
+        values.append(value)
+    return statistics.median(values)
+
+
+def run(runs=5, commands=None, modules=None):
+    """Run the benchmarks
+
+    :param runs: the number of times each measurement is repeated
+    :type runs: int
+
+    :param commands: the names of the commands to run, defaults to all
+    :type commands: list
+
+    :param modules: the modules to import, defaults to `MODULES`
+    :type modules: list
+
+    :returns: the results
+    :rtype: dict
+    """
+    results = {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'runs': runs,
+        'commands': {},
+        'imports': {}
+    }
+
+    for name in commands or sorted(COMMANDS):
+        log.info("measuring command {}".format(name))
+        results['commands'][name] = measure_command(COMMANDS[name], runs)
+
+    for module in modules or MODULES:
+        log.info("measuring import {}".format(module))
+        results['imports'][module] = measure_import(module, runs)
+
+    return results
+
+
+def metrics(results):
+    """Flatten the results into individual measurements
+
+    :param results: the benchmark results
+    :type results: dict
+
+    :returns: a mapping of measurement name to (kind, value)
+    :rtype: dict
+    """
+    items = {}
+    for name, values in results.get('commands', {}).items():
+        items['commands.{}.cold'.format(name)] = ('wall', values['cold'])
+        items['commands.{}.warm'.format(name)] = ('wall', values['warm'])
+        items['commands.{}.peak_rss'.format(name)] = ('rss', values['peak_rss'])
+    for name, value in results.get('imports', {}).items():
+        items['imports.{}'.format(name)] = ('import', value)
+    return items
+
+
+def compare(results, baseline, thresholds=None, min_delta=None):
+    """Compare the results against a baseline
+
+    A measurement regresses when it is larger than the baseline by more
+    than the threshold for its kind, in percent, and by more than the
+    minimum delta for its kind.  A threshold can also be given for a
+    single measurement by its name, for instance `imports.yaml`, which
+    takes precedence over the threshold for its kind.  Measurements
+    missing from either side are ignored.
+
+    :param results: the benchmark results
+    :type results: dict
+
+    :param baseline: the baseline results
+    :type baseline: dict
+
+    :param thresholds: the allowed regression in percent by kind or
+        measurement name, defaults to `DEFAULT_THRESHOLDS`
+    :type thresholds: dict
+
+    :param min_delta: the smallest regression by kind that is reported,
+        defaults to `DEFAULT_MIN_DELTA`
+    :type min_delta: dict
+
+    :returns: a list of (name, baseline value, value, change in percent)
+        for each regression
+    :rtype: list
+    """
+    thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    min_delta = dict(DEFAULT_MIN_DELTA, **(min_delta or {}))
+
+    current = metrics(results)
+    regressions = []
+
+    for name, (kind, base) in sorted(metrics(baseline).items()):
+        if name not in current or not base or current[name][1] is None:
+            continue
+        value = current[name][1]
+        change = (value - base) / base * 100
+        if change > thresholds.get(name, thresholds[kind]) and value - base > min_delta[kind]:
+            regressions.append((name, base, value, change))
+
+    return regressions
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+Runs the command line interface with a mock API client.
+
+This is the same mock client used by the command unit tests, reduced to
+the functions the benchmarked commands call so the benchmark measures the
+CLI instead of the setup of the mock.
+"""
+
+from __future__ import absolute_import
+
+from unittest.mock import MagicMock
+
+from pureport_client import __main__ as main
+
+
+def return_object(query=None, model=None):
+    return []
+
+
+client = MagicMock()
+client.account_id = 'account_id'
+client.find_networks.side_effect = return_object
+
+
+def create_session(options=None, **kwargs):
+    return client
+
+
+if __name__ == '__main__':
+    main.create_session = create_session
+    main.run()
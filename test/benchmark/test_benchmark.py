@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+from test.benchmark import benchmark
+
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       250 |        250 |   _io
+import time:      1500 |       4000 | pureport_client.util
+import time:       900 |      12000 | pureport_client.__main__
+"""
+
+
+def make_results(wall=0.1, imports=0.01, rss=20 * 1024 * 1024):
+    return {
+        'commands': {'help': {'cold': wall * 2, 'warm': wall, 'peak_rss': rss}},
+        'imports': {'yaml': imports, 'pkg_resources': None}
+    }
+
+
+def test_parse_importtime():
+    assert benchmark.parse_importtime(IMPORTTIME, 'pureport_client.__main__') == 0.012
+    assert benchmark.parse_importtime(IMPORTTIME, 'pureport_client.util') == 0.004
+    assert benchmark.parse_importtime(IMPORTTIME, 'yaml') is None
+
+
+def test_metrics():
+    assert benchmark.metrics(make_results()) == {
+        'commands.help.cold': ('wall', 0.2),
+        'commands.help.warm': ('wall', 0.1),
+        'commands.help.peak_rss': ('rss', 20 * 1024 * 1024),
+        'imports.yaml': ('import', 0.01),
+        'imports.pkg_resources': ('import', None)
+    }
+
+
+def test_compare():
+    baseline = make_results()
+
+    assert benchmark.compare(make_results(), baseline) == []
+    assert benchmark.compare(make_results(wall=0.05), baseline) == []
+
+    regressions = benchmark.compare(make_results(wall=0.2), baseline)
+    assert [item[0] for item in regressions] == ['commands.help.cold', 'commands.help.warm']
+    assert regressions[1][1:] == (0.1, 0.2, 100.0)
+
+    assert benchmark.compare(make_results(wall=0.2), baseline, {'wall': 150}) == []
+    assert [item[0] for item in benchmark.compare(make_results(wall=0.2), baseline,
+                                                  {'commands.help.warm': 150})] == ['commands.help.cold']
+
+    # below the minimum delta
+    assert benchmark.compare(make_results(imports=0.0025), make_results(imports=0.001)) == []
+    assert benchmark.compare(make_results(imports=0.02), baseline)[0][0] == 'imports.yaml'
+
+
+def test_measure_command():
+    values = benchmark.measure_command(benchmark.COMMANDS['accounts_networks_list'], runs=1)
+    assert sorted(values) == ['cold', 'peak_rss', 'warm']
+    assert values['cold'] > 0
+    assert values['warm'] > 0
+    assert values['peak_rss'] > 0
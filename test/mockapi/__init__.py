@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+A local stand-in for the Pureport API generated from `test/openapi.json`.
+
+Run the server from the top level directory of the repository:
+
+    python -m test.mockapi --port 8080 --size connections=50000 \\
+        --size auditLog=1000000 --latency 20 --jitter 10 --throttle-rate 0.01
+
+and point the CLI at it:
+
+    pureport -u http://localhost:8080 -k key -s secret accounts audit-log \\
+        -a ac-0000000001 query
+
+Every path of the spec is served with synthetic payloads that conform to
+its response schema.  See `python -m test.mockapi --help`.
+"""
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+from __future__ import absolute_import
+
+import sys
+import logging
+import argparse
+
+from test.mockapi import mockapi
+
+
+def size(value):
+    """Parse a collection size in the form `name=count`
+    """
+    name, sep, count = value.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError("expected name=count, got `{}`".format(value))
+    try:
+        return name.strip(), int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid count `{}`".format(count))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m test.mockapi',
+                                     description="Serve a local stand-in for the Pureport API")
+    parser.add_argument('--host', default='localhost', help="address to listen on (default: localhost)")
+    parser.add_argument('--port', type=int, default=8080, help="port to listen on (default: 8080)")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the generated resources (default: 0)")
+    parser.add_argument('--size', type=size, action='append', default=[],
+                        help="number of resources in a collection, by the last segment of its path, "
+                             "for instance connections=50000 or auditLog=1000000, may be repeated")
+    parser.add_argument('--default-size', type=int, default=mockapi.DEFAULT_SIZE,
+                        help="number of resources in other collections (default: %(default)s)")
+    parser.add_argument('--latency', type=float, default=0, help="milliseconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0,
+                        help="up to this many milliseconds are added to the latency at random")
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help="fraction of requests that fail with a 500 status")
+    parser.add_argument('--throttle-rate', type=float, default=0,
+                        help="fraction of requests that are throttled with a 429 status")
+    parser.add_argument('--retry-after', type=float, default=1,
+                        help="Retry-After header of throttled requests in seconds (default: 1)")
+    parser.add_argument('--interval', type=float, default=mockapi.DEFAULT_INTERVAL,
+                        help="seconds between resources with a timestamp (default: %(default)s)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log every request")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(message)s')
+
+    api = mockapi.MockApi(seed=args.seed, sizes=dict(args.size), default_size=args.default_size,
+                          latency=args.latency / 1000.0, jitter=args.jitter / 1000.0, error_rate=args.error_rate,
+                          throttle_rate=args.throttle_rate, retry_after=args.retry_after, interval=args.interval)
+    server = api.serve(args.host, args.port)
+    print("serving the Pureport API on http://{}:{}".format(*server.server_address[:2]), file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("{requests} requests, {errors} errors, {throttled} throttled".format(**api.counters), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
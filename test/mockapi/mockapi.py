@@ -0,0 +1,612 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+"""
+Serves synthetic responses for the paths of an OpenAPI spec.
+
+Payloads are generated from the response schemas by :class:`Generator`.
+A few variants of each schema are generated with a random number
+generator seeded with the seed of the server, and each resource is a copy
+of the variant chosen by its ID with the ID and timestamp filled in.  A
+resource is the same every time it is returned, whether on its own or as
+part of a collection, and collections of any size are served without
+keeping them in memory.
+
+GET paths that return an array or a page of resources are collections.
+The number of resources in a collection is set by the last literal
+segment of its path, for instance `connections` or `auditLog`.  Paged
+collections honour `pageNumber` and `pageSize`.  Resources that have a
+`timestamp` are ordered newest first, `interval` seconds apart, and
+`startTime`, `endTime` and `sortDirection` are honoured as well.
+"""
+
+from __future__ import absolute_import
+
+import os
+import json
+import math
+import time
+import zlib
+import random
+import calendar
+import threading
+
+from datetime import datetime
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer
+)
+from logging import getLogger
+from urllib.parse import (
+    parse_qs,
+    urlsplit
+)
+
+from pureport_client.helpers import SERVER_DATE_FORMAT
+from pureport_client.routes import RouteRegistry
+
+log = getLogger(__name__)
+
+SPEC_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir, 'openapi.json'))
+
+DEFAULT_SIZE = 10
+
+DEFAULT_PAGE_SIZE = 100
+
+# the number of nested objects generated before objects are left empty
+MAX_DEPTH = 4
+
+# the number of items generated for arrays nested in a resource
+MAX_ITEMS = 3
+
+# the number of distinct resources generated for each schema, resources
+# are copies of one of them with their own ID and timestamp
+VARIANTS = 64
+
+# the number of seconds between resources with a timestamp
+DEFAULT_INTERVAL = 60
+
+JSON_TYPE = 'application/json'
+
+
+def format_time(seconds):
+    return time.strftime('%Y-%m-%dT%H:%M:%S.000000Z', time.gmtime(seconds))
+
+
+def parse_time(value):
+    """Parse a time sent by the client
+
+    :param value: the time formatted with `SERVER_DATE_FORMAT` or as
+        seconds since the epoch
+    :type value: str
+
+    :returns: the time in seconds since the epoch
+    :rtype: float
+
+    :raises: ValueError
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in (SERVER_DATE_FORMAT, '%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
+        try:
+            return calendar.timegm(datetime.strptime(value, fmt).timetuple())
+        except ValueError:
+            pass
+    raise ValueError(value)
+
+
+def response_schema(operation):
+    """Returns the schema of the response to an operation
+
+    :param operation: the operation in the spec
+    :type operation: dict
+
+    :returns: the schema or None if the response has no JSON body
+    :rtype: dict
+    """
+    responses = operation.get('responses') or {}
+    for status in ('200', '201', 'default'):
+        content = (responses.get(status) or {}).get('content') or {}
+        if JSON_TYPE in content:
+            return content[JSON_TYPE].get('schema')
+    return None
+
+
+class Generator(object):
+    """Generates values that conform to the schemas of a spec
+    """
+
+    def __init__(self, spec, max_depth=MAX_DEPTH):
+        """Initialize the instance
+
+        :param spec: the OpenAPI spec
+        :type spec: dict
+
+        :param max_depth: the number of nested objects generated
+        :type max_depth: int
+        """
+        self.spec = spec
+        self.max_depth = max_depth
+
+    def resolve(self, schema):
+        """Follow the references of a schema
+
+        :param schema: the schema
+        :type schema: dict
+
+        :returns: the name of the referenced schema, or None, and the
+            schema
+        :rtype: tuple
+        """
+        name = None
+        while schema and '$ref' in schema:
+            name = schema['$ref'].rsplit('/', 1)[-1]
+            schema = self.spec['components']['schemas'][name]
+        return name, schema or {}
+
+    def generate(self, schema, rnd, depth=0, name=None, dispatch=True):
+        """Generate a value for a schema
+
+        :param schema: the schema
+        :type schema: dict
+
+        :param rnd: the random number generator
+        :type rnd: `random.Random`
+
+        :param depth: the number of objects the value is nested in
+        :type depth: int
+
+        :param name: the name of the property the value is for
+        :type name: str
+
+        :param dispatch: whether a schema with a discriminator is
+            replaced by one of its subtypes
+        :type dispatch: bool
+
+        :returns: the value
+        :rtype: object
+        """
+        _, schema = self.resolve(schema)
+
+        discriminator = schema.get('discriminator') or {}
+        if dispatch and discriminator.get('mapping'):
+            value = rnd.choice(sorted(discriminator['mapping']))
+            result = self.generate({'$ref': discriminator['mapping'][value]}, rnd, depth, name, dispatch=False)
+            result[discriminator['propertyName']] = value
+            return result
+
+        if 'allOf' in schema:
+            result = {}
+            for item in schema['allOf']:
+                value = self.generate(item, rnd, depth, name, dispatch=False)
+                if isinstance(value, dict):
+                    result.update(value)
+            return result
+
+        if 'enum' in schema:
+            return rnd.choice(schema['enum'])
+
+        kind = schema.get('type') or ('object' if 'properties' in schema else None)
+        if kind == 'object':
+            return self.object(schema, rnd, depth, name)
+        if kind == 'array':
+            return self.array(schema, rnd, depth, name)
+        return self.scalar(kind, schema, rnd, name)
+
+    def object(self, schema, rnd, depth=0, name=None):
+        if depth >= self.max_depth:
+            return {}
+        result = {key: self.generate(value, rnd, depth + 1, key)
+                  for key, value in sorted((schema.get('properties') or {}).items())}
+        if isinstance(schema.get('additionalProperties'), dict):
+            result['{}-{}'.format(name or 'key', rnd.randrange(100))] = \
+                self.generate(schema['additionalProperties'], rnd, depth + 1, name)
+        return result
+
+    def array(self, schema, rnd, depth=0, name=None):
+        if depth >= self.max_depth:
+            return []
+        minimum = schema.get('minItems', 0)
+        count = rnd.randint(minimum, max(minimum, min(schema.get('maxItems', MAX_ITEMS), MAX_ITEMS)))
+        return [self.generate(schema.get('items') or {}, rnd, depth + 1, name) for _ in range(count)]
+
+    def scalar(self, kind, schema, rnd, name=None):
+        if kind == 'string':
+            return self.string(schema, rnd, name)
+        if kind == 'integer':
+            return rnd.randint(int(schema.get('minimum', 0)), int(schema.get('maximum', 1000)))
+        if kind == 'number':
+            return round(rnd.uniform(schema.get('minimum', 0), schema.get('maximum', 1000)), 3)
+        if kind == 'boolean':
+            return rnd.random() < 0.5
+        return None
+
+    def string(self, schema, rnd, name=None):
+        if schema.get('format') == 'date-time':
+            return format_time(rnd.randrange(1500000000, 1600000000))
+        if schema.get('format') == 'date':
+            return time.strftime('%Y-%m-%d', time.gmtime(rnd.randrange(1500000000, 1600000000)))
+        if isinstance(schema.get('example'), str):
+            return schema['example']
+        value = '{}-{:08x}'.format(name or 'value', rnd.getrandbits(32))
+        return value[:schema.get('maxLength', len(value))].ljust(schema.get('minLength', 0), 'x')
+
+
+class Collection(object):
+    """A collection of resources served by a GET path
+    """
+
+    def __init__(self, key, schema, paged, size, now, interval):
+        """Initialize the instance
+
+        :param key: the name used to configure the size of the collection
+        :type key: str
+
+        :param schema: the schema of the resources
+        :type schema: dict
+
+        :param paged: whether the path returns pages of resources
+        :type paged: bool
+
+        :param size: the number of resources
+        :type size: int
+
+        :param now: the time of the newest resource
+        :type now: float
+
+        :param interval: the number of seconds between resources
+        :type interval: float
+        """
+        self.key = key
+        self.schema = schema
+        self.paged = paged
+        self.size = size
+        self.now = now
+        self.interval = interval
+
+    def timestamp(self, index):
+        return self.now - index * self.interval
+
+    def window(self, start=None, end=None):
+        """Returns the indexes of the resources between two times
+
+        :param start: the earliest time, inclusive
+        :type start: float
+
+        :param end: the latest time, exclusive
+        :type end: float
+
+        :returns: the first and last index plus one
+        :rtype: tuple
+        """
+        first, last = 0, self.size
+        if end is not None:
+            first = max(first, int(math.floor((self.now - end) / self.interval)) + 1)
+        if start is not None:
+            last = min(last, int(math.floor((self.now - start) / self.interval)) + 1)
+        return first, max(first, last)
+
+
+class MockApi(object):
+    """Answers requests for the paths of an OpenAPI spec
+    """
+
+    def __init__(self, spec=None, seed=0, sizes=None, default_size=DEFAULT_SIZE, latency=0, jitter=0,
+                 error_rate=0, throttle_rate=0, retry_after=1, interval=DEFAULT_INTERVAL, now=None):
+        """Initialize the instance
+
+        :param spec: the OpenAPI spec, defaults to `test/openapi.json`
+        :type spec: dict
+
+        :param seed: the seed of the generated resources
+        :type seed: int
+
+        :param sizes: the number of resources of collections by the last
+            literal segment of their path, for instance `connections`
+        :type sizes: dict
+
+        :param default_size: the number of resources of other collections
+        :type default_size: int
+
+        :param latency: the number of seconds added to every response
+        :type latency: float
+
+        :param jitter: up to this many seconds are added to the latency
+            at random
+        :type jitter: float
+
+        :param error_rate: the fraction of requests that fail with a 500
+            status
+        :type error_rate: float
+
+        :param throttle_rate: the fraction of requests that are throttled
+            with a 429 status
+        :type throttle_rate: float
+
+        :param retry_after: the `Retry-After` header of throttled requests
+        :type retry_after: float
+
+        :param interval: the number of seconds between resources with a
+            timestamp
+        :type interval: float
+
+        :param now: the time of the newest resource with a timestamp,
+            defaults to now
+        :type now: float
+        """
+        if spec is None:
+            with open(SPEC_PATH) as f:
+                spec = json.load(f)
+        self.spec = spec
+        self.spec_data = json.dumps(spec).encode('utf-8')
+        self.generator = Generator(spec)
+        self.seed = seed
+        self.sizes = dict(sizes or {})
+        self.default_size = default_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.interval = interval
+        self.now = (int(time.time()) // interval) * interval if now is None else now
+        self.routes = RouteRegistry()
+        self.routes.load_spec(spec)
+        self.counters = dict.fromkeys(('requests', 'errors', 'throttled'), 0)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._collections = {}
+        self._variants = {}
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def resource(self, schema, ident, index=None, collection=None):
+        """Generate a resource
+
+        :param schema: the schema of the resource
+        :type schema: dict
+
+        :param ident: the ID of the resource
+        :type ident: str
+
+        :param index: the position of the resource in its collection
+        :type index: int
+
+        :param collection: the collection the resource belongs to
+        :type collection: `Collection`
+
+        :returns: the resource
+        :rtype: object
+        """
+        name, _ = self.generator.resolve(schema)
+        key = (name or id(schema), zlib.crc32(str(ident).encode('utf-8')) % VARIANTS)
+        value = self._variants.get(key)
+        if value is None:
+            rnd = random.Random('{}:{}:{}'.format(self.seed, key[0], key[1]))
+            value = self._variants[key] = self.generator.generate(schema, rnd)
+        if isinstance(value, dict):
+            # the nested values are shared by the resources of a variant
+            value = dict(value)
+            if 'id' in value:
+                value['id'] = ident
+            if collection is not None and index is not None and 'timestamp' in value:
+                value['timestamp'] = format_time(collection.timestamp(index))
+        return value
+
+    def resource_id(self, schema, index):
+        """Returns the ID of the resource at a position of a collection
+
+        The ID uses the prefix of the example ID of the schema, for
+        instance `conn-0000000001` for connections.
+        """
+        name, resolved = self.generator.resolve(schema)
+        example = ((resolved.get('properties') or {}).get('id') or {}).get('example') or ''
+        prefix = example.split('-', 1)[0] if '-' in example else (name or 'item').lower()
+        return '{}-{:010d}'.format(prefix, index + 1)
+
+    def collection(self, template, schema):
+        """Returns the collection served by a GET path or None
+        """
+        if template in self._collections:
+            return self._collections[template]
+
+        _, resolved = self.generator.resolve(schema)
+        collection = None
+        properties = resolved.get('properties') or {}
+        if resolved.get('type') == 'array':
+            item, paged = resolved.get('items') or {}, False
+        elif 'content' in properties and 'totalElements' in properties:
+            item, paged = properties['content'].get('items') or {}, True
+        else:
+            item = None
+        if item is not None:
+            key = [segment for segment in template.split('/') if segment and not segment.startswith('{')][-1]
+            collection = Collection(key, item, paged, self.sizes.get(key, self.default_size), self.now,
+                                    self.interval)
+        self._collections[template] = collection
+        return collection
+
+    def list(self, collection, query):
+        """Returns the resources of a collection for a request
+        """
+        def param(name, default=None):
+            return (query.get(name) or [default])[0]
+
+        def timed(name):
+            value = param(name)
+            return parse_time(value) if value else None
+
+        if not collection.paged:
+            return [self.resource(collection.schema, self.resource_id(collection.schema, index), index, collection)
+                    for index in range(collection.size)]
+
+        first, last = collection.window(timed('startTime'), timed('endTime'))
+        page_number = int(param('pageNumber', 0))
+        page_size = max(1, int(param('pageSize', DEFAULT_PAGE_SIZE)))
+        total = last - first
+        positions = range(page_number * page_size, min(total, (page_number + 1) * page_size))
+        if (param('sortDirection') or 'DESC').upper() == 'ASC':
+            indexes = [last - 1 - position for position in positions]
+        else:
+            indexes = [first + position for position in positions]
+
+        return {
+            'content': [self.resource(collection.schema, self.resource_id(collection.schema, index), index,
+                                      collection) for index in indexes],
+            'pageNumber': page_number,
+            'pageSize': page_size,
+            'totalElements': total,
+            'sort': {'property': param('sort', 'timestamp'), 'direction': (param('sortDirection') or 'DESC').upper()}
+        }
+
+    def error(self, status, code, message, headers=None):
+        return status, headers or {}, {'status': status, 'code': code, 'message': message}
+
+    def handle(self, method, url, body=None):
+        """Answer a request
+
+        :param method: the HTTP method
+        :type method: str
+
+        :param url: the path and query string of the request
+        :type url: str
+
+        :param body: the request body
+        :type body: bytes
+
+        :returns: the status, the headers and the JSON body of the
+            response
+        :rtype: tuple
+        """
+        method = method.upper()
+        parts = urlsplit(url)
+        self.count('requests')
+
+        if parts.path == '/openapi.json':
+            return 200, {}, self.spec
+
+        injected = self.inject()
+        if injected is not None:
+            return injected
+
+        found = self.routes.match(parts.path)
+        if found is None:
+            return self.error(404, 'NOT_FOUND', "{} not found".format(parts.path))
+        route, params = found
+        operation = self.spec['paths'][route.template].get(method.lower())
+        if operation is None:
+            return self.error(405, 'METHOD_NOT_ALLOWED', "{} is not allowed".format(method))
+
+        schema = response_schema(operation)
+        if route.template in ('/login', '/login/refresh'):
+            return self.login()
+        if schema is None:
+            return 200, {}, None
+
+        collection = self.collection(route.template, schema) if method == 'GET' else None
+        if collection is not None:
+            try:
+                return 200, {}, self.list(collection, parse_qs(parts.query))
+            except ValueError as exc:
+                return self.error(400, 'BAD_REQUEST', "invalid parameter: {}".format(exc))
+
+        # a single resource is identified by the last parameter of the path
+        ident = params[route.params[-1]] if route.params else route.template
+        return self.submit(method, schema, ident, body)
+
+    def inject(self):
+        """Delay a request and answer it with an injected failure
+
+        :returns: the response of an injected failure or None
+        :rtype: tuple
+        """
+        with self._lock:
+            roll = self._random.random()
+            delay = self.latency + self._random.uniform(0, self.jitter) if self.jitter else self.latency
+        if delay:
+            time.sleep(delay)
+        if roll < self.throttle_rate:
+            self.count('throttled')
+            # Retry-After is a whole number of seconds
+            return self.error(429, 'TOO_MANY_REQUESTS', "too many requests",
+                              {'Retry-After': str(int(math.ceil(self.retry_after)))})
+        if roll < self.throttle_rate + self.error_rate:
+            self.count('errors')
+            return self.error(500, 'INTERNAL_SERVER_ERROR', "injected error")
+        return None
+
+    def login(self):
+        rnd = random.Random()
+        return 200, {}, {'access_token': 'token-{:016x}'.format(rnd.getrandbits(64)),
+                         'refresh_token': 'refresh-{:016x}'.format(rnd.getrandbits(64)),
+                         'expires_in': 3600, 'token_type': 'Bearer'}
+
+    def submit(self, method, schema, ident, body=None):
+        """Returns a resource, updated with the body of a POST or PUT
+        """
+        value = self.resource(schema, ident)
+        if method in ('POST', 'PUT') and body and isinstance(value, dict):
+            try:
+                submitted = json.loads(body)
+            except ValueError:
+                return self.error(400, 'BAD_REQUEST', "invalid JSON body")
+            if isinstance(submitted, dict):
+                value.update(submitted)
+            if method == 'POST' and 'id' in value:
+                value['id'] = self.resource_id(schema, random.Random().randrange(10 ** 9))
+        return 200, {}, value
+
+    def serve(self, host='localhost', port=0):
+        """Create an HTTP server for the API
+
+        The server handles each connection on its own thread and keeps
+        connections alive.  Call `serve_forever` to start it.
+
+        :param host: the address to listen on
+        :type host: str
+
+        :param port: the port, 0 for any free port
+        :type port: int
+
+        :returns: the server
+        :rtype: `http.server.ThreadingHTTPServer`
+        """
+        server = ThreadingHTTPServer((host, port), _handler(self))
+        server.daemon_threads = True
+        return server
+
+
+def _handler(api):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        protocol_version = 'HTTP/1.1'
+
+        # the headers and the body are written separately
+        disable_nagle_algorithm = True
+
+        def respond(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else None
+            status, headers, value = api.handle(self.command, self.path, body)
+            data = api.spec_data if value is api.spec else json.dumps(value).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', JSON_TYPE)
+            self.send_header('Content-Length', str(len(data)))
+            for name, item in headers.items():
+                self.send_header(name, item)
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = respond
+
+        def log_message(self, fmt, *args):
+            log.debug(fmt % args)
+
+    return Handler
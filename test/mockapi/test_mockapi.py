@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+import json
+import threading
+
+from collections import namedtuple
+from unittest.mock import patch
+
+from pureport_client import helpers
+from pureport_client.session import Session
+
+from test.mockapi import mockapi
+from test.utils import utils
+
+
+Credentials = namedtuple('Credentials', ('key', 'secret'))
+
+NOW = 1600000000
+
+
+def test_collections():
+    api = mockapi.MockApi(sizes={'connections': 1000, 'auditLog': 1000000}, now=NOW)
+
+    status, _, connections = api.handle('GET', '/accounts/ac-1/connections')
+    assert status == 200
+    assert len(connections) == 1000
+    assert connections[0]['id'] == 'conn-0000000001'
+    assert all(item['type'] for item in connections)
+
+    # a resource is the same on its own and in its collection
+    assert api.handle('GET', '/connections/conn-0000000500')[2] == connections[499]
+
+    status, _, page = api.handle('GET', '/accounts/ac-1/auditLog?pageNumber=2&pageSize=50')
+    assert (page['totalElements'], page['pageNumber'], page['pageSize']) == (1000000, 2, 50)
+    assert len(page['content']) == 50
+    assert page['content'][0]['timestamp'] == mockapi.format_time(NOW - 100 * mockapi.DEFAULT_INTERVAL)
+
+    start = mockapi.format_time(NOW - 10 * mockapi.DEFAULT_INTERVAL)
+    end = mockapi.format_time(NOW - 5 * mockapi.DEFAULT_INTERVAL)
+    url = '/accounts/ac-1/auditLog?startTime={}&endTime={}&sortDirection=ASC'.format(start, end)
+    page = api.handle('GET', url)[2]
+    assert page['totalElements'] == 5
+    assert [item['timestamp'] for item in page['content']] == [
+        mockapi.format_time(NOW - index * mockapi.DEFAULT_INTERVAL) for index in range(10, 5, -1)]
+
+    assert api.handle('GET', '/tasks')[2]['totalElements'] == mockapi.DEFAULT_SIZE
+
+
+def test_errors():
+    api = mockapi.MockApi()
+    assert api.handle('GET', '/unknown')[0] == 404
+    assert api.handle('PATCH', '/connections/conn-1')[0] == 405
+    assert api.handle('GET', '/accounts/ac-1/auditLog?startTime=soon')[0] == 400
+
+    api = mockapi.MockApi(throttle_rate=1, retry_after=2)
+    assert api.handle('GET', '/tasks')[:2] == (429, {'Retry-After': '2'})
+    api = mockapi.MockApi(throttle_rate=1, retry_after=0.5)
+    assert api.handle('GET', '/tasks')[:2] == (429, {'Retry-After': '1'})
+
+    api = mockapi.MockApi(error_rate=1)
+    assert api.handle('GET', '/tasks')[0] == 500
+    assert api.counters == {'requests': 1, 'errors': 1, 'throttled': 0}
+
+
+def test_server():
+    api = mockapi.MockApi(sizes={'auditLog': 250})
+    server = api.serve()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with utils.tempdir() as tmpdir, patch.dict(os.environ, {'PUREPORT_CACHE_DIR': tmpdir}):
+        base_url = 'http://localhost:{}'.format(server.server_port)
+        session = Session(Credentials('key', 'secret'), base_url)
+
+        network = session.put('/networks/network-1', body=json.dumps({'name': 'test'})).json
+        assert (network['id'], network['name']) == ('network-1', 'test')
+
+        def query(page_number=0, page_size=100):
+            return session.get('/accounts/ac-1/auditLog',
+                               query={'pageNumber': page_number, 'pageSize': page_size}).json
+
+        assert len(list(helpers.paginate(query))) == 250
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+import atexit
+import shutil
+import tempfile
+
+# keep the unit tests from reading or writing the per-user cache
+os.environ['PUREPORT_CACHE_DIR'] = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, os.environ['PUREPORT_CACHE_DIR'], True)
@@ -20,6 +20,7 @@ from click import group, pass_context, version_option
 from click.testing import CliRunner
 
 from pureport_client import __main__ as main
+from pureport_client.util import LazyGroup
 
 
 path = os.path.join(os.path.dirname(__file__), os.path.pardir, os.path.pardir, 'openapi.json')
@@ -41,7 +42,7 @@ def create_mock_cli(pureport_client):
     :param Client pureport_client:
     :rtype: click.Command
     """
-    @group(context_settings={'auto_envvar_prefix': 'PUREPORT'})
+    @group(cls=LazyGroup, context_settings={'auto_envvar_prefix': 'PUREPORT'})
     @version_option()
     @pass_context
     def cli(ctx):
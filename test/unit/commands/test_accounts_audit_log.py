@@ -5,9 +5,24 @@
 
 from __future__ import absolute_import
 
+import io
 import os
+import json
 
-from . import run_command_test
+from unittest.mock import patch
+
+from click import UsageError
+from pytest import raises
+
+from pureport_client.commands.accounts.audit_log import Command
+
+from . import (
+    cli,
+    client,
+    response,
+    run_command_test,
+    runner
+)
 from ...utils import utils
 
 os.environ['PUREPORT_ACCOUNT_ID'] = utils.random_string()
@@ -15,3 +30,84 @@ os.environ['PUREPORT_ACCOUNT_ID'] = utils.random_string()
 
 def test_query():
     run_command_test('accounts audit-log', 'query')
+
+
+def audit_log_pages(url, query=None, **kwargs):
+    page_number = int((query or {}).get('pageNumber', 0))
+    start = page_number * 100
+    content = [{'correlationId': str(index)} for index in range(start, min(start + 100, 250))]
+    page = {'content': content, 'totalElements': 250, 'pageSize': 100, 'pageNumber': page_number}
+    return response(json=page)
+
+
+def test_query_all():
+    with patch.object(client, 'get', side_effect=audit_log_pages) as get:
+        result, stream = run_command_test('accounts audit-log', 'query', cli_options_post='--all',
+                                          all_pages=True)
+        lines = result.output.splitlines()
+        assert [json.loads(line)['correlationId'] for line in lines] == [str(index) for index in range(250)]
+
+        output = io.StringIO()
+        stream.write_lines(output)
+        assert len(output.getvalue().splitlines()) == 250
+
+        # no more pages are requested once there are enough entries
+        get.reset_mock()
+        result, _ = run_command_test('accounts audit-log', 'query', cli_options_post='--all --max-items 150',
+                                     all_pages=True, max_items=150)
+        assert len(result.output.splitlines()) == 150
+        assert get.call_count == 2
+
+        result, _ = run_command_test('accounts audit-log', 'query', cli_options_post='--all --parallel 3')
+        assert len(result.output.splitlines()) == 250
+
+    # the options of --all are refused instead of being ignored
+    for options in (['--max-items', '10'], ['--parallel', '3']):
+        result = runner.invoke(cli, args=['accounts', 'audit-log', 'query'] + options)
+        assert result.exit_code == 2
+        assert 'can only be used with --all' in result.output
+    with raises(UsageError):
+        Command(client, None).query(max_items=10)
+
+
+def test_sync():
+    entries = [{'timestamp': '2020-01-01T00:{:02d}:00.000000Z'.format(minute), 'correlationId': str(minute)}
+               for minute in range(25)]
+
+    def audit_log(url, query=None, **kwargs):
+        assert (query['sort'], query['sortDirection']) == ('timestamp', 'ASC')
+        selected = [entry for entry in entries if entry['timestamp'] >= query.get('startTime', '')]
+        page_number, page_size = int(query.get('pageNumber', 0)), int(query['pageSize'])
+        page = {'content': selected[page_number * page_size:(page_number + 1) * page_size],
+                'totalElements': len(selected), 'pageSize': page_size, 'pageNumber': page_number}
+        return response(json=page)
+
+    with utils.tempdir() as tmpdir, patch.object(client, 'get', side_effect=audit_log):
+        database = os.path.join(tmpdir, 'audit.sqlite')
+        options = '--database {} --page_size 10'.format(database)
+        result, summary = run_command_test('accounts audit-log', 'sync', cli_options_post=options,
+                                           database=database, page_size=10)
+        assert json.loads(result.output)['added'] == 25
+        assert summary == {'database': database, 'received': 1, 'added': 0, 'newest': entries[-1]['timestamp']}
+
+        # only the entries since the newest one are requested
+        entries.extend({'timestamp': '2020-01-01T01:{:02d}:00.000000Z'.format(minute), 'correlationId': str(minute)}
+                       for minute in range(5))
+        result, _ = run_command_test('accounts audit-log', 'sync', cli_options_post=options + ' --format json',
+                                     database=database, page_size=10)
+        assert json.loads(result.output) == {'database': database, 'received': 6, 'added': 5,
+                                             'newest': entries[-1]['timestamp']}
+
+        # identical entries are all saved, even across pages, and only once
+        duplicate = {'timestamp': '2020-01-01T01:10:00.000000Z', 'eventType': 'NETWORK_UPDATE'}
+        entries.extend(dict(duplicate) for _ in range(12))
+        for received, added in ((13, 12), (12, 0)):
+            result, _ = run_command_test('accounts audit-log', 'sync', cli_options_post=options + ' --format json',
+                                         database=database, page_size=10)
+            assert json.loads(result.output)['received'] == received
+            assert json.loads(result.output)['added'] == added
+
+        entries.append(dict(duplicate))
+        result, _ = run_command_test('accounts audit-log', 'sync', cli_options_post=options + ' --format json',
+                                     database=database, page_size=10)
+        assert json.loads(result.output)['added'] == 1
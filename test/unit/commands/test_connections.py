@@ -6,7 +6,13 @@
 
 from __future__ import absolute_import
 
-from . import run_command_test
+from unittest.mock import MagicMock
+
+from pureport.exceptions import PureportTransportError
+
+from pureport_client.commands.connections import Command
+
+from . import cli, run_command_test, runner, Response
 from ...utils import utils
 
 
@@ -14,6 +20,28 @@ def test_get():
     run_command_test('connections', 'get', utils.random_string())
 
 
+def test_get_many():
+    result = runner.invoke(cli, ['connections', 'get', '--parallel', '2', '--ids-from', '-', 'conn-1', 'conn-2'],
+                           input='conn-3\n\n# comment\nconn-4\n')
+    assert result.exit_code == 0, result.output
+
+
+def test_get_many_errors():
+    def get(url):
+        if url == '/connections/conn-2':
+            raise PureportTransportError('not found')
+        return Response(200, None, None, {'id': url.split('/')[-1]})
+
+    client = MagicMock()
+    client.get.side_effect = get
+
+    results = Command(client).get(['conn-1', 'conn-2', 'conn-3'])
+    assert results == [{'id': 'conn-1'}, {'id': 'conn-2', 'error': 'not found'}, {'id': 'conn-3'}]
+    assert results.errors == [{'id': 'conn-2', 'error': 'not found'}]
+
+    assert Command(client).get(['conn-1']) == {'id': 'conn-1'}
+
+
 def test_update():
     run_command_test('connections', 'update', {'id': utils.random_string()})
 
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+import re
+import json
+import time
+import asyncio
+
+from collections import namedtuple
+from http.client import HTTPException
+
+import pytest
+
+from click import UsageError
+
+from pureport.exceptions import PureportHttpError
+
+from pureport_client import aio, helpers
+from pureport_client.commands.accounts import Command as Accounts
+from pureport_client.commands.accounts.audit_log import Command as AuditLog
+from pureport_client.commands.networks import Command as Networks
+
+
+Credentials = namedtuple('Credentials', ('key', 'secret'))
+
+SPEC = open(os.path.join(os.path.dirname(__file__), os.path.pardir, 'openapi.json'), 'rb').read()
+
+ROUTES = {
+    ('POST', '/login'): {'access_token': 'token', 'expires_in': 3600},
+    ('GET', '/accounts'): [{'id': 'ac-1', 'parent': {'id': 'ac-0'}}],
+    ('GET', '/accounts/ac-1/networks'): [{'id': 'network-1', 'name': 'Network 1'}],
+    ('GET', '/networks/network-1'): {'id': 'network-1', 'name': 'Network 1'},
+    ('GET', '/accounts/ac-1/auditLog'): {'content': [{'timestamp': '2020-01-01T00:00:00.000Z'}],
+                                         'totalElements': 1, 'pageSize': 10, 'pageNumber': 0},
+    ('GET', '/pages'): None,
+}
+
+
+class Server(object):
+    """A minimal HTTP/1.1 server for the Pureport API
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = []
+        self.counter = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode().split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line == b'\r\n':
+                        break
+                    name, _, value = line.decode().partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                await reader.readexactly(int(headers.get('content-length', 0)))
+
+                path, _, query = target.partition('?')
+                self.requests.append((method, path, query, headers))
+                writer.write(self.respond(method, path, query))
+                await writer.drain()
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def respond(self, method, path, query):
+        if path == '/openapi.json':
+            return b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s' % (len(SPEC), SPEC)
+
+        if path == '/pages':
+            number = int(dict(item.split('=') for item in query.split('&') if item).get('page_number', 0))
+            body = {'content': [number * 2, number * 2 + 1], 'totalElements': 5,
+                    'pageSize': 2, 'pageNumber': number}
+        elif path == '/counter':
+            self.counter += 1
+            body = self.counter
+        elif (method, path) in ROUTES:
+            body = ROUTES[(method, path)]
+        elif re.match(r'/networks/network-[0-4]$', path):
+            body = {'id': path.rpartition('/')[2], 'name': 'Network'}
+        else:
+            body = json.dumps({'status': 404, 'message': 'not found'}).encode()
+            return b'HTTP/1.1 404 Not Found\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body)
+
+        body = json.dumps(body).encode()
+        if path.startswith('/networks'):
+            # send the body in chunks
+            chunks = b''.join(b'%x\r\n%s\r\n' % (len(body[i:i + 10]), body[i:i + 10])
+                              for i in range(0, len(body), 10))
+            return b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n' + chunks + b'0\r\n\r\n'
+        return b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body)
+
+
+def run(test):
+    async def main():
+        server = Server()
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            async with aio.AsyncSession(Credentials('key', 'secret'), 'http://127.0.0.1:{}'.format(port)) as session:
+                await test(session, server)
+        finally:
+            listener.close()
+            await listener.wait_closed()
+    asyncio.run(main())
+
+
+def test_session():
+    async def test(session, server):
+        responses = await asyncio.gather(*(session.get('/networks/network-1') for _ in range(5)))
+        assert [resp.json['id'] for resp in responses] == ['network-1'] * 5
+
+        # the connections are reused
+        await session.get('/networks/network-1')
+        assert server.connections <= 5
+        assert server.requests[0][:2] == ('POST', '/login')
+        assert server.requests[-1][3]['authorization'] == 'Bearer token'
+
+        with pytest.raises(PureportHttpError):
+            await session.get('/unknown')
+
+        assert await session.get_account_id() == 'ac-1'
+
+    run(test)
+
+
+def test_coalesced():
+    async def test(session, server):
+        responses = await asyncio.gather(*(session.get('/counter') for _ in range(5)))
+        assert [resp.json for resp in responses] == [1] * 5
+        assert server.counter == 1
+
+        assert (await session.get('/counter')).json == 2
+
+    run(test)
+
+
+def test_commands():
+    async def test(session, server):
+        networks = aio.asynchronous(Networks)(session)
+        assert isinstance(networks, aio.AsyncCommandBase)
+        assert (await networks.get('network-1'))['name'] == 'Network 1'
+
+        account_networks = await aio.asynchronous(Accounts)(session).networks('ac-1')
+        assert isinstance(account_networks, aio.AsyncAccountsMixin)
+        assert account_networks.account_id == 'ac-1'
+        assert await account_networks('get', 'networks') == [{'id': 'network-1', 'name': 'Network 1'}]
+
+        items = await account_networks.list()
+        assert [item.id for item in items] == ['network-1']
+
+    run(test)
+
+
+def test_commands_many_ids():
+    async def test(session, server):
+        networks = aio.asynchronous(Networks)(session)
+        ids = ['network-{}'.format(index) for index in range(8)]
+        results = await networks.get(ids, parallel=4)
+
+        # the IDs are looked up at the same time and in order
+        assert [item['id'] for item in results] == ids
+        assert [item['id'] for item in results.errors] == ids[5:]
+        assert 'error' not in results[0]
+        assert server.connections > 1
+
+        assert (await networks.get(['network-1']))['id'] == 'network-1'
+        with pytest.raises(UsageError):
+            await networks.get([])
+
+    run(test)
+
+
+def test_read_response():
+    async def read(data, method='GET'):
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        response, keep_alive = await aio.read_response(reader, method)
+        return response.status, response.headers.get('X-Test'), response.data, keep_alive
+
+    async def test():
+        head = b'HTTP/1.1 200 OK\r\nX-Test: a\r\n'
+        assert await read(head + b'Content-Length: 3\r\n\r\nabcdef') == (200, 'a', b'abc', True)
+
+        # chunk extensions and trailers are skipped
+        chunked = b'Transfer-Encoding: chunked\r\n\r\n3;ext=1\r\nabc\r\n2\r\nde\r\n0\r\nTrailer: x\r\n\r\n'
+        assert await read(b'HTTP/1.1 100 Continue\r\n\r\n' + head + chunked) == (200, 'a', b'abcde', True)
+
+        assert await read(head + b'Connection: close\r\nContent-Length: 0\r\n\r\n') == (200, 'a', b'', False)
+        assert await read(b'HTTP/1.0 200 OK\r\nConnection: keep-alive\r\nContent-Length: 1\r\n\r\na') == \
+            (200, None, b'a', True)
+        # a body without a length is read until the connection is closed
+        assert await read(b'HTTP/1.1 200 OK\r\n\r\nabc') == (200, None, b'abc', False)
+        assert await read(head + b'Content-Length: 3\r\n\r\n', 'HEAD') == (200, 'a', b'', True)
+
+        for data in (b'SPDY/3 200 OK\r\n\r\n', b'HTTP/1.1 2xx OK\r\n\r\n',
+                     head + b'Transfer-Encoding: chunked\r\n\r\nzz\r\n',
+                     b'HTTP/1.1 101 Switching Protocols\r\n\r\n'):
+            with pytest.raises(HTTPException):
+                await read(data)
+        with pytest.raises(ConnectionResetError):
+            await read(b'')
+
+    asyncio.run(test())
+
+
+def test_keep_alive():
+    async def test(session, server):
+        for _ in range(3):
+            # sent with the chunked transfer encoding
+            assert (await session.get('/networks/network-1')).json['id'] == 'network-1'
+            assert (await session.get('/counter')).json
+        assert server.connections == 1
+
+    run(test)
+
+
+def test_run_sleeps(monkeypatch):
+    # retries must not block the event loop
+    monkeypatch.setattr(helpers.time, 'sleep', None)
+
+    @helpers.retry(ValueError, tries=5, delay=0.01)
+    def poll(client):
+        value = client('GET', '/counter').json
+        if value < 3:
+            raise ValueError()
+        return value
+
+    async def test(session, server):
+        started = time.monotonic()
+        assert await session.run(poll) == 3
+        assert server.counter == 3
+        assert time.monotonic() - started >= 0.03
+
+    run(test)
+
+
+def test_synchronous_only(tmpdir):
+    async def test(session, server):
+        audit_log = aio.asynchronous(AuditLog)(session, 'ac-1')
+        assert (await audit_log.query())['totalElements'] == 1
+        requests = len(server.requests)
+
+        # paging or saving pages between requests would be repeated for
+        # every request
+        with pytest.raises(NotImplementedError):
+            await audit_log.query(all_pages=True)
+        database = str(tmpdir.join('audit.sqlite'))
+        with pytest.raises(NotImplementedError):
+            await audit_log.sync(database=database)
+        assert len(server.requests) == requests
+        assert not os.path.exists(database)
+
+    run(test)
+
+
+def test_paginate():
+    async def test(session, server):
+        async def pages(page_number=0):
+            return (await session.get('/pages', query={'page_number': page_number})).json
+
+        assert [item async for item in aio.paginate(pages)] == [0, 1, 2, 3, 4, 5]
+
+    run(test)
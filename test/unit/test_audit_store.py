@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+
+from collections import Counter
+from unittest.mock import patch
+
+from pureport_client import audit_store
+
+from ..utils import utils
+
+
+def test_store_path():
+    with utils.tempdir() as tmpdir, patch.dict(os.environ, {'PUREPORT_CACHE_DIR': tmpdir}):
+        assert audit_store.store_path('ac-1/2') == os.path.join(tmpdir, 'audit-log', 'ac-1_2.sqlite')
+
+
+def test_entry_id():
+    entry = {'timestamp': '2020-01-01T00:00:00.000000Z', 'eventType': 'NETWORK_CREATE'}
+    assert audit_store.entry_id(entry) == audit_store.entry_id(dict(reversed(list(entry.items()))))
+    assert audit_store.entry_id(dict(entry, eventType='NETWORK_DELETE')) != audit_store.entry_id(entry)
+    assert audit_store.entry_id(dict(entry, id='audit-1')) == 'audit-1'
+    assert audit_store.entry_id(entry, 1) != audit_store.entry_id(entry)
+
+
+def test_store():
+    first = {'timestamp': '2020-01-01T00:00:00.000000Z', 'correlationId': '1'}
+    second = {'timestamp': '2020-01-02T00:00:00.000000Z', 'correlationId': '2'}
+
+    with utils.tempdir() as tmpdir:
+        path = os.path.join(tmpdir, 'audit-log', 'ac-1.sqlite')
+        store = audit_store.AuditStore(path)
+        assert store.newest() is None
+        assert store.add([first, second]) == 2
+        assert store.add([second]) == 0
+        store.close()
+
+        store = audit_store.AuditStore(path)
+        assert (store.count(), store.newest()) == (2, second['timestamp'])
+        # identical entries are counted across the pages of a sync
+        received = Counter()
+        assert store.add([second, second], received) == 1
+        assert store.add([second], received) == 1
+        assert store.add([second, second]) == 0
+        assert store.count() == 4
+        store.close()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import json
+
+import pytest
+
+from pureport_client import batch
+
+from .commands import cli, client, create_mock_cli, runner
+
+
+BATCH = """\
+["accounts", "networks", "-a", "ac-1", "list"]
+# comment
+
+accounts bogus
+["connections", "get", "conn-1"]
+"""
+
+
+def run_batch(data, *args):
+    result = runner.invoke(cli, args=('batch',) + args + ('-',), input=data)
+    return result, [json.loads(line) for line in result.output.splitlines()]
+
+
+def test_parse_line():
+    assert batch.parse_line('  ') is None
+    assert batch.parse_line('# accounts list') is None
+    assert batch.parse_line('["accounts", "list"]') == ['accounts', 'list']
+    assert batch.parse_line("accounts get 'ac 1'") == ['accounts', 'get', 'ac 1']
+    with pytest.raises(ValueError):
+        batch.parse_line('[1, 2]')
+    with pytest.raises(ValueError):
+        batch.parse_line('[')
+
+
+@pytest.mark.parametrize('parallel', ('1', '4'))
+def test_batch(parallel):
+    result, records = run_batch(BATCH, '--parallel', parallel)
+
+    assert result.exit_code == 1, result.output
+    assert [item['line'] for item in records] == [1, 4, 5]
+    assert [item['exit'] for item in records] == [0, 2, 0]
+
+    assert records[0]['command'] == ['accounts', 'networks', '-a', 'ac-1', 'list']
+    assert records[0]['stdout'] == '[]\n'
+    assert records[0]['elapsed'] >= 0
+    assert "No such command 'bogus'" in records[1]['stderr']
+
+
+def test_batch_stop_on_error():
+    result, records = run_batch(BATCH, '--stop-on-error')
+
+    assert result.exit_code == 1, result.output
+    assert [item['exit'] for item in records] == [0, 2]
+
+
+def test_batch_invalid_line():
+    result, records = run_batch('["accounts", 1]\n')
+
+    assert result.exit_code == 1, result.output
+    assert records[0]['exit'] == 2
+    assert 'error' in records[0]
+
+
+def test_batch_resolves_commands_concurrently():
+    # the commands are resolved by many threads from a tree that hasn't
+    # loaded any of them yet
+    lines = ['accounts networks -a ac-{} list'.format(index) for index in range(32)]
+    records = list(batch.iter_results(create_mock_cli(client), client, lines, parallel=16))
+    assert [item['exit'] for item in records] == [0] * 32, records
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+import json
+
+from collections import namedtuple
+from unittest.mock import patch, Mock
+
+import pytest
+
+from pureport import models
+
+from pureport_client import bindings
+from pureport_client.session import Session
+
+from ..utils import utils
+
+Credentials = namedtuple('Credentials', ('key', 'secret'))
+
+
+def load_spec():
+    basepath = os.path.dirname(__file__)
+    return json.loads(open(os.path.join(basepath, '../openapi.json')).read())
+
+
+def make_session():
+    return Mock(base_url='https://{}'.format(utils.random_string()))
+
+
+def make_response(status=200, spec=None):
+    return Mock(status=status, json=spec, headers={'ETag': '"etag"'})
+
+
+@patch.object(bindings, 'fetch_api')
+def test_get_api(mock_fetch_api):
+    mock_fetch_api.return_value = make_response(spec=load_spec())
+    session = make_session()
+
+    api = bindings.get_api(session)
+    assert api.operations['find_networks'] == ('get', '/accounts/{accountId}/networks')
+    assert 'Network' in api.schemas
+
+    assert bindings.get_api(session) is api
+    assert mock_fetch_api.call_count == 1
+
+
+@patch.object(bindings, 'fetch_api')
+def test_make_model(mock_fetch_api):
+    mock_fetch_api.return_value = make_response(spec=load_spec())
+    session = make_session()
+
+    with patch.dict(models.__dict__):
+        for name in ('Network', 'Link'):
+            models.__dict__.pop(name, None)
+
+        cls = bindings.make_model('Network', session)
+
+        assert cls is models.Network
+        assert models.Link._schema is not None
+
+        network = models.load('Network', {'id': 'id', 'name': 'name', 'account': {'id': 'id', 'href': 'href'}})
+        assert isinstance(network.account, models.Link)
+
+
+@patch.object(bindings, 'fetch_api')
+def test_make_model_unknown(mock_fetch_api):
+    mock_fetch_api.return_value = make_response(spec=load_spec())
+
+    with pytest.raises(Exception):
+        bindings.make_model(utils.random_string(), make_session())
+
+
+@patch.object(bindings, 'fetch_api')
+def test_bind(mock_fetch_api):
+    mock_fetch_api.return_value = make_response(spec=load_spec())
+    session = make_session()
+
+    func = bindings.bind(session, 'find_networks')
+    assert func.__name__ == 'find_networks'
+    assert func.args == (session, 'get', '/accounts/{accountId}/networks')
+
+    with pytest.raises(AttributeError):
+        bindings.bind(session, utils.random_string())
+
+
+@patch.object(bindings, 'fetch_api')
+def test_session_bindings(mock_fetch_api):
+    spec = load_spec()
+    mock_fetch_api.return_value = make_response(spec=spec)
+
+    session = Session(Credentials('key', 'secret'), 'https://{}'.format(utils.random_string()))
+    assert mock_fetch_api.called is False
+
+    resp = session.get(bindings.API_URL)
+    assert resp.status == 200
+    assert resp.json is spec
+
+    assert session.find_networks.__name__ == 'find_networks'
+    assert 'find_networks' in session.__dict__
+    assert mock_fetch_api.call_count == 1
+
+    with pytest.raises(AttributeError):
+        session.unknown_function
+
+
+@patch.object(bindings, 'fetch_api')
+def test_get_api_cached(mock_fetch_api):
+    mock_fetch_api.return_value = make_response(spec=load_spec())
+    session = make_session()
+
+    api = bindings.get_api(session)
+    bindings._apis.clear()
+
+    cached_api = bindings.get_api(session)
+    assert mock_fetch_api.call_count == 1
+    assert cached_api.operations == api.operations
+    assert sorted(cached_api.schemas) == sorted(api.schemas)
+    assert cached_api.schemas['Network'].properties == api.schemas['Network'].properties
+
+
+@patch.object(bindings, 'fetch_api')
+def test_get_api_revalidate(mock_fetch_api):
+    mock_fetch_api.return_value = make_response(spec=load_spec())
+    session = make_session()
+
+    api = bindings.get_api(session)
+    bindings._apis.clear()
+
+    mock_fetch_api.return_value = make_response(status=304)
+
+    with patch.dict(os.environ, {'PUREPORT_SPEC_REVALIDATE_INTERVAL': '0'}):
+        cached_api = bindings.get_api(session)
+
+    assert mock_fetch_api.call_count == 2
+    mock_fetch_api.assert_called_with(session, headers={'If-None-Match': '"etag"'})
+    assert cached_api.operations == api.operations
+
+
+def test_revalidate_interval():
+    for value, expected in (('60', 60), ('-1', 0), ('', bindings.DEFAULT_REVALIDATE_INTERVAL),
+                            ('1h', bindings.DEFAULT_REVALIDATE_INTERVAL)):
+        with patch.dict(os.environ, {'PUREPORT_SPEC_REVALIDATE_INTERVAL': value}):
+            assert bindings.revalidate_interval() == expected
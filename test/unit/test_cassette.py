@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+import gzip
+import json
+import time
+import threading
+
+from collections import namedtuple
+from unittest.mock import MagicMock, patch
+
+from click import ClickException
+from click.testing import CliRunner
+from pytest import raises
+
+from pureport_client import (
+    __main__ as main,
+    bindings,
+    cassette
+)
+from pureport_client.session import (
+    create,
+    Session
+)
+
+from test.mockapi import mockapi
+from ..utils import utils
+
+
+Credentials = namedtuple('Credentials', ('key', 'secret'))
+
+
+def test_request_key():
+    key = cassette.request_key('get', 'http://localhost/api/networks?b=2&a=1', fields={'c': 3}, prefix='/api')
+    assert key == ('GET', '/networks?a=1&b=2&c=3', None)
+
+    first = cassette.request_key('POST', '/networks', body=json.dumps({'name': 'a', 'id': 'b'}))
+    second = cassette.request_key('POST', '/networks', body=json.dumps({'id': 'b', 'name': 'a'}).encode('utf-8'))
+    assert first == second
+
+
+def test_record_replay():
+    api = mockapi.MockApi(sizes={'auditLog': 250})
+    server = api.serve()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    with utils.tempdir() as tmpdir:
+        path = os.path.join(tmpdir, 'cassette.jsonl.gz')
+
+        with patch.dict(os.environ, {'PUREPORT_CACHE_DIR': os.path.join(tmpdir, 'record')}):
+            recorder = cassette.Recorder(path)
+            session = recorder.wrap(Session(Credentials('key', 'secret-value'),
+                                            'http://localhost:{}'.format(server.server_port)))
+            account = session.get_account('ac-1')
+            page = session.get('/accounts/ac-1/auditLog', query={'pageNumber': 1, 'pageSize': 10}).json
+            network = session.put('/networks/network-1', body=json.dumps({'name': 'test'})).json
+            recorder.close()
+
+        server.shutdown()
+        server.server_close()
+
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            text = f.read()
+        assert 'secret-value' not in text
+        urls = [json.loads(line).get('url') for line in text.splitlines()]
+        assert urls[1] == '/openapi.json'
+        assert '/login' not in urls
+
+        # replayed with neither the server nor a cached spec
+        bindings._apis.clear()
+        with patch.dict(os.environ, {'PUREPORT_CACHE_DIR': os.path.join(tmpdir, 'replay')}):
+            player = cassette.Player(path, cassette.LATENCY_NONE)
+            session = create(cassette=player)
+            assert session.base_url == recorder.base_url
+
+            assert session.get_account('ac-1').id == account.id
+            query = {'pageSize': 10, 'pageNumber': 1}
+            assert session.get('/accounts/ac-1/auditLog', query=query).json == page
+            assert session.put('/networks/network-1', body=json.dumps({'name': 'test'})).json == network
+
+            with raises(ClickException) as exc:
+                session.get('/networks/network-2')
+            assert 'GET /networks/network-2' in exc.value.message
+            assert path in exc.value.message
+
+        bindings._apis.clear()
+
+
+def test_replay_latency():
+    with utils.tempdir() as tmpdir:
+        path = os.path.join(tmpdir, 'cassette.jsonl.gz')
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'version': cassette.CASSETTE_VERSION, 'base_url': 'http://localhost'}) + '\n')
+            for status, data in ((202, 'PENDING'), (200, 'DONE')):
+                interaction = cassette.Interaction('GET', '/tasks/task-1', None, status, {},
+                                                   json.dumps({'state': data}), 0.05)
+                f.write(json.dumps(interaction._asdict()) + '\n')
+
+        session = create(cassette=cassette.Player(path))
+        started = time.perf_counter()
+        states = [session.get('/tasks/task-1').json['state'] for _ in range(3)]
+        assert states == ['PENDING', 'DONE', 'DONE']
+        assert time.perf_counter() - started >= 0.15
+
+        with raises(ValueError):
+            cassette.Player(path, 'fast')
+
+
+def test_shared_session():
+    with utils.tempdir() as tmpdir, patch.dict(os.environ, {'PUREPORT_CACHE_DIR': tmpdir}):
+        main.make(main.cli)
+        path = os.path.join(tmpdir, 'cassette.jsonl.gz')
+        result = CliRunner().invoke(main.cli, args=['--record', path, 'cache', 'clear'], obj=MagicMock())
+        assert result.exit_code == 2
+        assert 'shared session' in result.output
+        assert not os.path.exists(path)
+
+
+def test_cli_replay_miss():
+    api = mockapi.MockApi()
+    server = api.serve()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    with utils.tempdir() as tmpdir, patch.dict(os.environ, {'PUREPORT_CACHE_DIR': tmpdir}):
+        main.make(main.cli)
+        path = os.path.join(tmpdir, 'cassette.jsonl.gz')
+        try:
+            result = CliRunner().invoke(main.cli, args=[
+                '--record', path, '-u', 'http://localhost:{}'.format(server.server_port), '-k', 'key', '-s', 'secret',
+                'networks', 'get', 'network-1'])
+            assert result.exit_code == 0
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        bindings._apis.clear()
+        result = CliRunner().invoke(main.cli, args=['--replay', path, 'networks', 'get', 'network-1'])
+        assert result.exit_code == 0
+        assert '"network-1"' in result.output
+
+        result = CliRunner().invoke(main.cli, args=['--replay', path, 'networks', 'get', 'network-2'])
+        assert result.exit_code == 1
+        assert result.output == 'Error: no response to GET /networks/network-2 was recorded in {}\n'.format(path)
+        bindings._apis.clear()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+
+from unittest.mock import patch
+
+from pureport_client import completion
+
+from .commands import cli
+
+
+def names(items):
+    return [item[0] for item in items]
+
+
+def test_completions():
+    root = completion.dump(cli)
+
+    assert 'accounts' in names(completion.completions(root, [], ''))
+    assert names(completion.completions(root, [], 'acc')) == ['accounts']
+    assert 'networks' in names(completion.completions(root, ['accounts'], ''))
+    assert names(completion.completions(root, ['accounts', 'networks'], '--acc')) == ['--account_id']
+    assert names(completion.completions(root, ['accounts', 'networks', '-a', 'ac-1'], 'li')) == ['list']
+    assert names(completion.completions(root, ['accounts', 'networks', '-a', 'ac-1', 'list'], '--f')) == ['--format']
+    assert names(completion.completions(root, ['options', 'list', '--format'], 'j')) == ['json_pp', 'json']
+    assert completion.completions(root, ['connections', 'get'], '') == []
+
+    # options that were already given are not completed again
+    assert '--format' not in names(completion.completions(root, ['options', 'list', '--format', 'json'], '--'))
+
+
+@patch.object(completion.plugins, 'entry_points')
+def test_complete(mock_entry_points, capsys):
+    mock_entry_points.return_value = []
+    assert completion.write(cli, [])
+
+    env = {
+        '_PUREPORT_COMPLETE': 'bash_complete',
+        'COMP_WORDS': 'pureport accounts networks -a ac-1 l',
+        'COMP_CWORD': '5'
+    }
+
+    with patch.dict(os.environ, env):
+        assert completion.complete('pureport') == 0
+    assert capsys.readouterr().out == 'plain,list\n'
+
+    env.update({'_PUREPORT_COMPLETE': 'zsh_complete', 'COMP_WORDS': 'pureport acc', 'COMP_CWORD': '1'})
+    with patch.dict(os.environ, env):
+        assert completion.complete('pureport') == 0
+    assert capsys.readouterr().out == 'plain\naccounts\nManage Pureport accounts\n'
+
+    # the index is out of date
+    mock_entry_points.return_value = ['plugin = module:attr']
+    with patch.dict(os.environ, env):
+        assert completion.complete('pureport') is None
+
+
+def test_complete_source():
+    with patch.dict(os.environ, {'_PUREPORT_COMPLETE': 'bash_source'}):
+        assert completion.complete('pureport') is None
+    assert completion.complete('pureport') is None
+
+
+def test_remember_ids():
+    root = completion.dump(cli)
+    args = ['accounts', 'networks', '-a']
+
+    with patch.dict(os.environ, {'PUREPORT_COMPLETION_IDS': '1'}):
+        completion.remember_ids([{'id': 'ac-1'}, {'id': 'network-1'}, {'name': 'none'}])
+        completion.remember_ids({'id': 'ac-2'})
+
+        assert names(completion.completions(root, args, '')) == ['ac-2', 'ac-1']
+        assert names(completion.completions(root, args, 'ac-1')) == ['ac-1']
+
+    assert completion.completions(root, args, '') == []
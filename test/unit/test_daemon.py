@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import io
+import os
+import threading
+
+from unittest.mock import patch
+
+import pytest
+
+from click import Option
+from click.testing import CliRunner
+
+from pureport_client import (
+    __main__ as main,
+    daemon,
+    daemon_client
+)
+from pureport_client.exceptions import PureportClientError
+
+from ..utils import utils
+from .commands import cli, client
+
+
+def test_parse_args():
+    assert daemon_client.parse_args([]) == ({}, None)
+    assert daemon_client.parse_args(['--help']) == ({}, None)
+    assert daemon_client.parse_args(['accounts', '-t', 'x']) == ({}, 'accounts')
+    assert daemon_client.parse_args(['-p', 'prod', 'accounts']) == ({'api_profile': 'prod'}, 'accounts')
+    assert daemon_client.parse_args(['-pprod', 'accounts']) == ({'api_profile': 'prod'}, 'accounts')
+    assert daemon_client.parse_args(['--api_key=abc', 'networks']) == ({'api_key': 'abc'}, 'networks')
+    assert daemon_client.parse_args(['--record', 'out.gz', 'networks']) == ({'record': 'out.gz'}, 'networks')
+    assert daemon_client.parse_args(['--max-connections', '5', '--timings', 'accounts', 'list']) == \
+        ({'max_connections': '5', 'show_timings': True}, 'accounts')
+    assert daemon_client.parse_args(['--bogus', 'accounts']) == ({}, None)
+
+
+def test_root_options():
+    options = [param for param in main.cli.params if isinstance(param, Option)]
+    assert len(daemon_client.ROOT_OPTIONS) == len(options)
+    for (name, opts, takes_value), param in zip(daemon_client.ROOT_OPTIONS, options):
+        assert name == param.name
+        assert opts == tuple(param.opts + param.secondary_opts)
+        assert takes_value == (not (param.is_flag or param.count))
+
+
+def test_runtime_dir_insecure():
+    with utils.tempdir() as tmpdir:
+        os.chmod(tmpdir, 0o755)
+        with patch.dict(os.environ, {'PUREPORT_RUNTIME_DIR': tmpdir}):
+            with pytest.raises(PureportClientError):
+                daemon_client.socket_path('default')
+
+
+def test_forward_without_daemon():
+    with utils.tempdir() as tmpdir:
+        os.chmod(tmpdir, 0o700)
+        with patch.dict(os.environ, {'PUREPORT_RUNTIME_DIR': tmpdir}):
+            assert daemon_client.forward(['accounts', 'networks', '-a', 'ac-1', 'list']) is None
+
+
+def test_daemon():
+    with utils.tempdir() as tmpdir:
+        os.chmod(tmpdir, 0o700)
+        with patch.dict(os.environ, {'PUREPORT_RUNTIME_DIR': tmpdir}):
+            path = daemon_client.socket_path('default')
+
+            server = daemon.Server(cli, client, path, idle_timeout=10)
+            server.listen()
+
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+
+            try:
+                stdout, stderr = io.BytesIO(), io.BytesIO()
+                code = daemon_client.forward(['accounts', 'networks', '-a', 'ac-1', 'list'],
+                                             stdin=io.BytesIO(), stdout=stdout, stderr=stderr)
+                assert code == 0
+                assert stdout.getvalue() == b'[]\n'
+
+                stdout, stderr = io.BytesIO(), io.BytesIO()
+                code = daemon_client.forward(['accounts', 'bogus'], stdin=io.BytesIO(), stdout=stdout, stderr=stderr)
+                assert code == 2
+                assert b"No such command 'bogus'" in stderr.getvalue()
+
+                # commands are run locally when the credentials differ
+                with patch.dict(os.environ, {'PUREPORT_API_KEY': utils.random_string()}):
+                    assert daemon_client.forward(['accounts', 'networks', '-a', 'ac-1', 'list']) is None
+                assert daemon_client.forward(['-k', 'key', 'accounts', 'networks', '-a', 'ac-1', 'list']) is None
+                # or the session is configured for the command
+                for args in (['--replay', 'networks.jsonl.gz'], ['--max-connections', '5'], ['--rate-limit=2']):
+                    assert daemon_client.forward(args + ['accounts', 'networks', '-a', 'ac-1', 'list']) is None
+                with patch.dict(os.environ, {'PUREPORT_READ_TIMEOUT': '5'}):
+                    assert daemon_client.forward(['accounts', 'networks', '-a', 'ac-1', 'list']) is None
+
+                assert daemon_client.request(path, {'control': 'status'})['requests'] == 2
+                assert daemon_client.request(path, {'control': 'stop'}) == {'stopped': True}
+            finally:
+                server.running = False
+                thread.join(10)
+
+            assert not thread.is_alive()
+            assert not os.path.exists(path)
+
+
+def test_remote_reader():
+    stdin = io.BytesIO(b'{"name": "value"}')
+
+    r, w = os.pipe()
+    with os.fdopen(r, 'rb') as rfile, os.fdopen(w, 'wb') as wfile:
+        daemon_client._send_stdin(stdin, wfile)
+        wfile.close()
+
+        reader = io.TextIOWrapper(io.BufferedReader(daemon.RemoteReader(rfile, io.BytesIO())))
+        assert reader.read() == '{"name": "value"}'
+
+
+def test_shared_session_options():
+    with utils.tempdir() as tmpdir, patch.dict(os.environ, {'PUREPORT_CACHE_DIR': tmpdir}):
+        main.make(main.cli)
+        runner = CliRunner()
+
+        # the options of the session can't be changed by one command
+        result = runner.invoke(main.cli, args=['--max-connections', '5', 'cache', 'clear'], obj=client)
+        assert result.exit_code == 2
+        assert '--max-connections cannot be used with a shared session' in result.output
+
+        result = runner.invoke(main.cli, args=['--no-cache', 'cache', 'clear'], obj=client)
+        assert result.exit_code == 0, result.output
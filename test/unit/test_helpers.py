@@ -4,6 +4,7 @@
 # All Rights Reserved
 
 import datetime
+import time
 import os
 import json
 import pytest
@@ -106,3 +107,41 @@ def test_format_output_yaml(mock_get_api):
     response = [{'id': 'id'}]
     output = helpers.format_output(response, 'yaml')
     assert output == '- id: id\n'
+
+
+def test_fan_out():
+    def func(item):
+        if item == 3:
+            raise ValueError(item)
+        return item * 2
+
+    results = list(helpers.fan_out(func, range(6), parallel=3))
+    assert [item for item, _, _ in results] == list(range(6))
+    assert [result for _, result, _ in results] == [0, 2, 4, None, 8, 10]
+    assert isinstance(results[3][2], ValueError)
+
+
+def test_paginate():
+    requested = []
+
+    def query(page_number=0, page_size=10):
+        requested.append(page_number)
+        # later pages arrive first so they have to be put back in order
+        time.sleep(0.002 * (20 - page_number))
+        start = page_number * page_size
+        return {'content': list(range(start, min(start + page_size, 195))), 'totalElements': 195,
+                'pageSize': page_size, 'pageNumber': page_number}
+
+    assert list(helpers.paginate(query, page_size=10)) == list(range(195))
+    assert requested == list(range(20))
+
+    del requested[:]
+    assert list(helpers.paginate(query, page_size=10, parallel=8)) == list(range(195))
+    assert sorted(requested) == list(range(20))
+
+    # the pages that weren't requested yet are cancelled
+    del requested[:]
+    items = helpers.paginate(query, page_size=10, parallel=2)
+    assert [next(items) for _ in range(15)] == list(range(15))
+    items.close()
+    assert len(requested) < 20
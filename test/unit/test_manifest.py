@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+import json
+
+from unittest.mock import patch
+
+from click import Argument, Choice, Option, Path
+
+from pureport_client import cache
+from pureport_client import completion
+from pureport_client import manifest
+from pureport_client import __main__ as main
+from pureport_client.util import JSON, LazyGroup
+
+from ..utils import utils
+from .commands import client, create_mock_cli, runner
+
+
+def test_param_round_trip():
+    params = (
+        Option(['-pn', '--page_number'], type=int, help=utils.random_string()),
+        Option(['-s', '--sort'], type=Choice(['ASC', 'DESC'])),
+        Option(['-w', '--wait_until_active'], is_flag=True),
+        Option(['-a', '--account_id'], envvar='PUREPORT_ACCOUNT_ID', required=True),
+        Option(['-i', '--ids'], multiple=True),
+        Option(['--format'], type=Choice(['json', 'yaml']), default='json'),
+        Option(['--database'], type=Path(dir_okay=False)),
+        Argument(['connection'], type=JSON)
+    )
+
+    for param in params:
+        data = manifest.dump_param(param)
+        json.dumps(data)
+
+        new_param = manifest.load_param(data)
+
+        assert new_param.name == param.name
+        assert new_param.opts == param.opts
+        assert new_param.required == param.required
+        assert new_param.multiple == param.multiple
+        assert new_param.envvar == param.envvar
+        assert manifest.dump_param(new_param) == data
+
+
+def test_unsupported_param_type():
+    param = Option(['--path'], type=float)
+    param.type = object()
+
+    try:
+        manifest.dump_param(param)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_make_writes_and_reads_manifest():
+    with utils.tempdir() as tmpdir:
+        with patch.dict(os.environ, {'PUREPORT_CACHE_DIR': tmpdir}):
+            create_mock_cli(client)
+
+            data = cache.read_json(manifest.MANIFEST_FILENAME)
+            assert data['key'] == manifest.cache_key([])
+
+            names = [c['name'] for c in data['commands']]
+            assert 'accounts' in names
+            assert 'connections' in names
+
+            with patch.object(main, 'load_command') as mock_load_command:
+                cli = create_mock_cli(client)
+                assert isinstance(cli, LazyGroup)
+                assert 'accounts' in cli.lazy_commands
+
+                result = runner.invoke(cli, args=['connections', 'get', utils.random_string()])
+                assert result.exit_code == 0, result.output
+
+                result = runner.invoke(cli, args=['accounts', 'networks', '-a', utils.random_string(), 'list'])
+                assert result.exit_code == 0, result.output
+
+                result = runner.invoke(cli, args=['accounts', 'audit-log', '--help'])
+                assert result.exit_code == 0, result.output
+                assert 'query' in result.output
+
+                assert mock_load_command.called is False
+
+
+def test_read_out_of_date_manifest():
+    with utils.tempdir() as tmpdir:
+        with patch.dict(os.environ, {'PUREPORT_CACHE_DIR': tmpdir}):
+            cache.write_json(manifest.MANIFEST_FILENAME, {'key': utils.random_string(), 'commands': []})
+            assert manifest.read([]) is None
+
+
+def test_make_writes_completion_index():
+    with utils.tempdir() as tmpdir:
+        with patch.dict(os.environ, {'PUREPORT_CACHE_DIR': tmpdir}):
+            create_mock_cli(client)
+            assert completion.read([]) is not None
+
+            # the index isn't read again while the manifest is up to date
+            with patch.object(completion, 'read') as mock_read, patch.object(completion, 'write') as mock_write:
+                create_mock_cli(client)
+                assert mock_read.called is False
+                assert mock_write.called is False
+
+            cache.remove(completion.INDEX_FILENAME)
+            create_mock_cli(client)
+            assert completion.read([]) is not None
+
+
+def test_source_stamp():
+    with utils.tempdir() as tmpdir:
+        path = os.path.join(tmpdir, 'package')
+        os.makedirs(os.path.join(path, '__pycache__'))
+        for name in ('__init__.py', 'module.py', os.path.join('__pycache__', 'module.pyc')):
+            with open(os.path.join(path, name), 'w'):
+                pass
+            os.utime(os.path.join(path, name), ns=(10 ** 9, 10 ** 9))
+
+        # the sources of a development install are walked
+        assert cache.source_stamp(path) == 10 ** 9
+        os.utime(os.path.join(path, 'module.py'), ns=(2 * 10 ** 9, 2 * 10 ** 9))
+        os.utime(os.path.join(path, '__pycache__', 'module.pyc'), ns=(3 * 10 ** 9, 3 * 10 ** 9))
+        assert cache.source_stamp(path) == 2 * 10 ** 9
+
+        # an installed package is only rewritten by installing it again
+        with patch('site.getsitepackages', return_value=[tmpdir]), patch('site.ENABLE_USER_SITE', False):
+            assert cache.installed(path)
+            assert cache.source_stamp(path) == 10 ** 9
+        assert not cache.installed(path)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+
+from unittest.mock import patch
+
+from pureport_client import plugins
+
+from ..utils import utils
+
+
+def test_entry_point_load():
+    entry_point = plugins.EntryPoint('test', 'pureport_client.plugins:EntryPoint.load')
+    assert entry_point.load() is plugins.EntryPoint.load
+    assert str(entry_point) == 'test = pureport_client.plugins:EntryPoint.load'
+
+
+@patch.object(plugins, 'scan')
+def test_entry_points_cached(mock_scan):
+    entry_point = plugins.EntryPoint(utils.random_string(), 'test.module:attr')
+    mock_scan.return_value = [entry_point]
+
+    with utils.tempdir() as tmpdir:
+        with patch.dict(os.environ, {'PUREPORT_CACHE_DIR': tmpdir}):
+            assert plugins.entry_points() == [entry_point]
+            assert plugins.entry_points() == [entry_point]
+            assert mock_scan.call_count == 1
+
+            with patch.object(plugins, 'search_paths') as mock_search_paths:
+                mock_search_paths.return_value = {tmpdir: 0}
+                assert plugins.entry_points() == [entry_point]
+                assert mock_scan.call_count == 2
+
+
+@patch.object(plugins, 'scan')
+def test_entry_points_disabled(mock_scan):
+    with patch.dict(os.environ, {'PUREPORT_NO_PLUGINS': '1'}):
+        assert plugins.entry_points() == []
+        assert mock_scan.called is False
+
+
+def test_scan():
+    assert isinstance(plugins.scan(), list)
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+import json
+import time
+import threading
+
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from pureport.exceptions import PureportHttpError
+
+from pureport_client import helpers, ratelimit
+from pureport_client.session import Session
+
+from ..utils import utils
+
+
+Credentials = namedtuple('Credentials', ('key', 'secret'))
+
+
+def make_response(body, status=200, headers=None):
+    response = MagicMock()
+    response.status = status
+    response.data = json.dumps(body).encode('utf-8')
+    response.headers = headers or {}
+    response.json = body
+    return response
+
+
+def test_retry_after():
+    assert ratelimit.retry_after({'Retry-After': '3'}) == 3
+    assert ratelimit.retry_after({'retry-after': 'Wed, 21 Oct 2020 07:28:10 GMT'}, now=1603265280) == 10
+    assert ratelimit.retry_after({'Retry-After': 'soon'}) is None
+    assert ratelimit.retry_after({}) is None
+
+
+def test_token_bucket():
+    with utils.tempdir() as tmpdir:
+        path = os.path.join(tmpdir, 'ratelimit', 'default.state')
+        bucket = ratelimit.TokenBucket(10, 2, path)
+        other = ratelimit.TokenBucket(10, 2, path)
+
+        assert bucket.take() == 0
+        # the tokens are shared through the file
+        assert other.take() == 0
+        assert 0 < bucket.take() <= 0.1
+
+        other.pause(5)
+        assert 4 < bucket.paused() <= 5
+        assert 4 < bucket.take() <= 5
+        assert os.stat(path).st_mode & 0o777 == 0o600
+
+
+def test_rate_limiter():
+    limiter = ratelimit.RateLimiter()
+    assert limiter.wait() == 0
+
+    assert limiter.throttled(make_response({}, status=404), 0) is None
+    assert limiter.throttled(make_response({}, status=429, headers={'Retry-After': '2'}), 0) == 2
+    assert 1 < limiter.wait() <= 2
+    assert limiter.throttled(make_response({}, status=503), 3) == 8
+    assert limiter.throttled(make_response({}, status=503), limiter.max_retries) is None
+
+    limiter = ratelimit.RateLimiter(100, 1)
+    assert limiter.wait() == 0
+    started = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.005
+
+
+def test_session_throttled():
+    session = Session(Credentials('key', 'secret'), 'https://{}'.format(utils.random_string()))
+    session.authorization_header = {'Authorization': 'Bearer token'}
+    session.authorization_expiration = time.time() + 60
+    responses = [
+        make_response({'status': 429, 'message': 'slow down'}, status=429, headers={'Retry-After': '0.01'}),
+        make_response({'status': 503, 'message': 'unavailable'}, status=503, headers={'Retry-After': '0'}),
+        make_response({'id': 'network-1'})
+    ]
+
+    def request(*args, **kwargs):
+        response = responses.pop(0)
+        if response.status >= 400:
+            raise PureportHttpError(response)
+        return response
+
+    with patch('pureport.transport.Request.__call__', side_effect=request) as mock_call:
+        assert session.put('/networks/network-1').json == {'id': 'network-1'}
+        assert mock_call.call_count == 3
+
+        # a 503 response to a request that isn't idempotent isn't retried
+        responses[:] = [
+            make_response({'status': 429, 'message': 'slow down'}, status=429, headers={'Retry-After': '0'}),
+            make_response({'status': 503, 'message': 'unavailable'}, status=503, headers={'Retry-After': '0'})
+        ]
+        with pytest.raises(PureportHttpError):
+            session.post('/networks/network-1/connections')
+        assert mock_call.call_count == 5
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    """Throttles every other request
+    """
+
+    requests = 0
+
+    def do_GET(self):
+        type(self).requests += 1
+        if self.requests % 2:
+            status, body, headers = 429, {'status': 429, 'message': 'slow down'}, {'Retry-After': '0'}
+        else:
+            status, body, headers = 200, {'id': 'network-1'}, {}
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        for name, value in dict(headers, **{'Content-Length': str(len(data))}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_session_throttled_transport():
+    # a throttled response sent by a server reaches the rate limiter
+    # instead of being retried by urllib3
+    server = HTTPServer(('127.0.0.1', 0), ThrottlingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with utils.tempdir() as tmpdir, patch.dict(os.environ, {'PUREPORT_CACHE_DIR': tmpdir}):
+        session = Session(Credentials('key', 'secret'), 'http://127.0.0.1:{}'.format(server.server_port))
+        session.authorization_header = {'Authorization': 'Bearer token'}
+        session.authorization_expiration = time.time() + 60
+
+        with patch.object(session.rate_limiter, 'throttled', wraps=session.rate_limiter.throttled) as throttled:
+            assert session.get('/networks/network-1').json == {'id': 'network-1'}
+        assert throttled.call_count == 1
+        assert throttled.call_args[0][0].status == 429
+        assert ThrottlingHandler.requests == 2
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_adaptive_concurrency():
+    concurrency = ratelimit.AdaptiveConcurrency(8)
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    def func(item):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.005)
+        if item < 4:
+            # simulates requests throttled at the same time
+            ratelimit._concurrency.get().throttled()
+        with lock:
+            active[0] -= 1
+        return item
+
+    results = list(helpers.fan_out(func, range(12), parallel=8, concurrency=concurrency))
+    assert [result for _, result, _ in results] == list(range(12))
+    assert peak[0] <= 8
+    # the calls in flight only halve the limit once
+    assert 3 <= concurrency.limit < 8
+
+    # the limit grows back by one for each window of calls
+    for _ in range(100):
+        concurrency.run(lambda: None)
+    assert concurrency.limit == 8
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+import json
+import time
+
+from collections import namedtuple
+from unittest.mock import MagicMock, patch
+
+from click.testing import CliRunner
+
+from pureport_client import response_cache
+from pureport_client.session import Session
+
+from ..utils import utils
+
+
+Credentials = namedtuple('Credentials', ('key', 'secret'))
+
+
+def make_response(body, status=200):
+    response = MagicMock()
+    response.status = status
+    response.data = json.dumps(body).encode('utf-8')
+    response.headers = {'Content-Type': 'application/json'}
+    response.json = body
+    return response
+
+
+def test_endpoint_class():
+    assert response_cache.endpoint_class('/facilities') == 'reference'
+    assert response_cache.endpoint_class('/facilities/us-sea') == 'reference'
+    assert response_cache.endpoint_class('https://api.pureport.com/cloudRegions/') == 'reference'
+    assert response_cache.endpoint_class('/options') == 'options'
+    assert response_cache.endpoint_class('/accounts/ac-1/supportedPorts') == 'supported'
+    assert response_cache.endpoint_class('/accounts/ac-1/networks') is None
+    assert response_cache.endpoint_class('/facilities/us-sea/ports') is None
+
+
+def test_ttl():
+    assert response_cache.ttl('reference') == response_cache.TTLS['reference']
+    with patch.dict(os.environ, {'PUREPORT_CACHE_TTL_REFERENCE': '10'}):
+        assert response_cache.ttl('reference') == 10
+    with patch.dict(os.environ, {'PUREPORT_CACHE_TTL_REFERENCE': 'never'}):
+        assert response_cache.ttl('reference') == response_cache.TTLS['reference']
+
+
+def test_response_cache():
+    responses = response_cache.ResponseCache('https://{}'.format(utils.random_string()), 'key')
+    response = make_response([{'id': 'us-sea'}])
+
+    assert responses.get('GET', '/facilities') is None
+    assert responses.put('GET', '/facilities', response) is True
+    assert responses.get('GET', '/facilities').json == [{'id': 'us-sea'}]
+
+    # requests that are not cached
+    assert responses.put('POST', '/facilities', response) is False
+    assert responses.put('GET', '/accounts/ac-1/networks', response) is False
+    assert responses.put('GET', '/locations', make_response({}, status=204)) is False
+    assert responses.get('GET', '/facilities', query={'name': 'x'}) is None
+
+    # the disk layer is shared by other sessions
+    response_cache.clear(expired=True)
+    other = response_cache.ResponseCache(responses.base_url, 'key')
+    assert other.get('GET', '/facilities').json == [{'id': 'us-sea'}]
+    assert response_cache.ResponseCache(responses.base_url, 'other').get('GET', '/facilities') is None
+
+    token = response_cache.set_mode(response_cache.MODE_REFRESH)
+    try:
+        assert responses.get('GET', '/facilities') is None
+    finally:
+        response_cache.reset_mode(token)
+
+    with patch.object(response_cache.time, 'time', return_value=time.time() + 86401):
+        assert responses.get('GET', '/facilities') is None
+        response_cache.clear(expired=True)
+
+    assert responses.get('GET', '/facilities') is None
+
+
+def test_session_cached():
+    session = Session(Credentials('key', 'secret'), 'https://{}'.format(utils.random_string()))
+
+    with patch('pureport.session.Session.__call__') as mock_call:
+        mock_call.return_value = make_response([{'id': 'aws-us-east-1'}])
+
+        assert session('GET', '/cloudRegions').json == [{'id': 'aws-us-east-1'}]
+        assert session('GET', '/cloudRegions').json == [{'id': 'aws-us-east-1'}]
+        assert mock_call.call_count == 1
+
+        token = response_cache.set_mode(response_cache.MODE_OFF)
+        try:
+            session('GET', '/cloudRegions')
+        finally:
+            response_cache.reset_mode(token)
+        assert mock_call.call_count == 2
+
+        session('GET', '/accounts/ac-1/networks')
+        session('GET', '/accounts/ac-1/networks')
+        assert mock_call.call_count == 4
+
+
+def test_cache_commands():
+    responses = response_cache.ResponseCache('https://{}'.format(utils.random_string()))
+    responses.put('GET', '/options', make_response({'types': []}))
+
+    runner = CliRunner()
+
+    result = runner.invoke(response_cache.cache_group, ['stats'])
+    assert result.exit_code == 0
+    assert result.output.splitlines()[2].split()[:4] == ['options', '86400', '1', '0']
+
+    result = runner.invoke(response_cache.cache_group, ['clear'])
+    assert result.exit_code == 0
+    assert responses.get('GET', '/options') is None
+
+
+def test_conditional_request():
+    session = Session(Credentials('key', 'secret'), 'https://{}'.format(utils.random_string()))
+
+    with patch('pureport.session.Session.__call__') as mock_call:
+        response = make_response({'id': 'conn-1'})
+        response.headers = {'ETag': '"v1"', 'Last-Modified': 'Tue, 01 Sep 2020 00:00:00 GMT'}
+        mock_call.return_value = response
+
+        assert session('GET', '/connections/conn-1').json == {'id': 'conn-1'}
+        assert not mock_call.call_args[1]['headers']
+
+        mock_call.return_value = make_response(None, status=304)
+        resp = session('GET', '/connections/conn-1')
+        assert resp.status == 200
+        assert resp.json == {'id': 'conn-1'}
+        assert mock_call.call_args[1]['headers'] == {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Tue, 01 Sep 2020 00:00:00 GMT'
+        }
+
+        # conditional requests sent by the caller are left alone
+        resp = session('GET', '/connections/conn-1', headers={'If-None-Match': '"v0"'})
+        assert resp.status == 304
+
+        # responses without validators are not saved
+        mock_call.return_value = make_response({'id': 'conn-2'})
+        session('GET', '/connections/conn-2')
+        session('GET', '/connections/conn-2')
+        assert not mock_call.call_args[1]['headers']
+
+    assert response_cache.clear() > 0
+    assert session.validators.get('GET', '/connections/conn-1') is None
+
+
+def test_validators_bounded():
+    with utils.tempdir() as tmpdir, patch.dict(os.environ, {'PUREPORT_CACHE_DIR': tmpdir}), \
+            patch.object(response_cache, 'VALIDATORS_SIZE', 3):
+        validators = response_cache.ValidatorCache('https://{}'.format(utils.random_string()))
+        path = os.path.join(tmpdir, response_cache.VALIDATORS_DIR)
+
+        for index in range(3):
+            response = make_response({'id': 'conn-{}'.format(index)})
+            response.headers = {'ETag': '"v1"'}
+            assert validators.put('GET', '/connections/conn-{}'.format(index), response)
+            # older responses were used longer ago
+            for name in os.listdir(path):
+                stat = os.stat(os.path.join(path, name))
+                os.utime(os.path.join(path, name), ns=(stat.st_atime_ns, stat.st_mtime_ns - 10 ** 9))
+        assert len(os.listdir(path)) == 3
+
+        # using a response keeps it
+        response_cache._validators.clear()
+        assert validators.get('GET', '/connections/conn-0') is not None
+
+        response = make_response({'id': 'conn-3'})
+        response.headers = {'ETag': '"v1"'}
+        assert validators.put('GET', '/connections/conn-3', response)
+        assert len(os.listdir(path)) == 3
+
+        response_cache._validators.clear()
+        assert validators.get('GET', '/connections/conn-0') is not None
+        assert validators.get('GET', '/connections/conn-1') is None
+        assert validators.get('GET', '/connections/conn-3') is not None
+
+        assert response_cache.prune_validators(1) == 2
+        assert len(os.listdir(path)) == 1
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+import json
+
+import pytest
+
+from pureport_client import routes
+from pureport_client.exceptions import PureportClientError
+
+
+SPEC_PATH = os.path.join(os.path.dirname(__file__), '..', 'openapi.json')
+
+
+def test_route():
+    route = routes.Route('/accounts/{accountId}/members/{userId}')
+    assert route.params == ('accountId', 'userId')
+    assert route.weight == 2
+
+    assert route.expand('ac-1', 'user 1') == '/accounts/ac-1/members/user%201'
+    assert route.expand('ac-1', userId='user/1') == '/accounts/ac-1/members/user%2F1'
+    assert route.match('/accounts/ac-1/members/user-1') == {'accountId': 'ac-1', 'userId': 'user-1'}
+    assert route.match('/accounts/ac-1/members') is None
+
+    with pytest.raises(PureportClientError):
+        route.expand('ac-1')
+    with pytest.raises(PureportClientError):
+        route.expand('ac-1', user='user-1')
+
+
+def test_registry():
+    registry = routes.RouteRegistry()
+    with open(SPEC_PATH) as f:
+        registry.load_spec(json.load(f))
+
+    assert '/connections/{connectionId}' in registry
+    assert registry.route('/connections/{connectionId}') is registry.route('/connections/{connectionId}')
+
+    # literal segments are preferred over parameters
+    route, params = registry.match('/networks/network-1/connections')
+    assert (route.template, params) == ('/networks/{networkId}/connections', {'networkId': 'network-1'})
+    assert registry.match('/unknown/path') is None
+
+    assert registry.operation('get', '/connections/conn-1') is not None
+    assert registry.operation('patch', '/connections/conn-1') is None
+
+    registry.check('GET', '/connections/conn-1?query=1')
+    registry.check('GET', '/unknown/path')
+    with pytest.raises(PureportClientError):
+        registry.check('PATCH', '/connections/conn-1')
+
+
+def test_policy():
+    registry = routes.RouteRegistry()
+    assert registry.policy('GET', '/tasks') == {'idempotent': True}
+    assert registry.policy('POST', '/tasks') == {'idempotent': False}
+
+    registry.set_policy('/tasks', timeout=5)
+    registry.set_policy('/tasks', 'POST', idempotent=True)
+    assert registry.policy('POST', '/tasks?page=1') == {'idempotent': True, 'timeout': 5}
+    assert registry.policy('GET', '/tasks') == {'idempotent': True, 'timeout': 5}
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import io
+
+from pureport_client import shell
+
+from .commands import cli, client, runner
+
+
+def make_shell(data=''):
+    sh = shell.Shell(cli, client, stdin=io.StringIO(data), stdout=io.StringIO())
+    sh.use_rawinput = False
+    return sh
+
+
+def test_shell(capsys):
+    sh = make_shell('accounts networks -a ac-1 list\n\naccounts bogus\n')
+    sh.cmdloop()
+
+    captured = capsys.readouterr()
+    assert captured.out.startswith('[]\n')
+    assert "No such command 'bogus'" in captured.err
+    assert sh.exit_code == 2
+
+
+def test_shell_help(capsys):
+    sh = make_shell('help accounts\nexit\naccounts bogus\n')
+    sh.cmdloop()
+
+    captured = capsys.readouterr()
+    assert 'Manage Pureport accounts' in captured.out
+    assert captured.err == ''
+    assert sh.exit_code == 0
+
+
+def test_shell_completions():
+    sh = make_shell()
+
+    assert sh.completions([], 'acc') == ['accounts']
+    assert 'networks' in sh.completions(['accounts'], '')
+    assert sh.completions(['accounts', 'networks'], '--acc') == ['--account_id']
+    assert sh.completions(['accounts', 'networks', '-a', 'ac-1'], 'li') == ['list']
+    assert sh.completions(['accounts', 'networks', '-a', 'ac-1', 'list'], '') == []
+
+    assert sh.completedefault('net', 'help net', 5, 8) == ['networks ']
+
+
+def test_shell_command():
+    result = runner.invoke(cli, args=['shell'], input='accounts networks -a ac-1 list\n')
+    assert result.exit_code == 0, result.output
+    assert '[]' in result.output
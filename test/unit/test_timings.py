@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import io
+import contextvars
+import json
+import time
+import threading
+
+from collections import namedtuple
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer
+)
+from unittest.mock import MagicMock, patch
+
+from pureport_client import routes, timings, transport
+from pureport_client.session import Session
+
+from ..utils import utils
+
+
+Credentials = namedtuple('Credentials', ('key', 'secret'))
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'path': self.path}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_percentile():
+    values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    assert timings.percentile(values, 50) == 5
+    assert timings.percentile(values, 95) == 10
+    assert timings.percentile([3], 95) == 3
+
+
+def test_busy_time():
+    assert timings.busy_time([]) == 0
+    assert timings.busy_time([(0, 1), (0.5, 2), (3, 4)]) == 3
+    assert timings.busy_time([(0, 4), (1, 2)]) == 4
+
+
+def test_transport_phases():
+    server = ThreadingHTTPServer(('localhost', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    collected = []
+    timings.add_hook(collected.append)
+    try:
+        manager = transport.pool_manager()
+        url = 'http://localhost:{}/networks'.format(server.server_port)
+        for _ in range(2):
+            with timings.measure('get', url) as timing:
+                resp = manager.request('GET', url)
+                assert json.loads(resp.data) == {'path': '/networks'}
+    finally:
+        timings.remove_hook(collected.append)
+        server.shutdown()
+        server.server_close()
+
+    first, second = collected
+    assert first.method == 'GET'
+    for name in ('dns', 'connect', 'ttfb', 'download'):
+        assert getattr(first, name) >= 0
+    assert first.tls is None
+    assert first.total >= first.ttfb
+
+    # the second request reuses the connection
+    assert (second.dns, second.connect) == (None, None)
+    assert second.ttfb >= 0
+    assert timing is second
+
+
+def test_session_timings():
+    session = Session(Credentials('key', 'secret'), 'https://{}'.format(utils.random_string()))
+    session.authorization_header = {'Authorization': 'Bearer token'}
+    session.authorization_expiration = time.time() + 60
+
+    response = MagicMock()
+    response.status = 200
+    response.data = json.dumps({'id': 'network-1'}).encode('utf-8')
+    response.json = {'id': 'network-1'}
+
+    report = timings.Report()
+    timings.add_hook(report)
+    try:
+        with patch('pureport.transport.Request.__call__', return_value=response):
+            assert session.put(routes.url('/networks/{networkId}', 'network-1')).json == {'id': 'network-1'}
+        with timings.local('format'):
+            pass
+    finally:
+        timings.remove_hook(report)
+
+    timing, = report.timings
+    assert (timing.status, timing.bytes) == (200, len(response.data))
+    assert timing.decode >= 0
+    assert timing.endpoint == 'PUT /networks/{networkId}'
+    assert list(report.local) == ['format']
+
+    output = io.StringIO()
+    report.close(output)
+    lines = output.getvalue().splitlines()
+    assert lines[0].split() == ['endpoint', 'count', 'p50', 'p95', 'max']
+    assert lines[1].startswith('PUT /networks/{networkId}')
+    assert lines[-1].startswith('total ')
+    assert 'format' in lines[-1]
+
+    # requests aren't timed without hooks
+    with timings.measure('GET', '/networks') as timing:
+        assert timing is None
+
+
+def test_collectors():
+    barrier = threading.Barrier(2)
+    reports = {}
+
+    def format_output(name):
+        with timings.local(name):
+            pass
+
+    def command(name):
+        report = reports[name] = timings.Report()
+        token = timings.add_collector(report)
+        try:
+            barrier.wait()
+            with timings.measure('GET', '/{}'.format(name)):
+                barrier.wait()
+            # work handed to other threads by a command keeps its context
+            thread = threading.Thread(target=contextvars.copy_context().run, args=(format_output, name))
+            thread.start()
+            thread.join()
+        finally:
+            timings.remove_collector(token)
+
+    threads = [threading.Thread(target=command, args=(name,)) for name in ('first', 'second')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name, report in reports.items():
+        assert [timing.url for timing in report.timings] == ['/{}'.format(name)]
+        assert list(report.local) == [name]
+    assert not timings.enabled()
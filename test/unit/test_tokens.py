@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import os
+import json
+import stat
+import time
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+import pureport
+
+from pureport.exceptions import PureportError, PureportHttpError
+
+from pureport_client import cache, tokens
+from pureport_client.session import Session
+
+from ..utils import utils
+
+
+def make_response(body, status=200):
+    response = MagicMock()
+    response.status = status
+    response.data = json.dumps(body).encode('utf-8')
+    response.json = body
+    return response
+
+
+def test_find_credentials():
+    with utils.tempdir() as tmpdir:
+        with open(os.path.join(tmpdir, 'credentials.json'), 'w') as f:
+            json.dump({'current_profile': 'dev', 'profiles': {
+                'default': {'api_key': 'key', 'api_secret': 'secret'},
+                'dev': {'api_key': 'dev-key', 'api_secret': 'dev-secret', 'api_url': 'https://dev'}
+            }}, f)
+
+        defaults = pureport.defaults._replace(credentials_path=tmpdir)
+        with patch.object(pureport, 'defaults', defaults), patch.dict(os.environ, clear=True):
+            credentials, base_url, profile = tokens.find_credentials()
+            assert (credentials.key, base_url, profile) == ('dev-key', 'https://dev', 'dev')
+
+            credentials, base_url, profile = tokens.find_credentials(api_profile='default')
+            assert (credentials, base_url, profile) == (('key', 'secret'), defaults.api_base_url, 'default')
+
+            credentials, base_url, _ = tokens.find_credentials(api_url='https://other', api_key='other')
+            assert (credentials, base_url) == (('other', 'dev-secret'), 'https://other')
+
+            with patch.dict(os.environ, {'PUREPORT_API_KEY': 'env-key'}):
+                assert tokens.find_credentials()[0].key == 'env-key'
+
+        with patch.object(pureport, 'defaults', pureport.defaults._replace(credentials_path=utils.random_string())), \
+                patch.dict(os.environ, clear=True):
+            with pytest.raises(PureportError):
+                tokens.find_credentials()
+
+
+def test_token_cache():
+    token_cache = tokens.TokenCache('dev/1', 'https://api', 'key')
+    assert token_cache.name == 'tokens/dev_1.json'
+    assert token_cache.get() is None
+
+    entry = token_cache.put({'access_token': 'a', 'refresh_token': 'r', 'expires_in': 3600})
+    assert token_cache.get() == entry
+    assert tokens.usable(entry)
+    assert stat.S_IMODE(os.stat(cache.cache_path(token_cache.name)).st_mode) == 0o600
+
+    # the refresh token is kept if a new one isn't returned
+    assert token_cache.put({'access_token': 'b', 'expires_in': 3600}, entry)['refresh_token'] == 'r'
+
+    # tokens of other keys are not used
+    assert tokens.TokenCache('dev/1', 'https://api', 'other').get() is None
+
+    assert not tokens.usable(dict(entry, expires=time.time() + 60))
+    assert tokens.usable(dict(entry, expires_in=60, expires=time.time() + 60))
+
+    token_cache.remove()
+    assert token_cache.get() is None
+
+
+def test_session_tokens():
+    base_url = 'https://{}'.format(utils.random_string())
+    token_cache = tokens.TokenCache(utils.random_string(), base_url, 'key')
+    logins = []
+
+    def request(method, url, body=None, headers=None, query=None):
+        if url.endswith('/login'):
+            logins.append('login')
+            return make_response({'access_token': 'token-{}'.format(len(logins)), 'refresh_token': 'refresh',
+                                  'expires_in': 3600})
+        if url.endswith('/login/refresh'):
+            logins.append('refresh')
+            if json.loads(body)['refreshToken'] != 'refresh':
+                raise PureportHttpError(make_response({'status': 400, 'message': 'invalid'}, status=400))
+            return make_response({'access_token': 'refreshed', 'expires_in': 3600})
+        if headers['Authorization'] == 'Bearer revoked':
+            raise PureportHttpError(make_response({'status': 401, 'message': 'unauthorized'}, status=401))
+        return make_response({'token': headers['Authorization']})
+
+    with patch('pureport.transport.Request.__call__', side_effect=request):
+        def call():
+            session = Session(tokens.Credentials('key', 'secret'), base_url, token_cache=token_cache)
+            return session('GET', '/accounts').json['token']
+
+        # the token is saved and reused by the next session
+        assert call() == 'Bearer token-1'
+        assert call() == 'Bearer token-1'
+        assert logins == ['login']
+
+        # the token is refreshed before it expires
+        entry = token_cache.get()
+        cache.write_json(token_cache.name, dict(entry, expires=time.time() + 60))
+        assert call() == 'Bearer refreshed'
+        assert logins == ['login', 'refresh']
+        assert token_cache.get()['refresh_token'] == 'refresh'
+
+        # the session logs in if the token can't be refreshed
+        cache.write_json(token_cache.name, dict(entry, refresh_token='expired', expires=time.time() - 1))
+        assert call() == 'Bearer token-4'
+        assert logins == ['login', 'refresh', 'refresh', 'login']
+
+        # the session logs in if the saved token is rejected
+        token_cache.put(dict(entry, access_token='revoked'))
+        assert call() == 'Bearer token-5'
+        assert logins[-1] == 'login'
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import time
+import threading
+
+from collections import namedtuple
+from unittest.mock import MagicMock, patch
+
+from pureport_client import transport
+from pureport_client.session import Session
+
+from ..utils import utils
+
+
+Credentials = namedtuple('Credentials', ('key', 'secret'))
+
+
+def test_transport_options():
+    options = transport.TransportOptions()
+    assert options.max_connections is None
+    assert options.max_per_host == transport.DEFAULT_MAX_PER_HOST
+    assert options.keepalive_timeout == transport.DEFAULT_KEEPALIVE_TIMEOUT
+
+    assert transport.TransportOptions(keepalive_timeout=0).keepalive_timeout == 0
+
+
+def test_pool_manager():
+    options = transport.TransportOptions(max_per_host=4, connect_timeout=2, read_timeout=30)
+    manager = transport.pool_manager(options)
+
+    pool = manager.connection_from_url('https://api.pureport.com')
+    assert pool.__class__.__name__ == 'HTTPSConnectionPool'
+    assert pool.pool.maxsize == 4
+    assert pool.block is True
+    assert pool.timeout.connect_timeout == 2
+    assert pool.timeout.read_timeout == 30
+
+    assert manager.connection_from_url('https://api.pureport.com/accounts') is pool
+
+
+def test_idle_connections_closed():
+    manager = transport.pool_manager(transport.TransportOptions(keepalive_timeout=10))
+    pool = manager.connection_from_url('https://api.pureport.com')
+
+    # take a slot from the pool for the mock connection
+    pool._get_conn()
+
+    conn = MagicMock()
+    pool._put_conn(conn)
+    assert pool._get_conn() is conn
+    assert conn.close.called is False
+
+    pool._put_conn(conn)
+    conn.last_used = time.monotonic() - 20
+    assert pool._get_conn() is conn
+    assert conn.close.called is True
+
+
+def test_request_limiter():
+    limiter = transport.RequestLimiter(2)
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def request():
+        with limiter.acquire():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] <= 2
+
+    with transport.RequestLimiter().acquire():
+        pass
+
+
+def test_session_transport():
+    options = transport.TransportOptions(max_connections=3, max_per_host=5)
+    session = Session(Credentials('key', 'secret'), 'https://{}'.format(utils.random_string()), options)
+
+    assert session.http.connection_pool_kw['maxsize'] == 5
+    assert session._limiter.limit == 3
+
+    with patch('pureport.session.Session.authorize') as mock_authorize:
+        session.authorization_header = {'Authorization': 'Bearer token'}
+        session.authorization_expiration = time.time() + 60
+        session.authorize()
+        assert mock_authorize.called is False
+
+        session.authorization_expiration = time.time() - 1
+        session.authorize()
+        assert mock_authorize.call_count == 1
+
+
+def test_single_flight():
+    flights = transport.SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = [0]
+    results = []
+
+    def func():
+        calls[0] += 1
+        started.set()
+        release.wait(5)
+        return calls[0]
+
+    def call():
+        results.append(flights.do('key', func))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=call) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert calls[0] == 1
+    assert sorted(results) == [(1, False)] + [(1, True)] * 4
+
+    # calls made after the first returns are not coalesced
+    assert flights.do('key', func) == (2, False)
+
+
+def test_session_coalesced():
+    session = Session(Credentials('key', 'secret'), 'https://{}'.format(utils.random_string()))
+    release = threading.Event()
+
+    def request(*args, **kwargs):
+        release.wait(5)
+        response = MagicMock(status=200, data=b'{"id": "network-1"}', headers={})
+        response.json = {'id': 'network-1'}
+        return response
+
+    with patch('pureport.session.Session.__call__', side_effect=request) as mock_call:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(session.get('/networks/network-1')))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert mock_call.call_count == 1
+        assert all(resp.json is results[0].json for resp in results)
+
+        session.post('/networks/network-1')
+        session.post('/networks/network-1')
+        assert mock_call.call_count == 3
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*_
+#
+# Copyright (c) 2020, Pureport, Inc.
+# All Rights Reserved
+
+import time
+import pkgutil
+import importlib
+import threading
+
+from unittest.mock import MagicMock
+
+from click import command, echo
+from click.testing import CliRunner
+
+from pureport_client import util
+
+from .commands import cli
+
+
+@command()
+def hello():
+    echo('hello')
+
+
+def test_lazy_group_defers_loader():
+    loader = MagicMock(return_value=hello)
+
+    grp = util.LazyGroup('cli')
+    grp.add_lazy_command('hello', loader)
+
+    assert loader.called is False
+    assert grp.list_commands(None) == ['hello']
+    assert loader.called is False
+
+    result = CliRunner().invoke(grp, args=['hello'])
+
+    assert result.exit_code == 0, result.output
+    assert result.output == 'hello\n'
+    assert loader.call_count == 1
+
+    assert grp.get_command(None, 'hello') is hello
+    assert loader.call_count == 1
+
+
+def test_lazy_group_loader():
+    loader = MagicMock(return_value=[hello])
+
+    grp = util.LazyGroup('cli', loader=loader)
+
+    assert loader.called is False
+    assert grp.list_commands(None) == ['hello']
+    assert grp.get_command(None, 'hello') is hello
+    assert loader.call_count == 1
+
+
+def test_lazy_group_concurrent():
+    def slow(result):
+        time.sleep(0.01)
+        return result
+
+    lazy = MagicMock(side_effect=lambda: slow(hello))
+    loader = MagicMock(side_effect=lambda: slow([command('world')(lambda: None)]))
+    grp = util.LazyGroup('cli', loader=loader)
+    grp.add_lazy_command('hello', lazy)
+
+    results = []
+    barrier = threading.Barrier(16)
+
+    def resolve():
+        barrier.wait()
+        results.append((grp.get_command(None, 'hello'), grp.get_command(None, 'world')))
+
+    threads = [threading.Thread(target=resolve) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 16
+    assert all(first is hello and second is not None for first, second in results)
+    assert lazy.call_count == 1
+    assert loader.call_count == 1
+
+
+def test_construct_commands_lazy_module():
+    from pureport_client.commands import accounts
+
+    cmd = {'name': 'networks',
+           'context': accounts.Command.networks,
+           'module': 'pureport_client.commands.accounts.networks'}
+
+    grp = next(util.construct_commands([cmd]))
+
+    assert isinstance(grp, util.LazyGroup)
+    assert grp.loader is not None
+    assert 'list' in grp.list_commands(None)
+    assert grp.loader is None
+
+
+def test_lazy_session():
+    session = MagicMock()
+    factory = MagicMock(return_value=session)
+
+    obj = util.LazySession(factory)
+    assert factory.called is False
+
+    assert obj.base_url is session.base_url
+    obj.get('/accounts')
+
+    assert factory.call_count == 1
+    session.get.assert_called_once_with('/accounts')
+
+
+def command_modules():
+    package = importlib.import_module('pureport_client.commands')
+    for info in pkgutil.walk_packages(package.__path__, 'pureport_client.commands.'):
+        module = importlib.import_module(info.name)
+        if hasattr(module, 'Command'):
+            yield module
+
+
+def test_commands_exclude_helpers():
+    for module in command_modules():
+        names = [f.__name__ for f in util.find_client_commands(module.Command)]
+        assert 'fan_out' not in names, module.__name__
+        assert 'url' not in names, module.__name__
+
+    for group in ('accounts', 'connections', 'tasks'):
+        result = CliRunner().invoke(cli, args=[group, '--help'])
+        assert result.exit_code == 0, result.output
+        assert 'fan-out' not in result.output
+        assert ' url ' not in result.output